@@ -1,7 +1,6 @@
 import os
 import cv2
 import numpy as np
-import mss
 import win32gui
 
 from app.resource_util import resource_path
@@ -23,7 +22,28 @@ def detect_pattern(pattern_img, screenshot_img,
                   is_pattern_img_masked=True,
                   is_screenshot_img_masked=False,
                   threshold=0.70):
+    """
+    Returns ((x, y), w, h) of the best match if its score reaches threshold, else None
+    """
+    score, loc, w, h = find_best_match(pattern_img, screenshot_img,
+                                       lower_color_range=lower_color_range,
+                                       upper_color_range=upper_color_range,
+                                       is_pattern_img_masked=is_pattern_img_masked,
+                                       is_screenshot_img_masked=is_screenshot_img_masked)
+    if score >= threshold:
+        return loc, w, h
+    else:
+        # print(f"⚠️ Pattern not found. Saved debug images:\n- {warn_template_path}\n- {warn_screenshot_path}")
+        return None
 
+def find_best_match(pattern_img, screenshot_img, 
+                  lower_color_range = [53, 53, 8], 
+                  upper_color_range = [71, 255, 255], 
+                  is_pattern_img_masked=True,
+                  is_screenshot_img_masked=False):
+    """
+    Best template match as (score, (x, y), w, h), one reduction over the correlation map
+    """
     # Convert template to HSV and isolate the text region
     pattern_masked = pattern_img if is_pattern_img_masked else get_masked_image(pattern_img, lower_color_range, upper_color_range)
 
@@ -35,23 +55,11 @@ def detect_pattern(pattern_img, screenshot_img,
     else: 
         screenshot_masked = get_masked_image(screenshot_img, lower_color_range, upper_color_range)
 
-    # print_image_info("Pattern", pattern_img)
-    # print_image_info("Screenshot", screenshot_img)
-
-    # print_image_info("pattern_masked", pattern_img)
-    # print_image_info("screenshot_masked", screenshot_masked)
-
     # Match template
     assert screenshot_masked.shape[2] == pattern_masked.shape[2], "Channel mismatch!"
     result = cv2.matchTemplate(screenshot_masked, pattern_masked, cv2.TM_CCOEFF_NORMED)
-    loc = np.where(result >= threshold)
-
-    matches = list(zip(*loc[::-1]))
-    if matches:
-        return matches[0], w, h
-    else:
-        # print(f"⚠️ Pattern not found. Saved debug images:\n- {warn_template_path}\n- {warn_screenshot_path}")
-        return None
+    _, max_score, _, max_loc = cv2.minMaxLoc(result)
+    return max_score, max_loc, w, h
 
 def read_image_file(image_path):
     template_resource_path = resource_path(image_path)
@@ -92,21 +100,30 @@ def get_window_screenshot_by_handle(hwnd):
     return get_screenshot(region)
 
 def get_screenshot(region):
-    with mss.mss() as sct:
-        return np.array(sct.grab(region))
+    # imported here: capture_backend -> frame -> this module
+    from app.v2.capture_backend import SCREEN_BACKEND
+    return SCREEN_BACKEND.grab_screen(region)
     
 def get_masked_image(image, 
                   lower_color_range = [53, 53, 8], 
-                  upper_color_range = [71, 255, 255]
+                  upper_color_range = [71, 255, 255],
+                  hsv=None,
+                  out=None,
+                  mask=None
                   ):
+    """
+    hsv: HSV conversion of image if the caller already has it (e.g. memoized by a Frame)
+    out, mask: BGR and single channel buffers of the image size written in place instead of allocated
+    """
     if image.shape[2] == 4:
         image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
-    background_img = np.zeros_like(image)
-    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    if hsv is None:
+        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
 
-    # Create mask & highlighted result
-    mask = cv2.inRange(hsv, np.array(lower_color_range), np.array(upper_color_range))
-    mask_inv = cv2.bitwise_not(mask)
-    masked = cv2.bitwise_and(image, image, mask=mask) + \
-        cv2.bitwise_and(background_img, background_img, mask=mask_inv)
-    return masked
\ No newline at end of file
+    # pixels in range keep their color, the others are black
+    mask = cv2.inRange(hsv, np.asarray(lower_color_range), np.asarray(upper_color_range), dst=mask)
+    if out is None:
+        out = np.zeros_like(image)
+    else:
+        out.fill(0)
+    return cv2.bitwise_and(image, image, dst=out, mask=mask)
\ No newline at end of file
@@ -1,27 +1,24 @@
 
 
-import ast
-import cv2
-import numpy as np
-from PyQt6.QtCore import QObject, QSettings, QDateTime
-from app.detect_game_widget import detect_pattern, read_image_file
+import time
+
+from PyQt6.QtCore import QObject
+from app.detect_game_widget import detect_pattern, find_best_match, read_image_file
 from app.log_factory import create_logger
+from app.v2.detection_config import DetectionConfig
+from app.v2.frame import Frame
+from app.v2.login_flow import LoginFlow
+from app.v2.metrics import SCENARIO_DETECTIONS
 from app.v2.resolver import Resolver
+from app.v2.screen_state import ScreenState
+from app.v2.template_tracker import TemplateRoiTracker
 from app.v2.window_util import WindowUtil
 
 
 LOGGER = create_logger()
 
 
-def to_str_time(timestamp: QDateTime):
-    if timestamp is None: return None
-    return timestamp
-
-LAST_SEEN_LOGIN = 'last_seen_login'
-LAST_SEEN_TOWN_STUCK = 'last_seen_town_stuck'
-
 class GameScenario(QObject):
-    DETECT_RETRY=3
     CLOSE_MEDICINE_BAG = "close_medicine_bag"
     CLOSE_MEDICINE_SHOP = "close_medicine_shop"
     MOVE_AROUND_ABIT = "move_around_abit"
@@ -31,236 +28,377 @@ class GameScenario(QObject):
     SELECT_CHARACTER_TO_LOGIN = "select_character_to_login"
     CRASH_DIALOG = "crash_dialog"
     SERVER_CONNECT="server_connect_warn"
+    GAME_AUTO_ON = "game_auto_on"
+    # screens this scenario can happen on, None = every screen
+    SCREEN_STATES = None
 
-    def __init__(self, settings: QSettings, worker_parent):
+    def __init__(self, config: DetectionConfig, worker_parent):
         super().__init__()
         self.worker_parent = worker_parent
-        self.game_data = {}
-        self._settings = settings
+        self.config = config
+        self.pixel_patterns = {}
+        self.detect_cache = {} # game_tab_id -> (hash of read regions, detection result)
+
+    def adopt_state(self, previous: 'GameScenario'):
+        """
+        Keep per-tab state of the scenario replaced by a config reload (timers live in the worker TabStateStore)
+        """
+        pass
 
-    def _settings(self) -> QSettings:
-        return self._settings
+    def forget_tabs(self, game_tab_ids):
+        """
+        Drop per-tab state of tabs evicted from the TabStateStore
+        """
+        for game_tab_id in game_tab_ids:
+            self.detect_cache.pop(game_tab_id, None)
     
     def parse_list_int(self, val: list) -> list[int]:
         return [int(x.strip()) for x in val]
     
-    def detect_and_solve(self, game_window, screenshot, game_tab_id="0") -> str:
+    def detect_and_solve(self, game_window, frame: Frame, game_tab_id="0") -> str:
         raise('Not implemented')
 
+    def runs_on(self, screen_state: str) -> bool:
+        return self.SCREEN_STATES is None or screen_state == ScreenState.UNKNOWN or screen_state in self.SCREEN_STATES
+
+    def on_screen_state_skipped(self, game_window, game_tab_id, screen_state: str):
+        """
+        Called instead of detect_and_solve when the tab shows a screen this scenario does not run on
+        """
+        pass
+
+    def has_pending_timer(self, game_tab_id) -> bool:
+        """
+        True while a timer of this scenario runs for the tab, the scheduler then revisits the tab sooner
+        """
+        return False
+
+    def add_pixel_pattern(self, name: str, pixel_points_config, color_tolerance=7):
+        self.pixel_patterns[name] = (pixel_points_config, color_tolerance)
+
+    def register_pixel_patterns(self, pixel_detector):
+        for name, (points, color_tolerance) in self.pixel_patterns.items():
+            if not pixel_detector.has_pattern(name):
+                pixel_detector.add_pattern(name, points, color_tolerance)
+
+    def capture_regions(self):
+        """
+        (x, y, width, height) window regions read besides the pixel patterns, None = whole window
+        """
+        return []
+
+    def read_regions(self):
+        """
+        (x, y, width, height) regions detection reads: pixel pattern points + capture_regions(), None = whole window
+        """
+        regions = self.capture_regions()
+        if regions is None:
+            return None
+        points = [(p[0], p[1], 1, 1) for pattern_points, _ in self.pixel_patterns.values() for p in pattern_points]
+        return points + list(regions)
+
+    def cached_detect(self, frame: Frame, game_tab_id, detect, regions=()):
+        """
+        detect(frame) result of the previous visit reused while the regions it reads show the same pixels.
+        Only the pixel work is skipped: timers depending on the result still advance on every visit.
+        regions: default read_regions(), None = whole window
+        """
+        if regions == ():
+            regions = self.read_regions()
+        if regions is None:
+            signature = frame.region_hash()
+        else:
+            signature = tuple(frame.region_hash(tuple(region)) for region in regions)
+        cached = self.detect_cache.get(game_tab_id)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        result = detect(frame)
+        self.detect_cache[game_tab_id] = (signature, result)
+        return result
+
+    def is_pattern_matched(self, frame: Frame, name: str) -> bool:
+        pixel_detector = self.worker_parent.pixel_detector
+        return pixel_detector.is_match(frame.pattern_mask(pixel_detector), name)
+
     def detect(self, pattern_img, screenshot,
                   lower_color_range = [53, 53, 8], 
                   upper_color_range = [71, 255, 255], 
                   threshold=0.7):
-        for i in range(0, self.DETECT_RETRY):
-            match = detect_pattern(pattern_img, screenshot, 
-                                   lower_color_range=lower_color_range,
-                                   upper_color_range=upper_color_range,
-                                   threshold=threshold
-                                   )
-            # print(f'detect stuck retry={i+1}, match={match}')
-            if match: return match
+        # matching is deterministic on the same screenshot, retrying it would give the same result
+        return detect_pattern(pattern_img, screenshot, 
+                              lower_color_range=lower_color_range,
+                              upper_color_range=upper_color_range,
+                              threshold=threshold
+                              )
 
     def solve(self):
         pass
 
-    def get_game_data(self, game_tab_id, key: str):
-        return self.game_data.get(game_tab_id, {}).get(key)
+    @property
+    def tab_states(self):
+        return self.worker_parent.tab_states
 
-    def set_game_data(self, game_tab_id, key, value):
-        self.game_data.setdefault(game_tab_id, {})[key] = value
+    def log_extra(self, game_tab_id, **fields) -> dict:
+        """
+        extra= of a log call about one tab, fields of the json log lines
+        """
+        return {"game_tab_id": game_tab_id, "scenario": type(self).__name__, **fields}
 
     def resolve_scenario(self, resolve_action: str, game_window, points: tuple):
+        LOGGER.info('Received resolve action request: %s - points: %s', resolve_action, points,
+                    extra={"scenario": type(self).__name__, "action": resolve_action, "window": game_window.title})
+        SCENARIO_DETECTIONS.inc(scenario=type(self).__name__, action=resolve_action)
+        # run once every scenario decided on the frame (see GameTabIterate.analyze_tab)
+        self.worker_parent.dispatch_action(resolve_action, game_window,
+                                           lambda: self.execute_resolve(resolve_action, game_window, points))
+
+    def execute_resolve(self, resolve_action: str, game_window, points: tuple):
+        """
+        Queue the input of the action, returns its Future (None if not supported)
+        """
         screen_points = [WindowUtil.to_screen_coord(p, game_window) for p in points]
-        LOGGER.info(f"Received resolve action request: {resolve_action} - points: {points}")
-        WindowUtil.focus(game_window)
+        hwnd = WindowUtil.get_hwnd(game_window)
+        # focus is ensured by the input thread right before the clicks, skipped if the window is in front
         if resolve_action in (self.CLOSE_MEDICINE_BAG, self.CLOSE_MEDICINE_SHOP):
-            Resolver.do_single_click(screen_points)
+            return Resolver.do_single_click(screen_points, window=game_window)
         elif resolve_action == self.MOVE_AROUND_ABIT:
-            Resolver.do_move_around(*screen_points[0])
+            return Resolver.do_move_around(*screen_points[0], hwnd=hwnd, window=game_window)
         elif resolve_action == self.AUTO_LOGIN:
-            Resolver.do_login_user_pass(screen_points)
+            return Resolver.do_click_login(screen_points, window=game_window)
 
         elif resolve_action == self.ACOUNT_LOGINED_WARNING:
-            Resolver.do_single_click(screen_points)
+            return Resolver.do_single_click(screen_points, window=game_window)
 
         elif resolve_action == self.SELECT_SERVER_TO_LOGIN:
-            Resolver.do_select_server(screen_points)
+            return Resolver.do_select_server(screen_points, window=game_window)
 
         elif resolve_action == self.SELECT_CHARACTER_TO_LOGIN:
-            Resolver.do_select_character(screen_points)
+            return Resolver.do_select_character(screen_points, window=game_window)
 
         elif resolve_action == self.SERVER_CONNECT:
-            Resolver.do_single_click(screen_points)
+            return Resolver.do_single_click(screen_points, window=game_window)
         else:
             LOGGER.info(f"{resolve_action} is not supported yet")
 
 
 class StuckBuyingGameScenario(GameScenario):
-    def __init__(self, settings, worker_parent):
-        super().__init__(settings, worker_parent)
+    SHOP_PATTERN = 'buy_stuck_shop'
+    BAG_PATTERN = 'buy_stuck_bag'
+    SCREEN_STATES = (ScreenState.IN_GAME,)
+
+    def __init__(self, config: DetectionConfig, worker_parent):
+        super().__init__(config, worker_parent)
         
-        points = settings.value('Detection/BuyStuckShopPoints', type=str)
-        self.shop_points = ast.literal_eval(points)
+        self.shop_points = config.buy_stuck_shop_points
         self.shop_close_points = ((self.shop_points[-1][0:2]),)
         
-        points = settings.value('Detection/BuyStuckBagPoints', type=str)
-        self.bag_points = ast.literal_eval(points)
+        self.bag_points = config.buy_stuck_bag_points
 
         self.bag_close_points = ((self.bag_points[-1][0:2]),)
+        self.add_pixel_pattern(self.SHOP_PATTERN, self.shop_points)
+        self.add_pixel_pattern(self.BAG_PATTERN, self.bag_points)
         
-    def detect_and_solve(self, game_window, screenshot, game_tab_id="0"):
+    def detect_and_solve(self, game_window, frame: Frame, game_tab_id="0"):
         try:
-            if WindowUtil.check_pixel_pattern(game_window, screenshot, self.shop_points, debug_name=None):
-                LOGGER.info(f'Found buy stuck - shop - {game_window.title}')
+            if self.is_pattern_matched(frame, self.SHOP_PATTERN):
+                LOGGER.info('Found buy stuck - shop - %s', game_window.title, extra=self.log_extra(game_tab_id))
                 self.resolve_scenario(self.CLOSE_MEDICINE_SHOP, game_window, self.shop_close_points)
 
-            if WindowUtil.check_pixel_pattern(game_window, screenshot, self.bag_points, debug_name=None):
-                LOGGER.info(f'Found buy stuck - bag - {game_window.title}')
+            if self.is_pattern_matched(frame, self.BAG_PATTERN):
+                LOGGER.info('Found buy stuck - bag - %s', game_window.title, extra=self.log_extra(game_tab_id))
                 self.resolve_scenario(self.CLOSE_MEDICINE_BAG, game_window, self.bag_close_points)
         except Exception as e:
             LOGGER.error(f'An error occured during  detect & solve medicine stuck: {e}', exc_info=True)
 
 class TownStuckGameScenario(GameScenario):
-    
-    def __init__(self, settings: QSettings, parent_worker):
-        super().__init__(settings, parent_worker)
-        self.move_around_x_offset = settings.value("Detection/TownStuckMoveOffsetX", 400, type=int)
-        self.move_around_y_offset = settings.value("Detection/TownStuckMoveOffsetY", 380, type=int)
-        self.TOWN_STUCK_SECONDS = settings.value("Detection/TownStuckTimeout", 20, type=int)
-        self.COOLDOWN_SECONDS = settings.value("Detection/CooldownSeconds", 5, type=int) # prevent immediate re-match
-        self.TOWN_NAME_THRESHOLD = settings.value("Detection/TownNameGreenThreshold", 0.7, type=float)
-        images = settings.value('Detection/TownImages', type=list)
-        self.town_images = [
-            read_image_file(img_path) for img_path in images
-        ]
-        self.lower_color_range = settings.value('Detection/TownStuckLowerColorRange', type=list)
-        self.upper_color_range = settings.value('Detection/TownStuckUpperColorRange', type=list)
-        self.lower_color_range = np.array(self.lower_color_range, dtype=np.uint8).flatten()
-        self.upper_color_range = np.array(self.upper_color_range, dtype=np.uint8).flatten()
+    GAME_AUTO_OFF_PATTERN = 'town_stuck_game_auto_off'
+    SCREEN_STATES = (ScreenState.IN_GAME,)
+
+    def __init__(self, config: DetectionConfig, parent_worker):
+        super().__init__(config, parent_worker)
+        self.move_around_x_offset, self.move_around_y_offset = config.town_move_offset
+        self.TOWN_STUCK_SECONDS = config.town_stuck_timeout_seconds
+        self.COOLDOWN_SECONDS = config.cooldown_seconds # prevent immediate re-match
+        self.TOWN_NAME_THRESHOLD = config.town_name_threshold
+        self._town_images = None # decoded on first detection, not at startup
+        self.lower_color_range = config.town_lower_color_range
+        self.upper_color_range = config.town_upper_color_range
+        # minimap town name ROI (x, y, width, height), None = search whole window
+        self.town_region = config.town_stuck_region
+        # remember where town name matched per tab, search around it first
+        self.town_tracker = TemplateRoiTracker(padding=config.town_roi_padding,
+                                               full_scan_every=config.town_full_scan_every)
 
         # while town stuck, also check if char's blood bar is full for a duration, if so try to click game auto button
-        points = settings.value('Detection/GameAutoOff2', type=str)
-        self.game_auto_off_points2 = ast.literal_eval(points)
+        self.game_auto_off_points2 = config.game_auto_off2_points
+        self.add_pixel_pattern(self.GAME_AUTO_OFF_PATTERN, self.game_auto_off_points2, color_tolerance=2)
 
-        points = settings.value('Detection/GameAutoButtonPoints', type=str)
-        self.game_auto_points = (ast.literal_eval(points),)
+        self.game_auto_points = (config.game_auto_button_point,)
+
+    def adopt_state(self, previous: 'TownStuckGameScenario'):
+        super().adopt_state(previous)
+        # learnt town name locations stay valid while the templates and search region are the same
+        if previous.config.town_images == self.config.town_images and previous.town_region == self.town_region:
+            self.town_tracker.locations = previous.town_tracker.locations
+            self.town_tracker.visits = previous.town_tracker.visits
+
+    def forget_tabs(self, game_tab_ids):
+        super().forget_tabs(game_tab_ids)
+        for game_tab_id in game_tab_ids:
+            self.town_tracker.forget(game_tab_id)
 
         
-    def detect_and_solve(self, game_window, screenshot, game_tab_id="0"):
+    def detect_and_solve(self, game_window, frame: Frame, game_tab_id="0"):
         try:
-            bgr_img = self.to_numpy_bgr_image(screenshot)
-            elapsed_seconds = self._get_stuck_elaped_seconds(game_window, bgr_img, game_tab_id)
+            elapsed_seconds = self._get_stuck_elaped_seconds(game_window, frame, game_tab_id)
             # it's time to solve the stuck
             if elapsed_seconds is not None:
-                LOGGER.debug(f"Town stuck elaped time: {elapsed_seconds} - {game_tab_id}")
+                LOGGER.debug('Town stuck elaped time: %s - %s', elapsed_seconds, game_tab_id, extra=self.log_extra(game_tab_id))
 
                 # Cooldown check
                 if elapsed_seconds < self.COOLDOWN_SECONDS:
-                    LOGGER.debug(f"⏳ In cooldown period, skipping... - {game_tab_id}")
+                    LOGGER.debug('⏳ In cooldown period, skipping... - %s', game_tab_id, extra=self.log_extra(game_tab_id))
                 
                 if elapsed_seconds >= self.TOWN_STUCK_SECONDS:
-                    LOGGER.info(f'stuck in town for {elapsed_seconds}, try to solve - {game_tab_id}')
-                    self._detect_game_auto_is_off(game_window, screenshot, game_tab_id)
+                    LOGGER.info('stuck in town for %s, try to solve - %s', elapsed_seconds, game_tab_id, extra=self.log_extra(game_tab_id))
+                    self._detect_game_auto_is_off(game_window, frame, game_tab_id)
                     self._solve_town_stuck(game_window, game_tab_id)
                     # reset state
-                    self.set_game_data(game_tab_id, LAST_SEEN_TOWN_STUCK, None)
+                    self.tab_states.update(game_tab_id, last_seen_town_stuck=None)
         except Exception as e:
             LOGGER.error(f'An error occured during  detect & solve town stuck: {e}', exc_info=True)
 
-    def to_numpy_bgr_image(self, screenshot):
-        rgb_img = np.array(screenshot) # screeshot is PIL Image so we need to convert to numpy
-        bgr_img = cv2.cvtColor(rgb_img, cv2.COLOR_RGB2BGR)
-        return bgr_img
-
-    def _detect_town_stuck(self, pattern_img, screenshot_img):
-        
-        return detect_pattern(pattern_img, screenshot_img,
-                              lower_color_range=self.lower_color_range,
-                              upper_color_range=self.upper_color_range,
-                              threshold=self.TOWN_NAME_THRESHOLD
-                              )
-
-    def _get_stuck_elaped_seconds(self, game_window, screenshot, game_tab_id):
-        for pattern_img in self.town_images:
-            match = self._detect_town_stuck(pattern_img, screenshot)
-            if match is None:
-                continue
-            
-            last_seen: QDateTime = self.get_game_data(game_tab_id, LAST_SEEN_TOWN_STUCK)
+    @property
+    def town_images(self):
+        if self._town_images is None:
+            self._town_images = [
+                read_image_file(img_path) for img_path in self.config.town_images
+            ]
+        return self._town_images
+
+    def on_screen_state_skipped(self, game_window, game_tab_id, screen_state: str):
+        # not in game => not stuck in town, same as no town name match
+        if self.tab_states.get(game_tab_id).last_seen_town_stuck is not None:
+            self.tab_states.update(game_tab_id, last_seen_town_stuck=None)
+
+    def has_pending_timer(self, game_tab_id) -> bool:
+        return self.tab_states.get(game_tab_id).last_seen_town_stuck is not None
+
+    def capture_regions(self):
+        if self.town_region is None:
+            return None
+        return [self.town_region]
+
+    def _detect_town_stuck(self, pattern_img, masked_img):
+        score, loc, w, h = find_best_match(pattern_img, masked_img,
+                                           lower_color_range=self.lower_color_range,
+                                           upper_color_range=self.upper_color_range,
+                                           is_screenshot_img_masked=True)
+        if score < self.TOWN_NAME_THRESHOLD:
+            return None
+        return loc, w, h, score
+
+    def _get_stuck_elaped_seconds(self, game_window, frame: Frame, game_tab_id):
+        # the minimap rarely changes while stuck: matching is skipped while the town region pixels are unchanged
+        found = self.cached_detect(frame, game_tab_id, lambda f: self._search_town_name(f, game_tab_id),
+                                   regions=None if self.town_region is None else [self.town_region])
+        if found is not None:
+            template_idx, (loc, w, h, score) = found
+            LOGGER.debug('Town name matched: template=%s, score=%.2f, loc=%s - %s', template_idx, score, loc, game_tab_id,
+                         extra=self.log_extra(game_tab_id))
+            last_seen = self.tab_states.get(game_tab_id).last_seen_town_stuck
             if last_seen is None:
-                self.set_game_data(game_tab_id, LAST_SEEN_TOWN_STUCK, QDateTime.currentDateTime())
+                self.tab_states.update(game_tab_id, last_seen_town_stuck=time.time())
                 return None
             else:
-                duration = last_seen.secsTo(QDateTime.currentDateTime())
-                LOGGER.info(f'Found Town stuck, elapsed seconds: {duration} - {game_tab_id}')
+                duration = time.time() - last_seen
+                LOGGER.info('Found Town stuck, elapsed seconds: %.0f - %s', duration, game_tab_id, extra=self.log_extra(game_tab_id))
                 return duration
 
         # No match found, reset
-        self.set_game_data(game_tab_id, LAST_SEEN_TOWN_STUCK, None)
+        if self.tab_states.get(game_tab_id).last_seen_town_stuck is not None:
+            self.tab_states.update(game_tab_id, last_seen_town_stuck=None)
         return None
 
+    def _search_town_name(self, frame: Frame, game_tab_id):
+        # masked once per frame, shared by every town template
+        masked_img = frame.masked(self.lower_color_range, self.upper_color_range, region=self.town_region)
+        return self.town_tracker.search(game_tab_id, self.town_images, masked_img, self._detect_town_stuck)
+
     def _solve_town_stuck(self, game_window, game_tab_id):
-        LOGGER.info(f'Try to solve town stuck: move around - {game_tab_id}')
+        LOGGER.info('Try to solve town stuck: move around - %s', game_tab_id,
+                    extra=self.log_extra(game_tab_id, action=self.MOVE_AROUND_ABIT))
         points = ((self.move_around_x_offset, self.move_around_y_offset),)
         self.resolve_scenario(self.MOVE_AROUND_ABIT, game_window, points)
 
-    def _detect_game_auto_is_off(self, game_window, screenshot, game_tab_id):
-        if WindowUtil.check_pixel_pattern(game_window, screenshot, self.game_auto_off_points2, color_tolerance=2):
-            LOGGER.info(f'Game auto seems off while checking town stuck for {game_tab_id} => simulate click game auto button')
+    def _detect_game_auto_is_off(self, game_window, frame: Frame, game_tab_id):
+        if self.is_pattern_matched(frame, self.GAME_AUTO_OFF_PATTERN):
+            LOGGER.info('Game auto seems off while checking town stuck for %s => simulate click game auto button',
+                        game_tab_id, extra=self.log_extra(game_tab_id, action=self.GAME_AUTO_ON))
             screen_points = [WindowUtil.to_screen_coord(p, game_window) for p in self.game_auto_points]
-            Resolver.do_single_click(screen_points)
+            SCENARIO_DETECTIONS.inc(scenario=type(self).__name__, action=self.GAME_AUTO_ON)
+            self.worker_parent.dispatch_action(self.GAME_AUTO_ON, game_window,
+                                               lambda: Resolver.do_single_click(screen_points, window=game_window))
 
 
 class UserPassLoginScenario(GameScenario):
-    def __init__(self, settings, worker_parent):
-        super().__init__(settings, worker_parent)
+    LOGIN_PATTERN = 'user_pass_login'
+    SCREEN_STATES = (ScreenState.LOGIN,)
 
-        self.login_check_confirm_duration = settings.value('Detection/LoginCheckConfirmDurationSeconds', 60, type=int)
+    def __init__(self, config: DetectionConfig, worker_parent):
+        super().__init__(config, worker_parent)
 
-        points = settings.value('Detection/LoginPoints', type=str)
-        self.login_points = ast.literal_eval(points)
+        self.login_check_confirm_duration = config.login_check_confirm_seconds
+        self.login_points = config.login_points
+        self.user_pass_login_points = config.user_pass_login_points
+        self.add_pixel_pattern(self.LOGIN_PATTERN, self.user_pass_login_points)
 
-        points = settings.value('Detection/UserPassLoginPoints', type=str)
-        self.user_pass_login_points = ast.literal_eval(points)
+    def has_pending_timer(self, game_tab_id) -> bool:
+        return self.tab_states.get(game_tab_id).last_seen_login is not None
 
-    def detect_and_solve(self, game_window, screenshot, game_tab_id="0"):
+    def detect_and_solve(self, game_window, frame: Frame, game_tab_id="0"):
         try:
-            if self.should_login(game_window, screenshot, game_tab_id):
+            if self.should_login(game_window, frame, game_tab_id):
+                # only the login click, select server/character are done when a later visit shows their screen
                 self.resolve_scenario(self.AUTO_LOGIN, game_window, self.login_points)
-                self.set_game_data(game_tab_id, LAST_SEEN_LOGIN, None)
+                self.tab_states.update(game_tab_id, last_seen_login=None)
+                self.worker_parent.login_flow.advance(game_tab_id, LoginFlow.LOGIN_CLICKED)
                 return "LOGINED"
 
         except Exception as e:
             LOGGER.error(f'An error occured during  detect & solve login window: {e}', exc_info=True)
 
-    def should_login(self, game_window, screenshot, game_tab_id):
-        if WindowUtil.check_pixel_pattern(game_window, screenshot, self.user_pass_login_points):
-            LOGGER.info(f"Found User pass login window: {game_tab_id}")
-            if self.get_game_data(game_tab_id, LAST_SEEN_LOGIN) is None:
-                self.set_game_data(game_tab_id, LAST_SEEN_LOGIN, QDateTime.currentDateTime())
+    def should_login(self, game_window, frame: Frame, game_tab_id):
+        if self.is_pattern_matched(frame, self.LOGIN_PATTERN):
+            LOGGER.info('Found User pass login window: %s', game_tab_id, extra=self.log_extra(game_tab_id))
+            last_seen = self.tab_states.get(game_tab_id).last_seen_login
+            if last_seen is None:
+                self.tab_states.update(game_tab_id, last_seen_login=time.time())
                 return False
             else:
-                duration = self.get_game_data(game_tab_id, LAST_SEEN_LOGIN).secsTo(QDateTime.currentDateTime())
-                LOGGER.info(f"Login waiting: {game_tab_id} - duration: {duration} seconds")
+                duration = time.time() - last_seen
+                LOGGER.info('Login waiting: %s - duration: %.0f seconds', game_tab_id, duration, extra=self.log_extra(game_tab_id))
                 if duration >= self.login_check_confirm_duration:
-                    LOGGER.info(f"Found login window: {game_tab_id} - duration: {duration} seconds")
-                    self.set_game_data(game_tab_id, LAST_SEEN_LOGIN, None)
+                    LOGGER.info('Found login window: %s - duration: %.0f seconds', game_tab_id, duration, extra=self.log_extra(game_tab_id))
+                    self.tab_states.update(game_tab_id, last_seen_login=None)
             return True
         return False
 
 # Taikhoan dang dang nhap warn
 class AccountLoginedWarningScenario(GameScenario):
-    def __init__(self, settings: QSettings, parent_worker):
-        super().__init__(settings, parent_worker)
-        points = settings.value('Detection/GameWindowAccountLoginedWarnPoints', type=str)
-        self.login_warn_points = ast.literal_eval(points)
+    LOGIN_WARN_PATTERN = 'account_logined_warn'
+    SCREEN_STATES = (ScreenState.WARNING_DIALOG,)
+
+    def __init__(self, config: DetectionConfig, parent_worker):
+        super().__init__(config, parent_worker)
+        self.login_warn_points = config.account_logined_warn_points
         self.close_warn_points = ((self.login_warn_points[-1][0:2]),)
+        self.add_pixel_pattern(self.LOGIN_WARN_PATTERN, self.login_warn_points)
     
-    def detect_and_solve(self, game_window, screenshot, game_tab_id="0"):
+    def detect_and_solve(self, game_window, frame: Frame, game_tab_id="0"):
         try:
-            if WindowUtil.check_pixel_pattern(game_window, screenshot, self.login_warn_points, 
-                                             debug_name=None):
-                LOGGER.info(f"Found login window - Tai khoan dang dang nhap: {game_tab_id}")
+            if self.is_pattern_matched(frame, self.LOGIN_WARN_PATTERN):
+                LOGGER.info('Found login window - Tai khoan dang dang nhap: %s', game_tab_id, extra=self.log_extra(game_tab_id))
                 self.resolve_scenario(self.ACOUNT_LOGINED_WARNING, game_window, self.close_warn_points)
         
         except Exception as e:
@@ -271,20 +409,23 @@ class LoginSelectServerScenario(GameScenario):
     """
     Sometimes auto login missed second step click select server to login, this is to solve the issue
     """
-    def __init__(self, settings: QSettings, parent_worker):
-        super().__init__(settings, parent_worker)
-        points = settings.value('Detection/GameWindowLoginSelectServerPoints', type=str)
-        self.game_window_select_server_points = ast.literal_eval(points)
-        points = settings.value('Detection/LoginPoints', type=str)
-        self.login_points = ast.literal_eval(points)
+    SELECT_SERVER_PATTERN = 'login_select_server'
+    SCREEN_STATES = (ScreenState.SERVER_SELECT,)
+
+    def __init__(self, config: DetectionConfig, parent_worker):
+        super().__init__(config, parent_worker)
+        self.game_window_select_server_points = config.login_select_server_points
+        self.login_points = config.login_points
+        self.add_pixel_pattern(self.SELECT_SERVER_PATTERN, self.game_window_select_server_points)
     
-    def detect_and_solve(self, game_window, screenshot, game_tab_id="0"):
+    def detect_and_solve(self, game_window, frame: Frame, game_tab_id="0"):
         try:
-            LOGGER.debug(f'checking select server login scenario: {game_tab_id}')
+            LOGGER.debug('checking select server login scenario: %s', game_tab_id, extra=self.log_extra(game_tab_id))
             
-            if WindowUtil.check_pixel_pattern(game_window, screenshot, self.game_window_select_server_points):
-                LOGGER.info(f"=====Found login window - select server: {game_tab_id}")
+            if self.is_pattern_matched(frame, self.SELECT_SERVER_PATTERN):
+                LOGGER.info('=====Found login window - select server: %s', game_tab_id, extra=self.log_extra(game_tab_id))
                 self.resolve_scenario(self.SELECT_SERVER_TO_LOGIN, game_window, self.login_points)
+                self.worker_parent.login_flow.advance(game_tab_id, LoginFlow.SERVER_SELECTED)
                 return "LOGINED"
         
         except Exception as e:
@@ -295,46 +436,65 @@ class LoginSelectCharacterScenario(GameScenario):
     """
     Sometimes auto login missed 3rd step click select char to login, this is to solve the issue
     """
-    def __init__(self, settings: QSettings, parent_worker):
-        super().__init__(settings, parent_worker)
-        points = settings.value('Detection/GameWindowLoginSelectCharacterPoints', type=str)
-        self.game_window_select_character_points = ast.literal_eval(points)
-        points = settings.value('Detection/LoginPoints', type=str)
-        self.login_points = ast.literal_eval(points)
+    SELECT_CHARACTER_PATTERN = 'login_select_character'
+    SCREEN_STATES = (ScreenState.CHARACTER_SELECT,)
+
+    def __init__(self, config: DetectionConfig, parent_worker):
+        super().__init__(config, parent_worker)
+        self.game_window_select_character_points = config.login_select_character_points
+        self.login_points = config.login_points
+        self.add_pixel_pattern(self.SELECT_CHARACTER_PATTERN, self.game_window_select_character_points)
     
-    def detect_and_solve(self, game_window, screenshot, game_tab_id="0"):
+    def detect_and_solve(self, game_window, frame: Frame, game_tab_id="0"):
         try:
-            LOGGER.debug(f'checking select character login scenario: {game_tab_id}')
+            LOGGER.debug('checking select character login scenario: %s', game_tab_id, extra=self.log_extra(game_tab_id))
             
-            if WindowUtil.check_pixel_pattern(game_window, screenshot, self.game_window_select_character_points):
-                LOGGER.info(f"=====Found login window - select character: {game_tab_id}")
+            if self.is_pattern_matched(frame, self.SELECT_CHARACTER_PATTERN):
+                LOGGER.info('=====Found login window - select character: %s', game_tab_id, extra=self.log_extra(game_tab_id))
                 self.resolve_scenario(self.SELECT_CHARACTER_TO_LOGIN, game_window, self.login_points)
+                self.worker_parent.login_flow.advance(game_tab_id, LoginFlow.CHARACTER_SELECTED)
                 return "LOGINED"
         
         except Exception as e:
             LOGGER.error(f'An error occured during  detect & solve login window: {e}')
 
 class ServerConnectWarnScenario(GameScenario):
-    def __init__(self, settings: QSettings, parent_worker):
-        super().__init__(settings, parent_worker)
-        points = settings.value('Detection/GameLoginServerConnectWarnPoints', type=str)
-        self.server_connect_dialog_points = ast.literal_eval(points)
+    SERVER_CONNECT_PATTERN = 'server_connect_warn'
+    SCREEN_STATES = (ScreenState.WARNING_DIALOG,)
+
+    def __init__(self, config: DetectionConfig, parent_worker):
+        super().__init__(config, parent_worker)
+        self.server_connect_dialog_points = config.server_connect_warn_points
         self.close_points = ((self.server_connect_dialog_points[-1][0:2]),)
+        self.add_pixel_pattern(self.SERVER_CONNECT_PATTERN, self.server_connect_dialog_points)
         # print(self.close_warn_points)
     
-    def detect_and_solve(self, game_window, screenshot, game_tab_id="0"):
+    def detect_and_solve(self, game_window, frame: Frame, game_tab_id="0"):
         try:
-            if WindowUtil.check_pixel_pattern(game_window, screenshot, self.server_connect_dialog_points):
-                LOGGER.info(f"Found Server connect warn: {game_tab_id}")
+            if self.is_pattern_matched(frame, self.SERVER_CONNECT_PATTERN):
+                LOGGER.info('Found Server connect warn: %s', game_tab_id, extra=self.log_extra(game_tab_id))
                 self.resolve_scenario(self.SERVER_CONNECT, game_window, self.close_points)
         
         except Exception as e:
             LOGGER.error(f'An error occured during  detect & solve login window: {e}', exc_info=True)
 
+def create_game_scenarios(config: DetectionConfig, worker_parent) -> list[GameScenario]:
+    """
+    Scenarios checked on every game tab, in order
+    """
+    return [
+        StuckBuyingGameScenario(config, worker_parent),
+        UserPassLoginScenario(config, worker_parent),
+        TownStuckGameScenario(config, worker_parent),
+        AccountLoginedWarningScenario(config, worker_parent),
+        LoginSelectServerScenario(config, worker_parent),
+        LoginSelectCharacterScenario(config, worker_parent),
+        ServerConnectWarnScenario(config, worker_parent)
+    ]
+
 class CrashDialogScenario:
-    def __init__(self, settings: QSettings, parent):
-        points = settings.value('Detection/CrashDialogPoints', type=str)
-        self.crash_dialog_points = ast.literal_eval(points)
+    def __init__(self, config: DetectionConfig, parent):
+        self.crash_dialog_points = config.crash_dialog_points
         self.close_points = ((self.crash_dialog_points[-1][0:2]),)
         # print(self.close_warn_points)
     
@@ -343,17 +503,15 @@ class CrashDialogScenario:
         try:
             LOGGER.info(f"Found Crash report: {title}")
             screen_points = [WindowUtil.to_screen_coord(p, game_window) for p in self.close_points]
-            WindowUtil.focus(game_window)
-            Resolver.do_single_click(screen_points)
+            Resolver.do_single_click(screen_points, window=game_window)
         
         except Exception as e:
             LOGGER.error(f'An error occured during  detect & solve crash report: {e}', exc_info=True)
 
 
 class ReloadGameTabScenario:
-    def __init__(self, settings: QSettings, parent):
-        points = settings.value('Detection/CrashDialogPoints', type=str)
-        self.crash_dialog_points = ast.literal_eval(points)
+    def __init__(self, config: DetectionConfig, parent):
+        self.crash_dialog_points = config.crash_dialog_points
         self.close_points = ((self.crash_dialog_points[-1][0:2]),)
     
     def resolve_reload(self, game_window):
@@ -361,8 +519,7 @@ class ReloadGameTabScenario:
         try:
             LOGGER.info(f"Found Crash report: {title}")
             screen_points = [WindowUtil.to_screen_coord(p, game_window) for p in self.close_points]
-            WindowUtil.focus(game_window)
-            Resolver.do_single_click(screen_points)
+            Resolver.do_single_click(screen_points, window=game_window)
         
         except Exception as e:
             LOGGER.error(f'An error occured during  detect & solve crash report: {e}', exc_info=True)
\ No newline at end of file
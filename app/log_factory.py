@@ -1,45 +1,177 @@
 # log_util.py
 
+import atexit
+import json
 import logging
 import io
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 import os
 
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s'
+# record attributes passed with extra={...} copied to the json lines
+EXTRA_FIELDS = ('game_tab_id', 'scenario', 'action', 'window', 'screen_state', 'event')
+MAX_BYTES = 10 * 1024 * 1024
+BACKUP_COUNT = 5
+REPEAT_WINDOW_SECONDS = 60
+# folder of the log files instead of log/, e.g. a tmp folder for the tests
+LOG_DIR_ENV = 'VLVAUTO_LOG_DIR'
+
+_listeners = {}  # log file -> (QueueHandler, QueueListener)
+_lock = threading.Lock()
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    Puts the record on the queue as is: message % args is formatted by the writer thread,
+    only the traceback is rendered here while it is still current.
+    """
+
+    def prepare(self, record):
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record):
+        event = {
+            "t": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "src": f'{record.filename}:{record.lineno}',
+            "msg": record.getMessage(),
+        }
+        for field in EXTRA_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                event[field] = value
+        if record.exc_text:
+            event["exc"] = record.exc_text
+        return json.dumps(event, ensure_ascii=False, default=str)
+
+
+class RepeatSuppressingListener(QueueListener):
+    """
+    Writer thread. The same message (logger, level, text) seen again within window_seconds is dropped;
+    the drop count is written once the window is over. Errors and records with a traceback are always written.
+    """
+
+    def __init__(self, log_queue, *handlers, window_seconds=REPEAT_WINDOW_SECONDS):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.window_seconds = window_seconds
+        self._seen = {}  # key -> [first time in window, dropped count]
+        self._pruned_at = time.monotonic()
+
+    def handle(self, record):
+        if record.levelno >= logging.ERROR or record.exc_text:
+            # each traceback can differ under the same message
+            super().handle(record)
+            return
+        now = time.monotonic()
+        message = record.getMessage()
+        key = (record.name, record.levelno, message)
+        seen = self._seen.get(key)
+        if seen is not None and now - seen[0] < self.window_seconds:
+            seen[1] += 1
+            return
+        if now - self._pruned_at > self.window_seconds:
+            self._prune(now)
+            seen = None  # its drop count (if any) was just reported
+        self._emit(record, message, seen, now)
+        self._seen[key] = [now, 0]
+
+    def _emit(self, record, message, seen, now):
+        if seen is not None and seen[1]:
+            message = f'{message} (repeated {seen[1]} more times in the last {now - seen[0]:.0f}s)'
+        # message is final: handlers must not apply args again
+        record.msg, record.args = message, None
+        super().handle(record)
+
+    def _prune(self, now):
+        self._pruned_at = now
+        expired = {k: v for k, v in self._seen.items() if now - v[0] >= self.window_seconds}
+        for key, seen in expired.items():
+            del self._seen[key]
+            if seen[1]:
+                name, level, message = key
+                summary = logging.makeLogRecord({"name": name, "levelno": level, "levelname": logging.getLevelName(level),
+                                                 "msg": message, "filename": "log_factory.py", "lineno": 0})
+                self._emit(summary, message, seen, now)
+
+
+def _stdout_stream():
+    # Wrap sys.stdout for UTF-8 encoding
+    try:
+        return io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', line_buffering=True)
+    except Exception:
+        return sys.stdout
+
+
+def _queue_handler(log_file):
+    """
+    One writer thread per log file shared by every logger: console, text log and <log>.jsonl events
+    """
+    with _lock:
+        if log_file in _listeners:
+            return _listeners[log_file][0]
+
+        formatter = logging.Formatter(TEXT_FORMAT)
+        stream_handler = logging.StreamHandler(_stdout_stream())
+        stream_handler.setLevel(logging.DEBUG)
+        stream_handler.setFormatter(formatter)
+
+        # Ensure log directory exists
+        os.makedirs(os.path.dirname(log_file), exist_ok=True)
+
+        file_handler = RotatingFileHandler(log_file, mode='a', maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT,
+                                           encoding='utf-8', delay=False)
+        file_handler.setFormatter(formatter)
+
+        json_handler = RotatingFileHandler(os.path.splitext(log_file)[0] + '.jsonl', mode='a', maxBytes=MAX_BYTES,
+                                           backupCount=BACKUP_COUNT, encoding='utf-8', delay=False)
+        json_handler.setFormatter(JsonLinesFormatter())
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = LazyQueueHandler(log_queue)
+        listener = RepeatSuppressingListener(log_queue, stream_handler, file_handler, json_handler)
+        listener.start()
+        _listeners[log_file] = (queue_handler, listener)
+        return queue_handler
+
+
+def shutdown_logging():
+    """
+    Write what is still queued and stop the writer threads (also run at exit)
+    """
+    with _lock:
+        listeners = list(_listeners.values())
+        _listeners.clear()
+    for _, listener in listeners:
+        listener.stop()
+
+
+atexit.register(shutdown_logging)
+
+
 def create_logger(name="auto-tool", log_file="log/auto-tool.log", level=logging.INFO):
+    """
+    Logger writing through a background thread: logging calls only queue the record, so use
+    %-style arguments (LOGGER.debug('... %s', value)) to skip formatting suppressed levels entirely.
+    extra={"game_tab_id": ..., "scenario": ...} fields end up in the json lines.
+    """
     logger = logging.getLogger(name)
     logger.setLevel(level)
 
     if logger.handlers:  # Prevent duplicate handlers
         return logger
 
-    # Wrap sys.stdout for UTF-8 encoding
-    try:
-        stream = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', line_buffering=True)
-    except Exception:
-        stream = sys.stdout
-
-    stream_handler = logging.StreamHandler(stream)
-    stream_handler.setLevel(logging.DEBUG)
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s')
-
-    stream_handler.setFormatter(formatter)
-    logger.addHandler(stream_handler)
-
-    # Ensure log directory exists
-    os.makedirs(os.path.dirname(log_file), exist_ok=True)
-
-    # Rotating file handler
-    file_handler = RotatingFileHandler(
-        log_file,
-        mode='a',
-        maxBytes=128 * 1024,
-        backupCount=1,
-        encoding='utf-8',
-        delay=False
-    )
-    file_handler.setLevel(level)
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
-
+    log_dir = os.environ.get(LOG_DIR_ENV)
+    if log_dir:
+        log_file = os.path.join(log_dir, os.path.basename(log_file))
+    logger.addHandler(_queue_handler(log_file))
     return logger
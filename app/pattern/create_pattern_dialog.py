@@ -12,6 +12,7 @@ from datetime import datetime
 
 from app.flow_layout import FlowLayout
 from app.pattern.image_select_dialog import ImageSelectDialog
+from app.v2.window_registry import WINDOW_REGISTRY
 from app.v2.window_util import WindowUtil
 
 TMP_DIR = "data/tmp"
@@ -85,7 +86,7 @@ class PatternCreatorDialog(QDialog):
             self.capture_button.setEnabled(True)
 
     def capture_window_image(self):
-        windows = WindowUtil.find_game_windows(self.selected_window)
+        windows = WINDOW_REGISTRY.lookup(self.selected_window)
         if not windows:
             return
         win = windows[0]
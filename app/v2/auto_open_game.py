@@ -1,9 +1,8 @@
 
-import ast
 import time
-from PyQt6.QtCore import QSettings, QDateTime
 
 from app.log_factory import create_logger
+from app.v2.detection_config import DetectionConfig
 from app.v2.resolver import Resolver
 from app.v2.window_util import WindowUtil
 
@@ -15,48 +14,47 @@ class AutoOpenGame:
     Next, auto login scenario check will try to login 
     Next, check game auto is OFF will try to turn ON game auto
     Time to check duration should be long like 10 minutes/30 minutes/60 minutes
+    The check period start is kept in the TabStateStore (self.tab_states) as the state of the main tab.
     """
-    def __init__(self, settings: QSettings):
-        self.check_duration_seconds = settings.value('Detection/GameExitDurationSeconds', defaultValue=60, type=int)
-        points = settings.value('Detection/GameShortcutPoints', defaultValue="", type=str)
-        self.game_shortcut_points = ast.literal_eval(points)
+    def __init__(self, config: DetectionConfig):
+        self.apply_auto_open_config(config)
 
-        indexes = settings.value('Detection/GameShortcutIndexesToCheck', defaultValue=[0], type=list)
-        self.game_shortcut_indexes = [int(idx) for idx in indexes]
-
-        self.main_tab_point = [int(x) for x in settings.value('Detection/MainTabPoints', type=list)]
-        self.game_shortcut_indexes = [int(idx) for idx in indexes]
-        
-
-        # state check start_time
-        self.auto_open_check_start_time = {}
+    def apply_auto_open_config(self, config: DetectionConfig):
+        self.check_duration_seconds = config.game_exit_duration_seconds
+        self.game_shortcut_points = config.game_shortcut_points
+        self.game_shortcut_indexes = config.game_shortcut_indexes
+        self.main_tab_point = config.main_tab_point
 
     def check_game_exit(self, hwnd, game_window):
-        start_time = self.auto_open_check_start_time.get(hwnd)
+        main_tab_id = self.make_game_tab_id(game_window, 0)
+        self.tab_states.touch(main_tab_id)
+        start_time = self.tab_states.get(main_tab_id).game_exit_check_at
         if start_time is None:
-            self.auto_open_check_start_time[hwnd] = QDateTime.currentDateTime()
+            self.tab_states.update(main_tab_id, game_exit_check_at=time.time())
             return
         else:
-            elapsed = start_time.secsTo(QDateTime.currentDateTime())
+            elapsed = time.time() - start_time
             if elapsed < self.check_duration_seconds:
                 return
             
         # process check game exit and try re-open game tab
-        LOGGER.info(f'===time to check game tab crashed - elapsed seconds: {elapsed}, window: {game_window.title}')
+        LOGGER.info('===time to check game tab crashed - elapsed seconds: %.0f, window: %s', elapsed, game_window.title,
+                    extra={'game_tab_id': main_tab_id, 'window': game_window.title})
         for idx in self.game_shortcut_indexes:
             shortcut_point = self.game_shortcut_points[idx]
-            LOGGER.info(f'simulate click game shortcut_point: {shortcut_point}, window: {game_window.title}')
+            LOGGER.info('simulate click game shortcut_point: %s, window: %s', shortcut_point, game_window.title,
+                        extra={'game_tab_id': main_tab_id, 'window': game_window.title})
             self.open_game_tab(shortcut_point, game_window)
             #reset start time
-            self.auto_open_check_start_time[hwnd] = None
+            self.tab_states.update(main_tab_id, game_exit_check_at=None)
 
     def open_game_tab(self, shortcut_point, game_window):
-        screen_point = WindowUtil.to_screen_coord(shortcut_point, game_window)
-        # click game icon
-        Resolver.do_single_click((screen_point,))
-        time.sleep(0.2)
-        # click back to main tab
-        LOGGER.debug(f'Simulate click main tab point {self.main_tab_point}')
-        screen_point = WindowUtil.to_screen_coord(self.main_tab_point, game_window)
-        Resolver.do_single_click((screen_point,))
+        # click game icon, then click back to main tab
+        LOGGER.debug('Simulate click game icon %s then main tab point %s', shortcut_point, self.main_tab_point,
+                     extra={'window': game_window.title})
+        screen_points = (WindowUtil.to_screen_coord(shortcut_point, game_window),
+                         WindowUtil.to_screen_coord(self.main_tab_point, game_window))
+        # wait: tab iteration continues from the main tab right after
+        Resolver.do_click_sequence(screen_points, interval_seconds=0.2, hwnd=WindowUtil.get_hwnd(game_window),
+                                   window=game_window).result()
         time.sleep(0.2)
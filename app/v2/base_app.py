@@ -3,7 +3,7 @@ import os
 import shutil
 import sys
 from PyQt6.QtWidgets import (
-    QApplication, QWidget, QPushButton, QHBoxLayout
+    QApplication, QWidget, QPushButton, QHBoxLayout, QMessageBox
 )
 from PyQt6.QtWidgets import QSystemTrayIcon, QMenu, QPushButton
 from PyQt6.QtGui import QIcon, QAction, QCursor
@@ -22,6 +22,10 @@ class BaseApp(QWidget):
         show_action.triggered.connect(self.toggle_visibility)
         tray_menu.addAction(show_action)
 
+        timings_action = QAction("Stage timings", self)
+        timings_action.triggered.connect(self.show_stage_timings)
+        tray_menu.addAction(timings_action)
+
         exit_action = QAction("Exit", self)
         exit_action.triggered.connect(QApplication.quit)
         exit_action.triggered.connect(self.close)
@@ -36,6 +40,17 @@ class BaseApp(QWidget):
     def toggle_visibility(self):
         self.setVisible(not self.isVisible())
 
+    def show_stage_timings(self):
+        """
+        Where the tab cycles spend their time (recent spans), also written to log/stage_timings.json
+        """
+        from app.v2.stage_timer import STAGE_TIMER
+        STAGE_TIMER.dump()
+        box = QMessageBox(self)
+        box.setWindowTitle("Stage timings")
+        box.setText(f"<pre>{STAGE_TIMER.report()}</pre>")
+        box.exec()
+
     def apply_dark_theme(self):
         self.setStyleSheet("""
             QWidget {
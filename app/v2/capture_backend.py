@@ -0,0 +1,232 @@
+import glob
+import os
+import threading
+
+import cv2
+import mss
+import numpy as np
+
+from app.log_factory import create_logger
+from app.v2.frame import Frame, ScratchBuffers
+
+LOGGER = create_logger(name='CaptureBackend')
+
+
+def merge_regions(regions, gap=16):
+    """
+    Union of (x, y, width, height) boxes: boxes closer than `gap` pixels are merged into their
+    bounding box, so a handful of nearby pixel points become one small grab instead of many.
+    """
+    boxes = [[x, y, x + w, y + h] for x, y, w, h in regions if w > 0 and h > 0]
+    merged = True
+    while merged:
+        merged = False
+        result = []
+        for box in boxes:
+            for other in result:
+                if (box[0] <= other[2] + gap and other[0] <= box[2] + gap and
+                        box[1] <= other[3] + gap and other[1] <= box[3] + gap):
+                    other[0], other[1] = min(other[0], box[0]), min(other[1], box[1])
+                    other[2], other[3] = max(other[2], box[2]), max(other[3], box[3])
+                    merged = True
+                    break
+            else:
+                result.append(list(box))
+        boxes = result
+    return [(x1, y1, x2 - x1, y2 - y1) for x1, y1, x2, y2 in sorted(boxes)]
+
+
+class CaptureBackend:
+    """
+    Where detection gets its pixels from. grab() returns a Frame of the window (None on failure),
+    grab_region() the pixels (BGRA, or BGR for backends without a raw buffer) of one (x, y, width, height) window region.
+    Frames are BGRA numpy arrays sharing the ScratchBuffers of their window for derived views.
+    """
+
+    def __init__(self):
+        self._scratch = {}  # hwnd -> ScratchBuffers
+
+    def scratch(self, window) -> ScratchBuffers:
+        hwnd = getattr(window, '_hWnd', None)
+        scratch = self._scratch.get(hwnd)
+        if scratch is None:
+            scratch = self._scratch.setdefault(hwnd, ScratchBuffers())
+        return scratch
+
+    def grab(self, window) -> Frame:
+        raise NotImplementedError
+
+    def forget_window(self, hwnd):
+        """
+        drop the buffers of a closed window
+        """
+        self._scratch.pop(hwnd, None)
+
+    def grab_region(self, window, region) -> np.ndarray:
+        frame = self.grab(window)
+        if frame is None:
+            return None
+        return frame.bgr(tuple(region))
+
+    def close(self):
+        pass
+
+
+class MssCaptureBackend(CaptureBackend):
+    """
+    Persistent mss grabber. regions=None grabs the whole window, otherwise only the (merged) regions the
+    detectors read are grabbed and written at their window coordinates. Either way pixels land in reusable
+    per-window BGRA buffers: a frame is only valid until the next grab of its window.
+    """
+
+    def __init__(self, regions=None, gap=16):
+        super().__init__()
+        self._local = threading.local()  # mss handles are bound to the thread using them
+        self._instances = []
+        self._lock = threading.Lock()
+        self._buffers = {}  # hwnd -> buffer
+        self.configure(regions, gap)
+
+    def configure(self, regions=None, gap=16):
+        """
+        regions the detectors read (None = whole window)
+        """
+        self.regions = merge_regions(regions, gap) if regions is not None else None
+        self._buffers.clear()
+        if self.regions is not None:
+            LOGGER.info(f"Sparse capture regions: {self.regions} ({self.pixel_count()} pixels)")
+
+    def pixel_count(self):
+        return sum(w * h for _, _, w, h in self.regions)
+
+    def _get_sct(self):
+        sct = getattr(self._local, 'sct', None)
+        if sct is None:
+            sct = mss.mss()
+            self._local.sct = sct
+            with self._lock:
+                self._instances.append(sct)
+        return sct
+
+    def _get_buffer(self, hwnd, width, height):
+        buffer = self._buffers.get(hwnd)
+        if buffer is None or buffer.shape[:2] != (height, width):
+            buffer = self._buffers[hwnd] = np.zeros((height, width, 4), dtype=np.uint8)
+        return buffer
+
+    def _grab_into(self, window, buffer, x, y, w, h):
+        # clip to the window, config may contain points for a bigger window
+        w, h = min(w, window.width - x), min(h, window.height - y)
+        if w <= 0 or h <= 0:
+            return
+        shot = self._get_sct().grab({"left": window.left + x, "top": window.top + y, "width": w, "height": h})
+        buffer[y:y + h, x:x + w] = np.frombuffer(shot.raw, dtype=np.uint8).reshape(h, w, 4)
+
+    def grab(self, window) -> Frame:
+        try:
+            width, height = window.width, window.height
+            buffer = self._get_buffer(window._hWnd, width, height)
+            for x, y, w, h in self.regions if self.regions is not None else [(0, 0, width, height)]:
+                self._grab_into(window, buffer, x, y, w, h)
+            return Frame(buffer, self.scratch(window))
+        except Exception as e:
+            LOGGER.error(f'Failed to capture window: {window.title} - {e}')
+
+    def forget_window(self, hwnd):
+        super().forget_window(hwnd)
+        self._buffers.pop(hwnd, None)
+
+    def grab_region(self, window, region) -> np.ndarray:
+        x, y, w, h = region
+        w, h = min(w, window.width - x), min(h, window.height - y)
+        shot = self._get_sct().grab({"left": window.left + x, "top": window.top + y, "width": w, "height": h})
+        return np.frombuffer(shot.raw, dtype=np.uint8).reshape(h, w, 4)
+
+    def grab_screen(self, monitor) -> np.ndarray:
+        """
+        monitor: mss dict (left, top, width, height) in screen coordinates
+        """
+        return np.array(self._get_sct().grab(monitor))
+
+    def close(self):
+        with self._lock:
+            for sct in self._instances:
+                sct.close()
+            self._instances.clear()
+        self._local = threading.local()
+        self._buffers.clear()
+        self._scratch.clear()
+
+
+class PyAutoGuiCaptureBackend(CaptureBackend):
+    """
+    Legacy whole-window PIL screenshot (WindowUtil.screen_shot), converted to BGRA once at capture
+    """
+
+    def grab(self, window) -> Frame:
+        from app.v2.window_util import WindowUtil
+        screenshot = WindowUtil.screen_shot(window)
+        if screenshot is None:
+            return None
+        return Frame(cv2.cvtColor(np.asarray(screenshot.convert('RGB')), cv2.COLOR_RGB2BGRA), self.scratch(window))
+
+
+class ReplayCaptureBackend(CaptureBackend):
+    """
+    Serves recorded frames instead of the screen, in file name order and looping, e.g. images/game_tabs/*.png.
+    Lets the whole detection stack run (and be benchmarked) without emulator windows.
+    """
+
+    def __init__(self, source, loop=True):
+        if os.path.isdir(source):
+            self.files = sorted(glob.glob(os.path.join(source, '*.png')))
+        else:
+            self.files = sorted(glob.glob(source))
+        if not self.files:
+            raise ValueError(f'No frame to replay in {source}')
+        super().__init__()
+        self.loop = loop
+        self.position = 0
+        self._images = {}
+        LOGGER.info(f'Replaying {len(self.files)} frames from {source}')
+
+    def _read(self, path):
+        image = self._images.get(path)
+        if image is None:
+            image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+            if image.ndim == 2:
+                image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGRA)
+            elif image.shape[2] == 3:
+                image = cv2.cvtColor(image, cv2.COLOR_BGR2BGRA)
+            self._images[path] = image
+        return image
+
+    def grab(self, window=None) -> Frame:
+        if self.position >= len(self.files):
+            if not self.loop:
+                return None
+            self.position = 0
+        path = self.files[self.position]
+        self.position += 1
+        return Frame(self._read(path), self.scratch(window))
+
+    def grab_region(self, window, region) -> np.ndarray:
+        # the current frame (last served), replay has no live screen to poll
+        path = self.files[max(self.position - 1, 0)]
+        x, y, w, h = region
+        return self._read(path)[y:y + h, x:x + w]
+
+
+SCREEN_BACKEND = MssCaptureBackend()  # shared grabber for screen-coordinate captures (detect_game_widget)
+
+
+def create_capture_backend(config, regions=None) -> CaptureBackend:
+    """
+    config.capture_backend: mss (default), pyautogui or replay (frames of config.replay_source)
+    regions: sparse capture regions for mss, None = whole window
+    """
+    if config.capture_backend == 'replay':
+        return ReplayCaptureBackend(config.replay_source)
+    if config.capture_backend == 'pyautogui':
+        return PyAutoGuiCaptureBackend()
+    return MssCaptureBackend(regions)
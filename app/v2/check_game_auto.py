@@ -1,30 +1,40 @@
-import ast
-import time
-from PyQt6.QtCore import QSettings
-
 from app.log_factory import create_logger
+from app.v2.detection_config import DetectionConfig
 from app.v2.resolver import Resolver
 from app.v2.window_util import WindowUtil
 
 LOGGER = create_logger(name='CheckAutoIsOn')
 
 class CheckAutoIsOn:
-    def __init__(self, settings: QSettings):
-        points = settings.value('Detection/GameAutoOn', type=str)
-        self.game_auto_on_points = ast.literal_eval(points)
+    GAME_AUTO_OFF_PATTERN = "game_auto_off"
+    GAME_AUTO_ON_PATTERN = "game_auto_on"
+
+    def __init__(self, config: DetectionConfig):
+        self.apply_game_auto_config(config)
+
+    def apply_game_auto_config(self, config: DetectionConfig):
+        self.game_auto_on_points = config.game_auto_on_points
+        self.game_auto_off_points = config.game_auto_off_points
+        self.game_auto_points = (config.game_auto_button_point,)
+
+    def register_game_auto_patterns(self, pixel_detector):
+        pixel_detector.add_pattern(self.GAME_AUTO_OFF_PATTERN, self.game_auto_off_points, color_tolerance=5)
+        pixel_detector.add_pattern(self.GAME_AUTO_ON_PATTERN, self.game_auto_on_points, color_tolerance=5)
 
-        points = settings.value('Detection/GameAutoOff', type=str)
-        self.game_auto_off_points = ast.literal_eval(points)
 
-        points = settings.value('Detection/GameAutoButtonPoints', type=str)
-        self.game_auto_points = (ast.literal_eval(points),)
+    def is_game_loaded(self, frame) -> bool:
+        """
+        auto button is drawn (on or off) = in game
+        """
+        mask = frame.pattern_mask(self.pixel_detector)
+        return (self.pixel_detector.is_match(mask, self.GAME_AUTO_OFF_PATTERN) or
+                self.pixel_detector.is_match(mask, self.GAME_AUTO_ON_PATTERN))
 
+    def is_game_auto_off(self, frame) -> bool:
+        return self.pixel_detector.is_match(frame.pattern_mask(self.pixel_detector), self.GAME_AUTO_OFF_PATTERN)
 
-    def detect_game_auto_off(self, game_window):
-        WindowUtil.focus(game_window)
-        time.sleep(4)
-        screenshot = WindowUtil.screen_shot(game_window)
-        if WindowUtil.check_pixel_pattern(game_window, screenshot, pixel_points_config=self.game_auto_off_points, color_tolerance=5):
-            LOGGER.info(f'===game auto is off => simulate click to {self.game_auto_points}, window: {game_window.title}')
-            screen_points = [WindowUtil.to_screen_coord(p, game_window) for p in self.game_auto_points]
-            Resolver.do_single_click(screen_points)
\ No newline at end of file
+    def click_game_auto_button(self, game_window):
+        LOGGER.info('===game auto is off => simulate click to %s, window: %s', self.game_auto_points, game_window.title,
+                    extra={'window': game_window.title})
+        screen_points = [WindowUtil.to_screen_coord(p, game_window) for p in self.game_auto_points]
+        return Resolver.do_single_click(screen_points, window=game_window)
@@ -0,0 +1,298 @@
+import ast
+import os
+from dataclasses import dataclass, field
+
+import numpy as np
+from PyQt6.QtCore import QSettings
+
+from app.log_factory import create_logger
+from app.resource_util import resource_path
+
+LOGGER = create_logger(name='DetectionConfig')
+
+CAPTURE_BACKENDS = ('mss', 'pyautogui', 'replay')
+
+
+class ConfigError(ValueError):
+    """
+    data/config_v2.ini has invalid values, the message lists every bad key
+    """
+
+
+class _Reader:
+    """
+    Reads [Detection] values as strings (QSettings turns unquoted commas into lists) and collects errors
+    instead of raising on the first one, so one load reports everything wrong with the file.
+    """
+
+    def __init__(self, settings: QSettings):
+        self.settings = settings
+        self.errors = []
+
+    def _raw(self, key):
+        value = self.settings.value(f'Detection/{key}')
+        if isinstance(value, list):
+            value = ','.join(value)
+        return value.strip() if isinstance(value, str) and value.strip() != '' else None
+
+    def _fail(self, key, message, default):
+        self.errors.append(f'{key}: {message}')
+        return default
+
+    def text(self, key, default=None, choices=None):
+        value = self._raw(key)
+        if value is None:
+            if default is None:
+                return self._fail(key, 'missing', '')
+            return default
+        if choices is not None and value not in choices:
+            return self._fail(key, f'{value!r} not one of {choices}', default)
+        return value
+
+    def integer(self, key, default=None, minimum=None):
+        return self._number(key, int, default, minimum)
+
+    def real(self, key, default=None, minimum=None, maximum=None):
+        return self._number(key, float, default, minimum, maximum)
+
+    def _number(self, key, kind, default, minimum=None, maximum=None):
+        value = self._raw(key)
+        if value is None:
+            return default if default is not None else self._fail(key, 'missing', kind(0))
+        try:
+            number = kind(value)
+        except ValueError:
+            return self._fail(key, f'{value!r} is not {"an integer" if kind is int else "a number"}', default or kind(0))
+        if (minimum is not None and number < minimum) or (maximum is not None and number > maximum):
+            return self._fail(key, f'{number} not in [{minimum}, {maximum}]', default or kind(0))
+        return number
+
+    def flag(self, key, default=False):
+        value = self._raw(key)
+        if value is None:
+            return default
+        if value.lower() in ('true', '1', 'yes', 'on'):
+            return True
+        if value.lower() in ('false', '0', 'no', 'off'):
+            return False
+        return self._fail(key, f'{value!r} is not a boolean', default)
+
+    def literal(self, key, default=None):
+        value = self._raw(key)
+        if value is None:
+            return default if default is not None else self._fail(key, 'missing', ())
+        try:
+            return ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return self._fail(key, f'{value!r} is not a python literal', default if default is not None else ())
+
+    def ints(self, key, size=None, default=None):
+        """
+        tuple of ints: "1, 2" or "(1, 2)"
+        """
+        value = self.literal(key, default)
+        if isinstance(value, int):
+            value = (value,)
+        try:
+            value = tuple(int(v) for v in value)
+        except (TypeError, ValueError):
+            return self._fail(key, f'{value!r} is not a list of ints', default or ())
+        if size is not None and len(value) != size:
+            return self._fail(key, f'{value!r} needs {size} values', default or ())
+        return value
+
+    def points(self, key, size, min_count=1, default=None):
+        """
+        tuple of int tuples of `size` values: (x, y) points or (x, y, r, g, b) pixel points
+        """
+        value = self.literal(key, default)
+        if default is not None and value == default:
+            return default
+        try:
+            points = tuple(tuple(int(v) for v in point) for point in value)
+        except (TypeError, ValueError):
+            return self._fail(key, f'{value!r} is not a list of points', default or ())
+        if len(points) < min_count or any(len(p) != size for p in points):
+            return self._fail(key, f'needs at least {min_count} points of {size} values', default or ())
+        if size == 5 and any(not 0 <= v <= 255 for p in points for v in p[2:]):
+            return self._fail(key, 'colors must be in [0, 255]', default or ())
+        return points
+
+    def region(self, key, default=None, optional=False):
+        value = self._raw(key)
+        if value is None and optional:
+            return None
+        region = self.ints(key, size=4, default=default)
+        if region and (region[2] <= 0 or region[3] <= 0):
+            return self._fail(key, 'width and height must be positive', default)
+        return region
+
+    def files(self, key):
+        value = self._raw(key)
+        if value is None:
+            return self._fail(key, 'missing', ())
+        paths = tuple(p.strip() for p in value.split(',') if p.strip())
+        for path in paths:
+            if not os.path.exists(resource_path(path)):
+                self.errors.append(f'{key}: {path} not found')
+        return paths
+
+    def color(self, key):
+        value = self.ints(key, size=3)
+        if value and any(not 0 <= v <= 255 for v in value):
+            return self._fail(key, 'values must be in [0, 255]', ())
+        return np.array(value, dtype=np.uint8)
+
+
+@dataclass(frozen=True, eq=False)
+class DetectionConfig:
+    """
+    [Detection] section of data/config_v2.ini parsed and validated once.
+    Points are int tuples ((x, y) or (x, y, r, g, b)), regions (x, y, width, height), color ranges uint8 arrays.
+    """
+    path: str
+    # 1. may differ between dev & build
+    game_window_title_pattern: str
+    check_interval_seconds: int
+    scheduler_tick_seconds: float
+    tab_min_revisit_seconds: float
+    tab_max_staleness_seconds: float
+    tab_state_file: str
+    tab_state_ttl_seconds: int
+    tab_state_snapshot_seconds: int
+    inactivity_auto_start_seconds: int
+    login_check_confirm_seconds: int
+    town_stuck_timeout_seconds: int
+    game_exit_duration_seconds: int
+    # capture / iteration
+    capture_backend: str
+    replay_source: str
+    record_session: bool
+    record_folder: str
+    metrics_port: int
+    metrics_file: str
+    metrics_write_seconds: float
+    sparse_capture: bool
+    pipeline_enabled: bool
+    tab_analysis_timeout_seconds: float
+    tab_dwell_seconds: float
+    tab_strip_region: tuple
+    tab_switch_timeout_seconds: float
+    game_window_main_points: tuple
+    # stuck buying
+    buy_stuck_shop_points: tuple
+    buy_stuck_bag_points: tuple
+    # login
+    user_pass_login_points: tuple
+    login_points: tuple
+    login_step_timeout_seconds: int
+    account_logined_warn_points: tuple
+    login_select_server_points: tuple
+    login_select_character_points: tuple
+    server_connect_warn_points: tuple
+    # town stuck
+    town_images: tuple
+    town_name_threshold: float
+    town_move_offset: tuple
+    cooldown_seconds: int
+    town_stuck_region: tuple
+    town_roi_padding: int
+    town_full_scan_every: int
+    town_lower_color_range: np.ndarray
+    town_upper_color_range: np.ndarray
+    # recover
+    crash_dialog_points: tuple
+    game_shortcut_points: tuple
+    game_shortcut_indexes: tuple
+    main_tab_point: tuple
+    # game auto
+    game_auto_on_points: tuple
+    game_auto_off_points: tuple
+    game_auto_off2_points: tuple
+    game_auto_button_point: tuple
+    mtime: float = field(default=0.0)
+
+    @classmethod
+    def load(cls, settings: QSettings) -> 'DetectionConfig':
+        r = _Reader(settings)
+        path = settings.fileName()
+        config = cls(
+            path=path,
+            game_window_title_pattern=r.text('GameWindowTitlePattern', 'A1'),
+            check_interval_seconds=r.integer('CheckInterval', 60, minimum=1),
+            scheduler_tick_seconds=r.real('SchedulerTickSeconds', 2.0, minimum=0.1),
+            tab_min_revisit_seconds=r.real('TabMinRevisitSeconds', 5.0, minimum=0),
+            tab_max_staleness_seconds=r.real('TabMaxStalenessSeconds', 120.0, minimum=1),
+            tab_state_file=r.text('TabStateFile', 'data/tab_state.json'),
+            tab_state_ttl_seconds=r.integer('TabStateTtlSeconds', 3600, minimum=1),
+            tab_state_snapshot_seconds=r.integer('TabStateSnapshotSeconds', 30, minimum=1),
+            inactivity_auto_start_seconds=r.integer('InactivityDurationAutoStartSeconds', 60, minimum=1),
+            login_check_confirm_seconds=r.integer('LoginCheckConfirmDurationSeconds', 60, minimum=0),
+            town_stuck_timeout_seconds=r.integer('TownStuckTimeout', 20, minimum=0),
+            game_exit_duration_seconds=r.integer('GameExitDurationSeconds', 60, minimum=1),
+            capture_backend=r.text('CaptureBackend', 'mss', choices=CAPTURE_BACKENDS),
+            replay_source=r.text('ReplaySource', 'images/game_tabs'),
+            record_session=r.flag('RecordSession', False),
+            record_folder=r.text('RecordFolder', 'data/sessions'),
+            metrics_port=r.integer('MetricsPort', 0, minimum=0),
+            metrics_file=r.text('MetricsFile', ''),
+            metrics_write_seconds=r.real('MetricsWriteSeconds', 15.0, minimum=1),
+            sparse_capture=r.flag('SparseCapture', False),
+            pipeline_enabled=r.flag('PipelineEnabled', False),
+            tab_analysis_timeout_seconds=r.real('TabAnalysisTimeoutSeconds', 2.0, minimum=0),
+            tab_dwell_seconds=r.real('TabDwellSeconds', 2.0, minimum=0),
+            tab_strip_region=r.region('TabStripRegion', (0, 0, 776, 40)),
+            tab_switch_timeout_seconds=r.real('TabSwitchTimeoutSeconds', 1.0, minimum=0),
+            game_window_main_points=r.points('GameWindowMainPoints', 5),
+            buy_stuck_shop_points=r.points('BuyStuckShopPoints', 5),
+            buy_stuck_bag_points=r.points('BuyStuckBagPoints', 5),
+            user_pass_login_points=r.points('UserPassLoginPoints', 5),
+            # login, server icon, character avatar (+ warning confirm button)
+            login_points=r.points('LoginPoints', 2, min_count=3),
+            login_step_timeout_seconds=r.integer('LoginStepTimeoutSeconds', 60, minimum=1),
+            account_logined_warn_points=r.points('GameWindowAccountLoginedWarnPoints', 5),
+            login_select_server_points=r.points('GameWindowLoginSelectServerPoints', 5),
+            login_select_character_points=r.points('GameWindowLoginSelectCharacterPoints', 5),
+            server_connect_warn_points=r.points('GameLoginServerConnectWarnPoints', 5),
+            town_images=r.files('TownImages'),
+            town_name_threshold=r.real('TownNameGreenThreshold', 0.7, minimum=0, maximum=1),
+            town_move_offset=(r.integer('TownStuckMoveOffsetX', 400), r.integer('TownStuckMoveOffsetY', 380)),
+            cooldown_seconds=r.integer('CooldownSeconds', 5, minimum=0),
+            town_stuck_region=r.region('TownStuckRegion', optional=True),
+            town_roi_padding=r.integer('TownStuckRoiPadding', 12, minimum=0),
+            town_full_scan_every=r.integer('TownStuckFullScanEvery', 20, minimum=0),
+            town_lower_color_range=r.color('TownStuckLowerColorRange'),
+            town_upper_color_range=r.color('TownStuckUpperColorRange'),
+            crash_dialog_points=r.points('CrashDialogPoints', 5),
+            game_shortcut_points=r.points('GameShortcutPoints', 2, min_count=0, default=()),
+            game_shortcut_indexes=r.ints('GameShortcutIndexesToCheck', default=(0,)),
+            main_tab_point=r.ints('MainTabPoints', size=2),
+            game_auto_on_points=r.points('GameAutoOn', 5),
+            game_auto_off_points=r.points('GameAutoOff', 5),
+            game_auto_off2_points=r.points('GameAutoOff2', 5),
+            game_auto_button_point=r.ints('GameAutoButtonPoints', size=2),
+            mtime=os.path.getmtime(path) if os.path.exists(path) else 0.0,
+        )
+        invalid = [i for i in config.game_shortcut_indexes if not 0 <= i < len(config.game_shortcut_points)]
+        if invalid:
+            r.errors.append(f'GameShortcutIndexesToCheck: {invalid} out of GameShortcutPoints')
+        if config.tab_min_revisit_seconds > config.tab_max_staleness_seconds:
+            r.errors.append('TabMinRevisitSeconds: longer than TabMaxStalenessSeconds')
+        if r.errors:
+            raise ConfigError(f'Invalid {path}:\n - ' + '\n - '.join(r.errors))
+        return config
+
+    @classmethod
+    def from_file(cls, path) -> 'DetectionConfig':
+        settings = QSettings(path, QSettings.Format.IniFormat)
+        settings.sync()  # QSettings caches files per process, pick up changes made since
+        return cls.load(settings)
+
+    def is_stale(self) -> bool:
+        """
+        the file was modified after this config was loaded
+        """
+        try:
+            return os.path.getmtime(self.path) != self.mtime
+        except OSError:
+            return False
@@ -1,41 +1,118 @@
+import dataclasses
 import os
-from PyQt6.QtCore import QObject, QTimer, pyqtSlot, QSettings
+import time
+from PyQt6.QtCore import QObject, QTimer, pyqtSlot
 
 from app.log_factory import create_logger
-from app.game_scenario import LoginSelectCharacterScenario, LoginSelectServerScenario, AccountLoginedWarningScenario, ServerConnectWarnScenario, StuckBuyingGameScenario, TownStuckGameScenario, UserPassLoginScenario
+from app.game_scenario import create_game_scenarios
+from app.v2.detection_config import ConfigError, DetectionConfig
+from app.v2.focus_manager import FOCUS_MANAGER
 from app.v2.game_tab_iterate import GameTabIterate
-from app.v2.window_util import WindowUtil
+from app.v2.input_executor import INPUT_EXECUTOR
+from app.v2.metrics import CAPTURE_FAILURES, CYCLE_SECONDS, DETECTION_CYCLES, METRICS
+from app.v2.window_registry import WINDOW_REGISTRY, WindowRegistry
 
 LOGGER = create_logger()
 
 class DetectionWorkerV2(GameTabIterate, QObject):
 
-    def __init__(self, settings: QSettings):
-        GameTabIterate.__init__(self, settings=settings)
-        # CheckAutoIsOn.__init__(self, settings=settings)
+    def __init__(self, config: DetectionConfig):
+        GameTabIterate.__init__(self, config)
         QObject.__init__(self)
-        self.settings=settings
-        self.WINDOW_TITLE_PATTERN = settings.value("Detection/GameWindowTitlePattern", "A1")
-        self.inprogress_timeout_seconds = settings.value("Detection/ResolveInprogressTimeoutSeconds", 60, type=int)
-        CHECK_INTERVAL = settings.value("Detection/CheckInterval", 60, type=int)
-        self.CHECK_INTERVAL_MS = CHECK_INTERVAL * 1000  # 30 seconds
+        self.WINDOW_TITLE_PATTERN = config.game_window_title_pattern
+        # the timer only wakes the scheduler up: each tab is visited when due (see TabScheduler)
+        self.CHECK_INTERVAL_MS = int(config.scheduler_tick_seconds * 1000)
         self.timer = None  # Will be created after moving to thread
         self.game_windows = None
+        self.window_registry = WINDOW_REGISTRY
+        self.window_registry.subscribe(self.on_window_event)
+        self.started = False
+        self.running = False
+        self.first_detection_at = None # perf_counter() at the end of the first detection (startup benchmark)
         self.inprogress_start = None
         # --- NEW FLAG ---
         self.resolve_action_inprogress = False # Controls whether detection proceeds
-        self.game_scenarios = [
-            StuckBuyingGameScenario(settings, self),
-            UserPassLoginScenario(settings, self),
-            TownStuckGameScenario(settings, self),
-            AccountLoginedWarningScenario(settings, self),
-            LoginSelectServerScenario(settings, self),
-            LoginSelectCharacterScenario(settings, self),
-            ServerConnectWarnScenario(settings, self)
-        ]
-        
-        for scenario in self.game_scenarios:
+        self.game_scenarios = self.create_scenarios(config)
+        self.compile_pixel_patterns()
+        self.metrics_written_at = 0.0
+        self.register_metrics()
+
+    def register_metrics(self):
+        """
+        Gauges read from the worker state when the metrics are exported, nothing to update per tab
+        """
+        METRICS.gauge('vlvauto_game_windows', 'Game windows found', collect=lambda: {(): len(self.game_windows or ())})
+        METRICS.gauge('vlvauto_game_tabs', 'Game tabs learnt per window', ('window',), collect=self.game_tab_counts)
+        METRICS.gauge('vlvauto_tab_seconds_since_check', 'Seconds since the tab was last analysed', ('game_tab_id',),
+                      collect=lambda: {(game_tab_id,): round(time.time() - last_visit, 1)
+                                       for game_tab_id, last_visit in self.tab_states.last_visits().items()})
+        METRICS.gauge('vlvauto_tab_overdue_seconds', 'Seconds the tab has been due for a visit', ('game_tab_id',),
+                      collect=lambda: {(game_tab_id,): round(max(0.0, overdue), 1)
+                                       for game_tab_id, overdue in self.tab_scheduler.overdue_seconds().items()})
+
+    def game_tab_counts(self) -> dict:
+        counts = {}
+        for game_window in list(self.game_windows or ()):
+            ring = self.tab_registry.ring(game_window._hWnd)
+            if ring is not None:
+                counts[(self.window_key(game_window),)] = len(ring) - 1  # without the main tab
+        return counts
+
+    def write_metrics_if_due(self, force=False):
+        if not self.config.metrics_file:
+            return
+        now = time.monotonic()
+        if force or now - self.metrics_written_at >= self.config.metrics_write_seconds:
+            self.metrics_written_at = now
+            METRICS.write(self.config.metrics_file)
+
+    def create_scenarios(self, config: DetectionConfig):
+        scenarios = create_game_scenarios(config, self)
+        for scenario in scenarios:
             scenario.setParent(self)
+        return scenarios
+
+    def reload_config_if_changed(self):
+        """
+        Hot reload of data/config_v2.ini between cycles: scenarios and pixel detector are rebuilt, then swapped in
+        with the per-tab state (timers, login flow, tab rings, town locations) of the running ones.
+        An invalid file is reported and the running config kept.
+        """
+        if not self.config.is_stale():
+            return
+        try:
+            config = DetectionConfig.from_file(self.config.path)
+        except ConfigError as e:
+            LOGGER.error(f"Config not reloaded: {e}")
+            # do not report the same broken file every cycle
+            self.config = dataclasses.replace(self.config, mtime=os.path.getmtime(self.config.path))
+            return
+        restart_keys = lambda c: (c.capture_backend, c.record_session, c.tab_state_file, c.metrics_port)
+        if restart_keys(config) != restart_keys(self.config):
+            LOGGER.warning("CaptureBackend / RecordSession / TabStateFile / MetricsPort changes need a restart")
+
+        scenarios = self.create_scenarios(config)
+        previous = {type(scenario): scenario for scenario in self.game_scenarios}
+        for scenario in scenarios:
+            if type(scenario) in previous:
+                scenario.adopt_state(previous[type(scenario)])
+
+        self.apply_config(config)
+        self.WINDOW_TITLE_PATTERN = config.game_window_title_pattern
+        self.window_registry.watch(self.WINDOW_TITLE_PATTERN)
+        self.CHECK_INTERVAL_MS = int(config.scheduler_tick_seconds * 1000)
+        if self.timer is not None:
+            self.timer.setInterval(self.CHECK_INTERVAL_MS)
+        old_scenarios, self.game_scenarios = self.game_scenarios, scenarios
+        self.compile_pixel_patterns()
+        # the analysis thread is idle between window walks and analyze_tab reads the new scenarios
+        if not self.pipeline_enabled:
+            self.stop_pipeline()
+        elif self.running:
+            self.start_pipeline()
+        for scenario in old_scenarios:
+            scenario.setParent(None)
+        LOGGER.info(f"Reloaded {config.path}")
     
     @pyqtSlot()
     def setup(self):
@@ -48,14 +125,18 @@ class DetectionWorkerV2(GameTabIterate, QObject):
     def start(self):
         LOGGER.info("DetectionWorker received START signal")
         self.running = True
+        if self.config.metrics_port:
+            METRICS.serve(self.config.metrics_port)
+        self.start_pipeline()
         self.detect_window()
+        self.started = True
 
-        if self.game_windows:
-            
-            LOGGER.info(f"starting detection timer (default wait 30s)")
-            self.timer.start()
-        else:
-            LOGGER.warning("No game windows found.")
+        if not self.game_windows:
+            LOGGER.warning("No game windows found yet, they are picked up when they appear.")
+        LOGGER.info(f"starting detection timer, tick every {self.CHECK_INTERVAL_MS} ms")
+        self.timer.start()
+        # first check right away instead of after one CheckInterval
+        QTimer.singleShot(0, self.run_detection)
 
     @pyqtSlot()
     def stop(self):
@@ -63,20 +144,46 @@ class DetectionWorkerV2(GameTabIterate, QObject):
         self.running = False
         if self.timer:
             self.timer.stop()
+        self.stop_pipeline()
         LOGGER.info("Stopped DetectionWorker")
 
     @pyqtSlot()
     def cleanup(self):
         LOGGER.info("Cleanup called.")
         self.stop()
+        self.capture_backend.close()
+        self.tab_states.save()
+        self.write_metrics_if_due(force=True)
+        METRICS.stop()
+        LOGGER.info(f"Window activations: {FOCUS_MANAGER.activations}, skipped (already in front): {FOCUS_MANAGER.skipped}")
+        if self.session_recorder is not None:
+            self.session_recorder.close()
+        INPUT_EXECUTOR.shutdown()
 
     def run_detection(self):
-        if not self.running or not self.game_windows:
+        if not self.running:
+            return
+        # before the window lookup: an edited GameWindowTitlePattern applies to this cycle, and a config
+        # edited while no game window is open is still picked up
+        try:
+            self.reload_config_if_changed()
+        except Exception as e:
+            LOGGER.error(f"Config reload error: {e}", exc_info=True)
+        # title + geometry of every game window read once per cycle, new windows found every few seconds
+        self.window_registry.refresh()
+        self.game_windows = self.window_registry.windows(self.WINDOW_TITLE_PATTERN)
+        if not self.game_windows:
+            self.write_metrics_if_due()
             return
 
+        start = time.perf_counter()
         try:
             LOGGER.debug("Running detection")
-            for game_window in self.game_windows:
+            # windows with the most urgent due tab first, windows with nothing due are left alone
+            priorities = {id(game_window): self.window_priority(game_window) for game_window in self.game_windows}
+            due_windows = sorted((w for w in self.game_windows if priorities[id(w)] is not None),
+                                 key=lambda w: priorities[id(w)])
+            for game_window in due_windows:
                 if not self.is_running():
                     return
                 # iterate game tabs and check_game_scenario for each mumu window
@@ -84,22 +191,38 @@ class DetectionWorkerV2(GameTabIterate, QObject):
 
         except Exception as e:
             LOGGER.error(f"Detection error: {e}", exc_info=True)
+        finally:
+            self.forget_tabs(self.tab_states.tick())
+            DETECTION_CYCLES.inc()
+            CYCLE_SECONDS.observe(time.perf_counter() - start)
+            self.write_metrics_if_due()
+            if self.first_detection_at is None:
+                self.first_detection_at = time.perf_counter()
 
     def is_running(self):
         return self.running
             
-    def save_screenshot(self, screenshot, game_tab_id="0"):
+    def save_screenshot(self, frame, game_tab_id="0"):
         folder = "data/screenshot"
         os.makedirs(folder, exist_ok=True)  # Ensure the directory exists
         filename = os.path.join(folder, f"{game_tab_id}.png")
-        screenshot.save(filename)
+        frame.save(filename)
 
     def detect_window(self):
-        self.game_windows = WindowUtil.find_game_windows(self.WINDOW_TITLE_PATTERN)
+        self.window_registry.watch(self.WINDOW_TITLE_PATTERN)
+        self.window_registry.refresh(full=True)
+        self.game_windows = self.window_registry.windows(self.WINDOW_TITLE_PATTERN)
         if not self.game_windows:
             LOGGER.info("No open game windows")
         else:
             LOGGER.info(f"Detected {len(self.game_windows)} game windows")
     
+    def on_window_event(self, event, window):
+        if event == WindowRegistry.DISAPPEARED:
+            # a new window may get the same hwnd: nothing learnt about this one may be reused
+            self.tab_registry.forget(window._hWnd)
+            self.capture_backend.forget_window(window._hWnd)
+            CAPTURE_FAILURES.forget(window=self.window_key(window))
+
     def get_game_scenarios(self):
         return self.game_scenarios
@@ -0,0 +1,43 @@
+from app.log_factory import create_logger
+from app.v2.window_util import WindowUtil
+
+LOGGER = create_logger(name='FocusManager')
+
+
+class FocusManager:
+    """
+    Brings a window to the front only when another one is. Called on the input thread right before each
+    input step meant for a window (see Resolver), so the queued actions of one window share a single
+    activation and a step queued after input for another window still lands on the right one.
+    """
+
+    def __init__(self):
+        self.focused_hwnd = None  # window last brought to the front by the tool
+        self.activations = 0
+        self.skipped = 0
+
+    def ensure(self, window):
+        hwnd = WindowUtil.get_hwnd(window)
+        if WindowUtil.is_foreground(window):
+            # already in front, whoever activated it (the tool or the user)
+            self.focused_hwnd = hwnd
+            self.skipped += 1
+            return
+        if self.focused_hwnd == hwnd:
+            LOGGER.debug('Window lost focus since last activation: %s', window.title, extra={'window': window.title})
+        WindowUtil.focus(window)
+        self.focused_hwnd = hwnd
+        self.activations += 1
+
+    def bind(self, window, func):
+        """
+        func run with window focused first, for an InputStep
+        """
+        def run(*args):
+            self.ensure(window)
+            return func(*args)
+        run.__name__ = getattr(func, '__name__', 'run')
+        return run
+
+
+FOCUS_MANAGER = FocusManager()
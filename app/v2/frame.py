@@ -0,0 +1,119 @@
+import zlib
+
+import cv2
+import numpy as np
+
+from app.detect_game_widget import get_masked_image
+
+
+class ScratchBuffers:
+    """
+    Output arrays reused by the derived views of successive frames of one window (BGR, HSV, masks),
+    so steady-state conversions write into the same memory instead of allocating on every frame.
+    Frames of a window are analysed one after the other: the views of a frame are only valid until
+    the next frame sharing the buffers is analysed.
+    """
+
+    def __init__(self):
+        self._buffers = {}
+
+    def get(self, key, shape, dtype=np.uint8) -> np.ndarray:
+        buffer = self._buffers.get(key)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype=dtype)
+            self._buffers[key] = buffer
+        return buffer
+
+
+class Frame:
+    """
+    One captured tab image shared by every scenario of a check. Holds the raw capture once
+    (PIL RGB image or BGRA numpy buffer) and lazily memoizes derived views, so each color
+    conversion / HSV mask runs at most once per frame whatever the number of consumers.
+    Views take an optional region, a (x, y, width, height) window ROI: conversions then only touch the ROI.
+    scratch: ScratchBuffers of the window the views are written into, None = allocate per frame.
+    """
+
+    def __init__(self, raw, scratch: ScratchBuffers = None):
+        self.raw = raw
+        self.scratch = scratch
+        self._cache = {}
+
+    @property
+    def is_bgra(self):
+        return isinstance(self.raw, np.ndarray) and self.raw.ndim == 3 and self.raw.shape[2] == 4
+
+    @property
+    def shape(self):
+        if isinstance(self.raw, np.ndarray):
+            return self.raw.shape
+        return self.raw.height, self.raw.width, len(self.raw.getbands())
+
+    def _memo(self, key, compute):
+        value = self._cache.get(key)
+        if value is None:
+            value = compute()
+            self._cache[key] = value
+        return value
+
+    def _dst(self, key, source, channels):
+        if self.scratch is None:
+            return None
+        shape = source.shape[:2] if channels == 1 else source.shape[:2] + (channels,)
+        return self.scratch.get(key, shape)
+
+    def _source(self, region):
+        """
+        raw pixels as numpy (view, no copy for BGRA buffers), cropped to region
+        """
+        source = self._memo(('source',), lambda: self.raw if isinstance(self.raw, np.ndarray) else np.asarray(self.raw))
+        if region is None:
+            return source
+        x, y, w, h = region
+        return source[y:y + h, x:x + w]
+
+    def rgb(self, region=None):
+        def compute():
+            source = self._source(region)
+            if not self.is_bgra:
+                return source
+            return cv2.cvtColor(source, cv2.COLOR_BGRA2RGB, dst=self._dst(('rgb', region), source, 3))
+        return self._memo(('rgb', region), compute)
+
+    def bgr(self, region=None):
+        def compute():
+            source = self._source(region)
+            return cv2.cvtColor(source, cv2.COLOR_BGRA2BGR if self.is_bgra else cv2.COLOR_RGB2BGR,
+                                dst=self._dst(('bgr', region), source, 3))
+        return self._memo(('bgr', region), compute)
+
+    def hsv(self, region=None):
+        def compute():
+            bgr = self.bgr(region)
+            return cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV, dst=self._dst(('hsv', region), bgr, 3))
+        return self._memo(('hsv', region), compute)
+
+    def masked(self, lower_color_range, upper_color_range, region=None):
+        """
+        BGR view keeping only pixels whose HSV is in range (see get_masked_image)
+        """
+        key = ('masked', tuple(int(v) for v in lower_color_range), tuple(int(v) for v in upper_color_range), region)
+
+        def compute():
+            bgr = self.bgr(region)
+            return get_masked_image(bgr, lower_color_range, upper_color_range, hsv=self.hsv(region),
+                                    out=self._dst(key, bgr, 3), mask=self._dst(key + ('mask',), bgr, 1))
+        return self._memo(key, compute)
+
+    def region_hash(self, region=None) -> int:
+        """
+        crc32 of the exact pixels of region (whole frame if None), to tell if a region changed between visits
+        """
+        return self._memo(('hash', region), lambda: zlib.crc32(np.ascontiguousarray(self._source(region))))
+
+    def pattern_mask(self, pixel_detector) -> int:
+        # keyed on the detector itself, not its id(): the cache holds it, a reloaded detector cannot reuse its key
+        return self._memo(('pattern_mask', pixel_detector), lambda: pixel_detector.match(self.raw))
+
+    def save(self, filename):
+        cv2.imwrite(filename, self.bgr())
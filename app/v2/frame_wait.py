@@ -0,0 +1,72 @@
+import time
+import zlib
+
+import numpy as np
+
+
+def wait_until(condition, timeout=1.0, poll_interval=0.03) -> bool:
+    """
+    Poll condition() until it is truthy or timeout (seconds) elapses. Returns the last condition result.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        if condition():
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(poll_interval)
+
+
+def frame_signature(image, step=4, quantize=4) -> int:
+    """
+    Cheap signature of an image: every `step`-th pixel, low `quantize` bits dropped so compression
+    noise / cursor blinking does not count as a change, crc32 of the rest.
+    """
+    sample = np.ascontiguousarray(image[::step, ::step, :3]) >> quantize
+    return zlib.crc32(sample.tobytes())
+
+
+class FrameWaiter:
+    """
+    Replaces fixed sleeps around tab switching: polls the signature of a small window region
+    (the tab strip) and returns as soon as it changed / settled, or at timeout.
+    region: (x, y, width, height) in window coordinates, grabbed through the worker's CaptureBackend
+    """
+
+    def __init__(self, region, capture_backend, poll_interval=0.03):
+        self.region = region
+        self.capture_backend = capture_backend
+        self.poll_interval = poll_interval
+
+    def _grab(self, window):
+        return self.capture_backend.grab_region(window, self.region)
+
+    def signature(self, window):
+        try:
+            return frame_signature(self._grab(window))
+        except Exception:
+            return None
+
+    def wait_for_change(self, window, before, timeout=1.0) -> bool:
+        """
+        Wait until the region differs from the `before` signature, then until it is stable for one poll
+        """
+        if before is None:
+            time.sleep(timeout)
+            return False
+        changed = wait_until(lambda: self.signature(window) != before, timeout, self.poll_interval)
+        if changed:
+            self.wait_until_stable(window, timeout=timeout)
+        return changed
+
+    def wait_until_stable(self, window, timeout=1.0) -> bool:
+        last = [self.signature(window)]
+        time.sleep(self.poll_interval)
+
+        def is_stable():
+            current = self.signature(window)
+            stable = current is not None and current == last[0]
+            last[0] = current
+            return stable
+
+        return wait_until(is_stable, timeout, self.poll_interval)
@@ -1,19 +1,46 @@
 
-import ast
 import os
+import threading
 import time
-from typing import List
-from PyQt6.QtCore import QSettings
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Callable, List, NamedTuple
 
 
 
-from app.game_scenario import GameScenario
+from app.game_scenario import (AccountLoginedWarningScenario, GameScenario, LoginSelectCharacterScenario,
+                               LoginSelectServerScenario, ServerConnectWarnScenario, UserPassLoginScenario)
 from app.log_factory import create_logger
 from app.v2.auto_open_game import AutoOpenGame
 from app.v2.check_game_auto import CheckAutoIsOn
+from app.v2.capture_backend import MssCaptureBackend, create_capture_backend
+from app.v2.detection_config import DetectionConfig
+from app.v2.focus_manager import FOCUS_MANAGER
+from app.v2.frame import Frame
+from app.v2.frame_wait import FrameWaiter
+from app.v2.input_executor import INPUT_EXECUTOR
+from app.v2.login_flow import LoginFlow
+from app.v2.pixel_pattern import PixelPatternDetector
+from app.v2.screen_state import ScreenState, ScreenStateClassifier
+from app.v2.session_recorder import SessionRecorder
+from app.v2.metrics import CAPTURE_FAILURES, RESOLUTIONS, SCENARIO_DETECTIONS
+from app.v2.stage_timer import STAGE_TIMER
+from app.v2.tab_pipeline import TabAnalysisPipeline
+from app.v2.tab_registry import TabRegistry
+from app.v2.tab_scheduler import TabScheduler
+from app.v2.tab_state_store import TabStateStore
 from app.v2.window_util import WindowUtil
 LOGGER = create_logger(name='GameTabIterate')
 
+
+class ResolveAction(NamedTuple):
+    """
+    Input work decided by a scenario, executed once every scenario ran on the frame
+    """
+    name: str
+    game_window: object
+    run: Callable
+
+
 class GameTabIterate(CheckAutoIsOn, AutoOpenGame):
     MAIN_WINDOW = "main_window"
     GAME_WINDOW = "game_window"
@@ -22,37 +49,416 @@ class GameTabIterate(CheckAutoIsOn, AutoOpenGame):
     UNKNOWN_WINDOW = "unknown_window"
     MAX_TAB_ITERATION = 8
     SEPARATOR = "__"
+    MAIN_WINDOW_PATTERN = "game_window_main"
+    GAME_AUTO_ON = "game_auto_on"
+
+    def __init__(self, config: DetectionConfig, *args, **kwargs):
+        # per-tab timers of the worker and scenarios, restored from the last snapshot
+        self.tab_states = TabStateStore(config.tab_state_file, ttl_seconds=config.tab_state_ttl_seconds,
+                                        snapshot_seconds=config.tab_state_snapshot_seconds)
+        CheckAutoIsOn.__init__(self, config)
+        AutoOpenGame.__init__(self, config)
+        self.pixel_detector = None # built by compile_pixel_patterns once scenarios exist
+        self.screen_classifier = None
+        self.capture_backend = create_capture_backend(config)
+
+        # scenarios decide on the frame first, their input runs afterwards (see analyze_tab)
+        self._action_collector = threading.local()
+        # analysis thread: a healthy tab is analysed while switching to the next one (see iterate_known_tabs)
+        self.tab_pipeline = None
+
+        # adaptive waits: poll the tab strip after Ctrl+Tab instead of sleeping
+        self.frame_waiter = FrameWaiter(config.tab_strip_region, self.capture_backend)
+        self.tab_registry = TabRegistry()
+        # each tab visited when due instead of every tab on every cycle
+        self.tab_scheduler = TabScheduler(config.check_interval_seconds, config.tab_min_revisit_seconds,
+                                          config.tab_max_staleness_seconds)
+        self.login_flow = LoginFlow(self.tab_states, step_timeout_seconds=config.login_step_timeout_seconds)
+
+        # every analysed frame + decisions appended to a session archive, replayed with app.v2.session_replay
+        self.session_recorder = None
+        if config.record_session:
+            self.session_recorder = SessionRecorder(os.path.join(config.record_folder, time.strftime('%Y%m%d-%H%M%S')))
 
-    def __init__(self, settings: QSettings, *args, **kwargs):
-        CheckAutoIsOn.__init__(self, settings=settings)
-        AutoOpenGame.__init__(self, settings=settings)
-        self.settings = settings
-        points = settings.value('Detection/GameWindowMainPoints', type=str)
-        self.game_window_main_points = ast.literal_eval(points)
+        self.apply_config(config)
 
-        # points = settings.value('Detection/GameWindowMainPoints2', type=str)
-        # self.game_window_main_points2 = ast.literal_eval(points)
+    def apply_config(self, config: DetectionConfig):
+        """
+        Settings read on each use, (re)applied at startup and on config reload; per-tab state is kept
+        """
+        self.config = config
+        self.apply_game_auto_config(config)
+        self.apply_auto_open_config(config)
+        self.game_window_main_points = config.game_window_main_points
+        self.sparse_capture_enabled = config.sparse_capture
+        self.tab_dwell_seconds = config.tab_dwell_seconds
+        self.pipeline_enabled = config.pipeline_enabled
+        self.tab_analysis_timeout_seconds = config.tab_analysis_timeout_seconds
+        self.frame_waiter.region = config.tab_strip_region
+        self.tab_switch_timeout_seconds = config.tab_switch_timeout_seconds
+        self.login_flow.step_timeout_seconds = config.login_step_timeout_seconds
+        self.tab_states.ttl_seconds = config.tab_state_ttl_seconds
+        self.tab_states.snapshot_seconds = config.tab_state_snapshot_seconds
+        self.tab_scheduler.configure(config.check_interval_seconds, config.tab_min_revisit_seconds,
+                                     config.tab_max_staleness_seconds)
 
+    def compile_pixel_patterns(self):
+        """
+        Build the shared detector from the worker and scenario pixel patterns, call once scenarios are created
+        """
+        pixel_detector = PixelPatternDetector()
+        pixel_detector.add_pattern(self.MAIN_WINDOW_PATTERN, self.game_window_main_points, color_tolerance=5)
+        self.register_game_auto_patterns(pixel_detector)
+        for scenario in self.get_game_scenarios():
+            scenario.register_pixel_patterns(pixel_detector)
+        pixel_detector.compile()
+        self.pixel_detector = pixel_detector
+        self.screen_classifier = ScreenStateClassifier(pixel_detector, [
+            (ScreenState.MAIN, (self.MAIN_WINDOW_PATTERN,)),
+            (ScreenState.WARNING_DIALOG, (AccountLoginedWarningScenario.LOGIN_WARN_PATTERN,
+                                          ServerConnectWarnScenario.SERVER_CONNECT_PATTERN)),
+            (ScreenState.CHARACTER_SELECT, (LoginSelectCharacterScenario.SELECT_CHARACTER_PATTERN,)),
+            (ScreenState.SERVER_SELECT, (LoginSelectServerScenario.SELECT_SERVER_PATTERN,)),
+            (ScreenState.LOGIN, (UserPassLoginScenario.LOGIN_PATTERN,)),
+            (ScreenState.IN_GAME, (self.GAME_AUTO_ON_PATTERN, self.GAME_AUTO_OFF_PATTERN)),
+        ])
+        LOGGER.info(f"Compiled {len(pixel_detector.pattern_names)} pixel patterns: {pixel_detector.pattern_names}")
+        self.setup_capture_backend()
+
+    def setup_capture_backend(self):
+        if not isinstance(self.capture_backend, MssCaptureBackend):
+            return
+        self.capture_backend.configure(self.sparse_capture_regions())
 
-    def check_game_scenario(self, game_window, screenshot, game_tab_id="0"):
+    def sparse_capture_regions(self):
+        """
+        regions read by the detectors, None = whole window (sparse capture off or a scenario reads everything)
+        """
+        if not self.sparse_capture_enabled:
+            return None
+        regions = self.pixel_detector.point_regions()
         for scenario in self.get_game_scenarios():
-            r = scenario.detect_and_solve(game_window, screenshot, game_tab_id)
+            scenario_regions = scenario.capture_regions()
+            if scenario_regions is None:
+                LOGGER.info(f"{type(scenario).__name__} reads the whole window => sparse capture disabled")
+                return None
+            regions.extend(scenario_regions)
+        return regions
+
+    def capture(self, game_window) -> Frame:
+        with STAGE_TIMER.span('capture', game_window.title):
+            frame = self.capture_backend.grab(game_window)
+        if frame is None:
+            CAPTURE_FAILURES.inc(window=self.window_key(game_window))
+        return frame
+
+    def check_game_scenario(self, game_window, frame: Frame, game_tab_id="0") -> str:
+        """
+        Run the scenarios of the tab screen, returns the screen state
+        """
+        login_step_clicked = False
+        screen_state = self.screen_classifier.classify(frame)
+        LOGGER.debug('Screen state: %s - %s', screen_state, game_tab_id,
+                     extra={"game_tab_id": game_tab_id, "screen_state": screen_state})
+        for scenario in self.get_game_scenarios():
+            if not scenario.runs_on(screen_state):
+                scenario.on_screen_state_skipped(game_window, game_tab_id, screen_state)
+                continue
+            with STAGE_TIMER.span(f'detect.{type(scenario).__name__}', game_window.title, game_tab_id):
+                r = scenario.detect_and_solve(game_window, frame, game_tab_id)
             if r == "LOGINED":
-                print(f'Finish login scenario => check if game auto off')
-                self.detect_game_auto_off(game_window)
+                login_step_clicked = True # the next visit continues the login flow
+        if not login_step_clicked:
+            self.check_login_finished(game_window, frame, game_tab_id)
+        return screen_state
+
+    def tab_priority(self, game_tab_id, screen_state: str, actions) -> int:
+        if actions or screen_state not in (ScreenState.IN_GAME, ScreenState.UNKNOWN):
+            return TabScheduler.ATTENTION
+        if (screen_state == ScreenState.UNKNOWN or self.login_flow.in_progress(game_tab_id)
+                or any(scenario.has_pending_timer(game_tab_id) for scenario in self.get_game_scenarios())):
+            return TabScheduler.PENDING
+        return TabScheduler.HEALTHY
+
+    def check_login_finished(self, game_window, frame: Frame, game_tab_id):
+        """
+        Last login step: character selected and a later visit shows the game => turn game auto on if off
+        """
+        if self.login_flow.state(game_tab_id) != LoginFlow.CHARACTER_SELECTED or not self.is_game_loaded(frame):
+            return
+        if self.is_game_auto_off(frame):
+            SCENARIO_DETECTIONS.inc(scenario='LoginFlow', action=self.GAME_AUTO_ON)
+            self.dispatch_action(self.GAME_AUTO_ON, game_window, lambda: self.click_game_auto_button(game_window))
+        self.login_flow.finish(game_tab_id)
+
+    def dispatch_action(self, name: str, game_window, run):
+        """
+        Input work requested by a scenario: collected while analysing a tab (analyze_tab), run now otherwise
+        """
+        actions = getattr(self._action_collector, 'actions', None)
+        if actions is None:
+            run()
+        else:
+            actions.append(ResolveAction(name, game_window, run))
+
+    def analyze_tab(self, game_window, frame: Frame, game_tab_id):
+        """
+        Run every scenario on the frame without touching input, returns the ResolveAction list to execute
+        """
+        self.tab_states.touch(game_tab_id)
+        self._action_collector.actions = []
+        try:
+            screen_state = self.check_game_scenario(game_window, frame, game_tab_id)
+            actions = self._action_collector.actions
+        finally:
+            self._action_collector.actions = None
+        self.tab_scheduler.visited(game_tab_id, self.tab_priority(game_tab_id, screen_state, actions))
+        if self.session_recorder is not None:
+            self.session_recorder.record(game_window, frame, game_tab_id, [action.name for action in actions],
+                                         frame.pattern_mask(self.pixel_detector))
+        return actions
+
+    def start_pipeline(self):
+        if self.pipeline_enabled and self.tab_pipeline is None:
+            self.tab_pipeline = TabAnalysisPipeline(self.analyze_tab)
+            self.tab_pipeline.start()
+
+    def stop_pipeline(self):
+        if self.tab_pipeline is not None:
+            self.tab_pipeline.stop()
+            self.tab_pipeline = None
+
+    def process_game_tab(self, game_window, frame: Frame, game_tab_id):
+        # on this thread: clicks use the coordinates of the tab shown, they must run before switching away
+        self.run_actions(game_window, game_tab_id, self.analyze_tab(game_window, frame, game_tab_id))
+
+    def run_actions(self, game_window, game_tab_id, actions):
+        if not actions:
+            return # nothing clicked, nothing to wait for
+
+        futures = []
+        for action in actions:
+            if not self.is_running():
+                return
+            LOGGER.info('Execute %s - %s', action.name, game_tab_id,
+                        extra={"game_tab_id": game_tab_id, "action": action.name, "event": "execute"})
+            try:
+                future = action.run()
+            except Exception as e:
+                self._log_failed_action(action.name, game_tab_id, e)
+                RESOLUTIONS.inc(action=action.name, outcome='failed')
+                continue
+            if isinstance(future, Future):
+                self._time_resolve_action(action.name, future, game_window, game_tab_id)
+                futures.append((action.name, future))
+            else:
+                RESOLUTIONS.inc(action=action.name, outcome='done')
+
+        if INPUT_EXECUTOR.is_busy(WindowUtil.get_hwnd(game_window)):
+            return # multi-step input in flight on this tab, iteration leaves the window alone
+        for name, future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                # counted as failed by _time_resolve_action; the other tabs and windows go on
+                self._log_failed_action(name, game_tab_id, e)
+        # let the game react to the clicks before switching tab
+        with STAGE_TIMER.span('dwell', game_window.title, game_tab_id):
+            time.sleep(self.tab_dwell_seconds)
+
+    @staticmethod
+    def _time_resolve_action(name, future: Future, game_window, game_tab_id):
+        """
+        resolve.<action>: from queueing the input until its last step ran
+        """
+        start = time.perf_counter()
+
+        def done(f):
+            STAGE_TIMER.record(f'resolve.{name}', time.perf_counter() - start, game_window.title, game_tab_id)
+            RESOLUTIONS.inc(action=name, outcome='failed' if f.cancelled() or f.exception() else 'done')
+        future.add_done_callback(done)
+
+    def switch_tab(self, game_window):
+        """
+        Ctrl+Tab, then wait until the tab strip shows the new tab instead of a fixed sleep
+        """
+        before = self.frame_waiter.signature(game_window)
+        # through the input executor, so a click queued for another window cannot steal focus in between
+        with STAGE_TIMER.span('ctrl_tab', game_window.title):
+            INPUT_EXECUTOR.run(self._focus_and_send_ctrl_tab, game_window).result()
+        with STAGE_TIMER.span('settle_wait', game_window.title):
+            changed = self.frame_waiter.wait_for_change(game_window, before, timeout=self.tab_switch_timeout_seconds)
+        if not changed:
+            LOGGER.debug('Tab strip did not change after %ss: %s', self.tab_switch_timeout_seconds, game_window.title,
+                         extra={"window": game_window.title})
+
+    @staticmethod
+    def _focus_and_send_ctrl_tab(game_window):
+        FOCUS_MANAGER.ensure(game_window)
+        WindowUtil.send_trl_tab(game_window)
+
+    @staticmethod
+    def _log_failed_action(name, game_tab_id, error):
+        LOGGER.error('Action %s failed - %s: %s', name, game_tab_id, error,
+                     extra={"game_tab_id": game_tab_id, "action": name, "event": "failed"})
+
+    def collect_analysis(self, game_window, game_tab_id, future):
+        """
+        actions of a tab analysed on the pipeline thread, None if they will never run
+        """
+        try:
+            with STAGE_TIMER.span('analysis_wait', game_window.title, game_tab_id):
+                return future.result(timeout=self.tab_analysis_timeout_seconds)
+        except FutureTimeoutError:
+            LOGGER.warning('Analysis of %s not ready after %ss, its actions will be dropped', game_tab_id,
+                           self.tab_analysis_timeout_seconds, extra={"game_tab_id": game_tab_id})
+            future.add_done_callback(lambda f: self._drop_late_actions(game_tab_id, f))
+        except Exception:
+            pass # already logged by the analysis thread
+        return None
+
+    def _drop_late_actions(self, game_tab_id, future):
+        if not future.cancelled() and future.exception() is None:
+            self.drop_actions(game_tab_id, future.result())
+
+    @staticmethod
+    def drop_actions(game_tab_id, actions):
+        names = [action.name for action in actions]
+        for name in names:
+            RESOLUTIONS.inc(action=name, outcome='dropped')
+        if names:
+            LOGGER.warning('Dropped actions %s - %s, next visit will detect again', names, game_tab_id,
+                           extra={"game_tab_id": game_tab_id, "event": "dropped"})
+
                 
     def is_running(self):
         pass # implement in worker
 
+    def due_positions(self, game_window):
+        """
+        ring positions of the game tabs due for a visit, None = tabs not learnt yet (all due)
+        """
+        ring = self.tab_registry.ring(WindowUtil.get_hwnd(game_window))
+        if ring is None:
+            return None
+        return [position for position in range(1, len(ring))
+                if self.tab_scheduler.is_due(self.make_game_tab_id(game_window, position))]
+
+    def window_priority(self, game_window):
+        """
+        most urgent priority of the due tabs of the window, None = nothing due
+        """
+        positions = self.due_positions(game_window)
+        if positions is None:
+            return TabScheduler.ATTENTION
+        if not positions:
+            return None
+        return min(self.tab_scheduler.priority(self.make_game_tab_id(game_window, position)) for position in positions)
+
     def iterate_game_tab(self, game_window):
         if not self.is_running():
             return
         
         hwnd = WindowUtil.get_hwnd(game_window)
-        title = game_window.title
-        WindowUtil.focus(game_window)
-        # WindowUtil.send_trl_tab(game_window)
+        if INPUT_EXECUTOR.is_busy(hwnd):
+            LOGGER.info('Input still in progress on window %s, skip it this cycle', game_window.title,
+                        extra={"window": game_window.title})
+            return
+        due = self.due_positions(game_window)
+        if due is not None and not due:
+            return # no tab of this window due yet: no focus, no Ctrl+Tab
+        with STAGE_TIMER.span('window_cycle', game_window.title):
+            with STAGE_TIMER.span('focus', game_window.title):
+                # on the input thread, behind input already queued for other windows
+                INPUT_EXECUTOR.run(FOCUS_MANAGER.ensure, game_window).result()
+
+            # known ring: start the cycle from whatever tab the window currently shows
+            position = self.tab_registry.position(hwnd, self.frame_waiter.signature(game_window))
+            if position is not None:
+                self.iterate_known_tabs(game_window, position, due)
+            else:
+                self.learn_game_tabs(game_window)
 
+    def iterate_known_tabs(self, game_window, position, due=None):
+        """
+        Walk the ring from the current tab until every due tab (all if None) was processed,
+        tabs not due are switched past without capture
+        """
+        hwnd = WindowUtil.get_hwnd(game_window)
+        ring = self.tab_registry.ring(hwnd)
+        pending = set(range(1, len(ring)) if due is None else due)
+        LOGGER.debug("Processing tabs of window '%s' from tab %s", game_window.title, position)
+        inflight = None  # (position, game_tab_id, future) of the tab analysed while switching away from it
+        late = {}  # position -> (game_tab_id, actions) found after switching away, run on the next pass
+
+        try:
+            # second pass only to come back to tabs with late actions
+            for step in range(2 * len(ring)):
+                if not self.is_running() or not (pending or late):
+                    return
+                if step > 0:
+                    self.switch_tab(game_window)
+                    position = (position + 1) % len(ring)
+                    if inflight is not None:
+                        late_position, game_tab_id, future = inflight
+                        inflight = None
+                        actions = self.collect_analysis(game_window, game_tab_id, future)
+                        if actions:
+                            LOGGER.info('Actions of %s found after switching away, run when back on the tab',
+                                        game_tab_id, extra={"game_tab_id": game_tab_id})
+                            late[late_position] = (game_tab_id, actions)
+                    if self.frame_waiter.signature(game_window) != ring[position]:
+                        LOGGER.info('Tabs changed in window %s, re-learn them next cycle', game_window.title)
+                        self.tab_registry.forget(hwnd)
+                        return
+
+                if position == 0:
+                    # re-opened game tabs change the tab strip, caught by the fingerprint check of the next switch
+                    self.check_game_exit(hwnd, game_window)
+                    continue
+                if position in late:
+                    # decided on a frame of this tab one ring pass ago
+                    self.run_actions(game_window, *late.pop(position))
+                    if INPUT_EXECUTOR.is_busy(hwnd):
+                        return
+                    continue
+                if position not in pending:
+                    continue
+                pending.discard(position)
+
+                frame = self.capture(game_window)
+                if frame is None:
+                    continue
+                if self.is_main_window(game_window, frame):
+                    LOGGER.info('Main tab seen at position %s of window %s, re-learn tabs next cycle',
+                                position, game_window.title)
+                    self.tab_registry.forget(hwnd)
+                    return
+                game_tab_id = self.make_game_tab_id(game_window, position)
+                LOGGER.debug("Processing game tab '%s'", game_tab_id, extra={"game_tab_id": game_tab_id})
+                if (self.tab_pipeline is not None and pending
+                        and self.tab_scheduler.priority(game_tab_id) == TabScheduler.HEALTHY):
+                    # nothing pending on this tab, most likely nothing to click:
+                    # analysed while Ctrl+Tab and the settle wait of the next tab run
+                    inflight = (position, game_tab_id, self.tab_pipeline.submit(game_window, frame, game_tab_id))
+                    continue
+                self.process_game_tab(game_window, frame, game_tab_id)
+                if INPUT_EXECUTOR.is_busy(hwnd):
+                    return
+        finally:
+            if inflight is not None:
+                _, game_tab_id, future = inflight
+                self.drop_actions(game_tab_id, self.collect_analysis(game_window, game_tab_id, future) or [])
+            for game_tab_id, actions in late.values():
+                self.drop_actions(game_tab_id, actions)
+
+    def learn_game_tabs(self, game_window):
+        """
+        Unknown tab layout: search the main tab, iterate game tabs until main tab is seen again
+        and remember each tab fingerprint for the next cycles
+        """
+        hwnd = WindowUtil.get_hwnd(game_window)
+        title = game_window.title
         max_initial_tab_attempts = 4 # Max Ctrl+Tab presses to find main tab initially
         main_tab_found = self.find_main_tab(game_window, max_initial_tab_attempts)
 
@@ -62,7 +468,8 @@ class GameTabIterate(CheckAutoIsOn, AutoOpenGame):
             self.check_game_exit(hwnd, game_window)
 
         # Phase 2: Iterate through game tabs until main tab is seen again
-        print(f"===Worker: Starting game tab processing for window '{title}'...")
+        LOGGER.debug("Learning tabs of window '%s'", title)
+        fingerprints = [self.frame_waiter.signature(game_window)]
         game_tabs_processed_in_cycle = 0
         max_game_tab_processing_iterations = 7 # Safeguard to prevent infinite loop
 
@@ -70,49 +477,78 @@ class GameTabIterate(CheckAutoIsOn, AutoOpenGame):
         for _ in range(max_game_tab_processing_iterations):
             if not self.is_running():
                 return
-            WindowUtil.send_trl_tab(game_window)
-            time.sleep(1)
-            screenshot = WindowUtil.screen_shot(game_window)
+            self.switch_tab(game_window)
+            fingerprint = self.frame_waiter.signature(game_window)
+            frame = self.capture(game_window)
+            if frame is None:
+                fingerprints.append(None) # tab not identified, ring won't be learnt this cycle
+                game_tabs_processed_in_cycle += 1
+                continue
 
             # Check if we've cycled back to the main tab
-            if self.is_main_window(game_window, screenshot):
+            if self.is_main_window(game_window, frame):
+                if fingerprint != fingerprints[0] or not self.tab_registry.learn(hwnd, fingerprints):
+                    LOGGER.info('Could not fingerprint tabs of window %s, main tab will be searched next cycle', title,
+                                extra={"window": title})
                 return # Exit the game tab processing loop
             
+            fingerprints.append(fingerprint)
             game_tabs_processed_in_cycle += 1
-            game_tab_id = f'{hwnd}{self.SEPARATOR}{title}{self.SEPARATOR}{game_tabs_processed_in_cycle}'
-            print(f"===Processing game tab '{game_tab_id}")
+            game_tab_id = self.make_game_tab_id(game_window, game_tabs_processed_in_cycle)
+            LOGGER.debug("Processing game tab '%s'", game_tab_id, extra={"game_tab_id": game_tab_id})
             # screenshot = WindowUtil.screen_shot(game_window)
             # file_name = os.path.join("tmp", game_tab_id + ".png")
             # screenshot.save(file_name)
-            self.check_game_scenario(game_window, screenshot, game_tab_id)
-            time.sleep(2)
+            self.process_game_tab(game_window, frame, game_tab_id)
+            if INPUT_EXECUTOR.is_busy(hwnd):
+                return # tab ring is learnt again next cycle
         else:
-            print(f"Exceeded max game tab processing iterations ({max_game_tab_processing_iterations}) for window '{game_window.title}'. May not have processed all tabs.")
+            LOGGER.warning("Exceeded max game tab processing iterations (%s) for window '%s'. May not have processed all tabs.",
+                           max_game_tab_processing_iterations, game_window.title)
+
+    @staticmethod
+    def window_key(game_window) -> str:
+        # title based (see RegisteredWindow.key): ids and the tab state keyed by them stay the same when the
+        # emulator window is re-created, windows sharing a title still get their own
+        return getattr(game_window, 'key', game_window.title)
+
+    def make_game_tab_id(self, game_window, tab_index):
+        return f'{self.window_key(game_window)}{self.SEPARATOR}{tab_index}'
 
     def find_main_tab(self, game_window, max_initial_tab_attempts):
         for attempt in range(max_initial_tab_attempts):
             if not self.is_running():
                 return False
             # WindowUtil.focus(game_window)
-            screenshot = WindowUtil.screen_shot(game_window)
+            frame = self.capture(game_window)
             # file_name = os.path.join("tmp", game_window.title + "_" +  str(attempt) + ".png")
-            # screenshot.save(file_name)
-            if self.is_main_window(game_window, screenshot):
-                print(f"Main MuMu tab found after {attempt + 1} attempts.")
+            # frame.save(file_name)
+            if frame is not None and self.is_main_window(game_window, frame):
+                LOGGER.debug('Main MuMu tab found after %s attempts.', attempt + 1)
                 return True
             
-            WindowUtil.send_trl_tab(game_window)
-            time.sleep(1)
-            print(f"Ctrl+Tab pressed, checking next tab for main tab...")
-        print(f'No main window found after {max_initial_tab_attempts} attempts, window: {game_window.title}')
+            self.switch_tab(game_window)
+        LOGGER.info('No main window found after %s attempts, window: %s', max_initial_tab_attempts, game_window.title)
         return False
         
 
-    def is_main_window(self, game_window, screenshot, tolerance: int = 5) -> str:
-        return WindowUtil.check_pixel_pattern(game_window, 
-                                             screenshot, 
-                                             pixel_points_config=self.game_window_main_points, debug_name="CHECK-MAIN",
-                                             color_tolerance=tolerance) 
+    def forget_tabs(self, game_tab_ids):
+        """
+        Tabs evicted from the TabStateStore (closed windows, removed instances) leave the scheduler and scenarios too
+        """
+        if not game_tab_ids:
+            return
+        self.tab_scheduler.forget(game_tab_ids)
+        for scenario in self.get_game_scenarios():
+            scenario.forget_tabs(game_tab_ids)
+        # a window without any tab left in the store is gone for good, so is its capture failure series
+        window_key = lambda game_tab_id: game_tab_id.rsplit(self.SEPARATOR, 1)[0]
+        known = {window_key(game_tab_id) for game_tab_id in self.tab_states.last_visits()}
+        for key in {window_key(game_tab_id) for game_tab_id in game_tab_ids} - known:
+            CAPTURE_FAILURES.forget(window=key)
+
+    def is_main_window(self, game_window, frame: Frame) -> bool:
+        return self.pixel_detector.is_match(frame.pattern_mask(self.pixel_detector), self.MAIN_WINDOW_PATTERN)
         
     def get_game_scenarios(self) -> List[GameScenario]:
         raise('Should implement in woker')
\ No newline at end of file
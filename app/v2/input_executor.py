@@ -0,0 +1,123 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from typing import Callable, NamedTuple
+
+from app.log_factory import create_logger
+
+LOGGER = create_logger(name='InputExecutor')
+
+
+class InputStep(NamedTuple):
+    delay_seconds: float  # wait after the previous step (or after submit for the first one)
+    func: Callable
+    args: tuple = ()
+
+
+class InputExecutor:
+    """
+    One long-lived thread executing mouse/keyboard input in order. A multi-step action is scheduled on a
+    clock: its next step becomes due `delay_seconds` after the previous one ran, and other input runs in
+    between instead of the thread sleeping. submit() returns a Future completed after the last step.
+    A multi-step action can hold a window (hwnd) so the worker leaves that window alone until it is done.
+    """
+
+    def __init__(self):
+        self._queue = []  # heap of (due, order, sequence)
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+        self._busy_windows = Counter()
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        with self._condition:
+            if self._thread is not None:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name='InputExecutor', daemon=True)
+            self._thread.start()
+
+    def submit(self, steps, hwnd=None) -> Future:
+        self.start()
+        future = Future()
+        future.set_running_or_notify_cancel()
+        sequence = {"steps": list(steps), "index": 0, "future": future, "hwnd": hwnd}
+        with self._condition:
+            if hwnd is not None:
+                self._busy_windows[hwnd] += 1
+            self._push(sequence, time.monotonic() + sequence["steps"][0].delay_seconds)
+        return future
+
+    def run(self, func, *args) -> Future:
+        """
+        single step, queued behind input already due
+        """
+        return self.submit([InputStep(0, func, args)])
+
+    def is_busy(self, hwnd) -> bool:
+        with self._condition:
+            return self._busy_windows[hwnd] > 0
+
+    def _push(self, sequence, due):
+        heapq.heappush(self._queue, (due, next(self._order), sequence))
+        self._condition.notify()
+
+    def _next_due(self):
+        with self._condition:
+            while self._running:
+                if self._queue:
+                    wait = self._queue[0][0] - time.monotonic()
+                    if wait <= 0:
+                        return heapq.heappop(self._queue)[2]
+                    self._condition.wait(timeout=wait)
+                else:
+                    self._condition.wait()
+            return None
+
+    def _run(self):
+        while True:
+            sequence = self._next_due()
+            if sequence is None:
+                return
+            step = sequence["steps"][sequence["index"]]
+            try:
+                result = step.func(*step.args)
+            except Exception as e:
+                LOGGER.error(f'Input step {getattr(step.func, "__name__", step.func)} failed: {e}', exc_info=True)
+                self._finish(sequence, exception=e)
+                continue
+
+            sequence["index"] += 1
+            if sequence["index"] < len(sequence["steps"]):
+                with self._condition:
+                    self._push(sequence, time.monotonic() + sequence["steps"][sequence["index"]].delay_seconds)
+            else:
+                self._finish(sequence, result=result)
+
+    def _finish(self, sequence, result=None, exception=None):
+        with self._condition:
+            if sequence["hwnd"] is not None:
+                self._busy_windows[sequence["hwnd"]] -= 1
+        if exception is not None:
+            sequence["future"].set_exception(exception)
+        else:
+            sequence["future"].set_result(result)
+
+    def shutdown(self):
+        with self._condition:
+            self._running = False
+            pending = [item[2] for item in self._queue]
+            self._queue.clear()
+            self._condition.notify_all()
+            thread, self._thread = self._thread, None
+        for sequence in pending:
+            self._finish(sequence, exception=RuntimeError('Input executor stopped'))
+        if thread is not None:
+            thread.join(timeout=5)
+
+
+INPUT_EXECUTOR = InputExecutor()
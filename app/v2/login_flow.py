@@ -0,0 +1,46 @@
+import time
+
+from app.log_factory import create_logger
+from app.v2.tab_state_store import TabStateStore
+
+LOGGER = create_logger(name='LoginFlow')
+
+
+class LoginFlow:
+    """
+    Per-tab login state machine: login -> server -> character -> auto on.
+    Each step is one click done by the scenario that sees the matching screen; the flow moves on when a
+    later visit of the tab shows the next screen, so a slow login never blocks the other tabs.
+    A step not followed by the next screen within step_timeout_seconds falls back to IDLE.
+    The step of each tab is kept in the TabStateStore, so a restart resumes the flow.
+    """
+    IDLE = "idle"
+    LOGIN_CLICKED = "login_clicked"
+    SERVER_SELECTED = "server_selected"
+    CHARACTER_SELECTED = "character_selected"
+
+    def __init__(self, tab_states: TabStateStore, step_timeout_seconds=60):
+        self.tab_states = tab_states
+        self.step_timeout_seconds = step_timeout_seconds
+
+    def state(self, game_tab_id) -> str:
+        tab_state = self.tab_states.get(game_tab_id)
+        state = tab_state.login_step
+        if state != self.IDLE and time.time() - tab_state.login_step_at > self.step_timeout_seconds:
+            LOGGER.info('Login step %s timed out - %s', state, game_tab_id, extra={'game_tab_id': game_tab_id})
+            self.tab_states.update(game_tab_id, login_step=self.IDLE, login_step_at=None)
+            return self.IDLE
+        return state
+
+    def advance(self, game_tab_id, state):
+        previous = self.state(game_tab_id)
+        LOGGER.info('Login flow %s -> %s - %s', previous, state, game_tab_id, extra={'game_tab_id': game_tab_id})
+        self.tab_states.update(game_tab_id, login_step=state, login_step_at=time.time())
+
+    def finish(self, game_tab_id):
+        if self.tab_states.get(game_tab_id).login_step != self.IDLE:
+            self.tab_states.update(game_tab_id, login_step=self.IDLE, login_step_at=None)
+            LOGGER.info('Login flow finished - %s', game_tab_id, extra={'game_tab_id': game_tab_id})
+
+    def in_progress(self, game_tab_id) -> bool:
+        return self.state(game_tab_id) != self.IDLE
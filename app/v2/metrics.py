@@ -0,0 +1,244 @@
+import bisect
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.log_factory import create_logger
+
+LOGGER = create_logger(name='Metrics')
+
+# seconds, from a quick tab visit to a cycle over many windows
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels_text(names, values, extra=()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in (*zip(names, values), *extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    TYPE = None
+
+    def __init__(self, registry, name, help_text, labels=()):
+        self.registry = registry
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._series = {}  # label values -> value
+
+    def _key(self, labels: dict):
+        key = tuple(str(labels.get(name, '')) for name in self.labels)
+        if key not in self._series and len(self._series) >= self.registry.max_series:
+            self.registry.overflow(self.name)
+            return None
+        return key
+
+    def header(self) -> list:
+        return [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.TYPE}']
+
+    def forget(self, **labels):
+        """
+        drop the series of a closed window / forgotten tab
+        """
+        with self.registry.lock:
+            self._series.pop(tuple(str(labels.get(name, '')) for name in self.labels), None)
+
+
+class Counter(_Metric):
+    TYPE = 'counter'
+
+    def inc(self, amount=1, **labels):
+        with self.registry.lock:
+            key = self._key(labels)
+            if key is not None:
+                self._series[key] = self._series.get(key, 0) + amount
+
+    def lines(self) -> list:
+        return [f'{self.name}{_labels_text(self.labels, key)} {_number(value)}'
+                for key, value in sorted(self._series.items())]
+
+
+class Histogram(_Metric):
+    """
+    Fixed buckets: an observation is one bisect and two additions whatever the number of samples
+    """
+    TYPE = 'histogram'
+
+    def __init__(self, registry, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        with self.registry.lock:
+            key = self._key(labels)
+            if key is None:
+                return
+            series = self._series.get(key)
+            if series is None:
+                # bucket counts (last one = above every bucket), sum, count
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def lines(self) -> list:
+        lines = []
+        for key, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float('inf')), counts):
+                cumulative += bucket_count
+                le = (('le', _number(bound)),)
+                lines.append(f'{self.name}_bucket{_labels_text(self.labels, key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels_text(self.labels, key)} {_number(round(total, 6))}')
+            lines.append(f'{self.name}_count{_labels_text(self.labels, key)} {count}')
+        return lines
+
+
+class Gauge(_Metric):
+    """
+    Read when exported: collect() returns {label values tuple: value}, nothing is stored in between
+    """
+    TYPE = 'gauge'
+
+    def __init__(self, registry, name, help_text, labels=(), collect=None):
+        super().__init__(registry, name, help_text, labels)
+        self.collect = collect
+
+    def lines(self) -> list:
+        if self.collect is None:
+            return []
+        try:
+            values = self.collect()
+        except Exception as e:
+            LOGGER.error(f'Cannot collect {self.name}: {e}')
+            return []
+        return [f'{self.name}{_labels_text(self.labels, key)} {_number(value)}'
+                for key, value in sorted(values.items())[:self.registry.max_series]]
+
+
+class MetricsRegistry:
+    """
+    Counters, histograms and gauges of the detection worker in the Prometheus text format, served on
+    127.0.0.1:<port>/metrics and/or written to a file (node_exporter textfile collector).
+    Recording is a dict update under one lock; each metric keeps at most max_series label combinations.
+    """
+
+    def __init__(self, max_series=500):
+        self.max_series = max_series
+        self.lock = threading.Lock()
+        self._metrics = {}  # name -> metric, in registration order
+        self._overflowed = set()
+        self._server = None
+
+    def _register(self, metric):
+        with self.lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None and type(existing) is type(metric) and existing.labels == metric.labels:
+                if isinstance(metric, Gauge):
+                    existing.collect = metric.collect  # a new worker reports its own tabs
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help_text, labels=()) -> Counter:
+        return self._register(Counter(self, name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(self, name, help_text, labels, buckets))
+
+    def gauge(self, name, help_text, labels=(), collect=None) -> Gauge:
+        return self._register(Gauge(self, name, help_text, labels, collect))
+
+    def overflow(self, name):
+        if name not in self._overflowed:
+            self._overflowed.add(name)
+            LOGGER.warning(f'{name} has {self.max_series} series, new label values are not recorded')
+
+    def render(self) -> str:
+        with self.lock:
+            metrics = list(self._metrics.values())
+            stored = [(metric, metric.lines()) for metric in metrics if not isinstance(metric, Gauge)]
+        # gauges read worker state: collected outside the lock
+        lines = {metric.name: rendered for metric, rendered in stored}
+        for metric in metrics:
+            if isinstance(metric, Gauge):
+                lines[metric.name] = metric.lines()
+        text = []
+        for metric in metrics:
+            text.extend(metric.header())
+            text.extend(lines[metric.name])
+        return '\n'.join(text) + '\n'
+
+    def write(self, path):
+        """
+        whole file replaced at once, a scraper never reads half of it
+        """
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(self.render())
+            os.replace(tmp_path, path)
+        except OSError as e:
+            LOGGER.error(f'Cannot write metrics to {path}: {e}')
+
+    def serve(self, port, host='127.0.0.1'):
+        """
+        GET /metrics on a daemon thread, localhost only by default
+        """
+        if self._server is not None:
+            return
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # one line per scrape would flood the tool log
+
+        try:
+            self._server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            LOGGER.error(f'Cannot serve metrics on {host}:{port}: {e}')
+            return
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True).start()
+        LOGGER.info(f'Metrics served on http://{host}:{self._server.server_port}/metrics')
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+METRICS = MetricsRegistry()
+
+DETECTION_CYCLES = METRICS.counter('vlvauto_detection_cycles_total', 'Detection cycles run by the worker')
+CYCLE_SECONDS = METRICS.histogram('vlvauto_detection_cycle_seconds', 'Duration of a detection cycle over all due windows')
+SCENARIO_DETECTIONS = METRICS.counter('vlvauto_scenario_detections_total',
+                                      'Resolve actions requested by a scenario', ('scenario', 'action'))
+RESOLUTIONS = METRICS.counter('vlvauto_resolutions_total',
+                              'Resolve actions by outcome (done, failed, dropped)', ('action', 'outcome'))
+CAPTURE_FAILURES = METRICS.counter('vlvauto_capture_failures_total', 'Window captures without a frame', ('window',))
@@ -0,0 +1,107 @@
+import numpy as np
+
+
+class PixelPatternDetector:
+    """
+    Compiles every configured pixel pattern ((x, y, r, g, b), ...) into flat index and
+    expected-color arrays, so all patterns are checked on a frame with one gather and
+    one tolerance comparison. match() returns a bitmask, bit i set = pattern i matched.
+    """
+
+    def __init__(self):
+        self.pattern_names = []
+        self._patterns = {}
+        self._compiled = False
+
+    def add_pattern(self, name: str, pixel_points_config, color_tolerance=7):
+        if name in self._patterns:
+            raise ValueError(f'Pixel pattern already registered: {name}')
+        points = [tuple(int(v) for v in point) for point in pixel_points_config]
+        for point in points:
+            if len(point) != 5:
+                raise ValueError(f'Pixel pattern {name} expects (x, y, r, g, b) points, got {point}')
+        self._patterns[name] = (points, int(color_tolerance))
+        self.pattern_names.append(name)
+        self._compiled = False
+        return self.bit(name)
+
+    def has_pattern(self, name: str) -> bool:
+        return name in self._patterns
+
+    def bit(self, name: str) -> int:
+        return 1 << self.pattern_names.index(name)
+
+    def compile(self):
+        xs, ys, expected, tolerances, owners = [], [], [], [], []
+        for idx, name in enumerate(self.pattern_names):
+            points, tolerance = self._patterns[name]
+            for x, y, r, g, b in points:
+                xs.append(x)
+                ys.append(y)
+                expected.append((r, g, b))
+                tolerances.append(tolerance)
+                owners.append(idx)
+
+        self.xs = np.array(xs, dtype=np.intp)
+        self.ys = np.array(ys, dtype=np.intp)
+        self.expected_rgb = np.array(expected, dtype=np.int16).reshape(-1, 3)
+        self.tolerances = np.array(tolerances, dtype=np.int16)[:, None]
+        self.owners = np.array(owners, dtype=np.intp)
+        self.pattern_count = len(self.pattern_names)
+        # patterns without points never match, like an empty config would never be "found"
+        self._empty = np.bincount(self.owners, minlength=self.pattern_count) == 0
+        self._weights = np.array([1 << i for i in range(self.pattern_count)], dtype=object)
+        self._indices = {}
+        self._compiled = True
+
+    def _indices_for(self, h, w):
+        """
+        clipped gather indices + inside flags of a frame size, computed once per size
+        """
+        indices = self._indices.get((h, w))
+        if indices is None:
+            inside = (self.xs >= 0) & (self.xs < w) & (self.ys >= 0) & (self.ys < h)
+            indices = (np.clip(self.ys, 0, h - 1), np.clip(self.xs, 0, w - 1), inside)
+            self._indices[(h, w)] = indices
+        return indices
+
+    def match(self, screenshot) -> int:
+        """
+        screenshot: PIL image (RGB) or numpy array (RGB, or BGRA as grabbed by mss).
+        """
+        if not self._compiled:
+            self.compile()
+        if self.pattern_count == 0:
+            return 0
+
+        rgb = self.to_rgb_view(screenshot)
+        ys, xs, inside = self._indices_for(*rgb.shape[:2])
+        actual = rgb[ys, xs].astype(np.int16)
+
+        point_ok = (np.abs(actual - self.expected_rgb) <= self.tolerances).all(axis=1) & inside
+        failed = np.bincount(self.owners[~point_ok], minlength=self.pattern_count)
+        matched = (failed == 0) & ~self._empty
+        return int(self._weights[matched].sum())
+
+    def point_regions(self):
+        """
+        1x1 (x, y, width, height) regions of every compiled point, used to capture only what is read
+        """
+        if not self._compiled:
+            self.compile()
+        return [(int(x), int(y), 1, 1) for x, y in zip(self.xs, self.ys)]
+
+    def is_match(self, mask: int, name: str) -> bool:
+        return bool(mask & self.bit(name))
+
+    def matched_names(self, mask: int) -> list[str]:
+        return [name for i, name in enumerate(self.pattern_names) if mask & (1 << i)]
+
+    @staticmethod
+    def to_rgb_view(screenshot):
+        if isinstance(screenshot, np.ndarray):
+            if screenshot.ndim == 3 and screenshot.shape[2] == 4:
+                # mss grabs BGRA, reorder channels as a view (no copy)
+                return screenshot[:, :, 2::-1]
+            return screenshot
+        return np.asarray(screenshot.convert('RGB') if screenshot.mode != 'RGB' else screenshot)
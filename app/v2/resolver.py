@@ -1,22 +1,14 @@
 
-from concurrent.futures import ThreadPoolExecutor
-import time
+from concurrent.futures import Future
 
 from app.log_factory import create_logger
-from app.send_window_event import simulate_click, simulate_mouse_move_around
+from app.send_window_event import simulate_click, simulate_mouse_drag
+from app.v2.focus_manager import FOCUS_MANAGER
+from app.v2.input_executor import INPUT_EXECUTOR, InputStep
 
 
 LOGGER = create_logger(name='DoLogin')
 
-
-def await_execute(func, *args, **kwargs):
-        """
-        Runs any callable in a background thread and blocks until result is returned.
-        """
-        with ThreadPoolExecutor() as executor:
-            future = executor.submit(func, *args, **kwargs)
-            r = future.result()  # Blocks until done
-
 def click_login_button( points: tuple, delay=5000):
     # Step 1: Click Login button
     simulate_click(*points[0])
@@ -39,31 +31,48 @@ def close_login_server_connect_warning_dialog(self, points: tuple):
     simulate_click(*points[0])
 
 class Resolver:
-    
+    """
+    Input actions run on the shared InputExecutor and return a Future instead of blocking the caller.
+    Multi-step actions hold the window (hwnd) until their last step ran, see InputExecutor.is_busy.
+    window: every step brings it to the front first if it is not (FocusManager), None = input as is.
+    """
+
     @staticmethod
-    def do_single_click(points: tuple):
-        await_execute(simulate_click, *points[0])
+    def _steps(steps, window):
+        if window is None:
+            return steps
+        return [InputStep(step.delay_seconds, FOCUS_MANAGER.bind(window, step.func), step.args) for step in steps]
 
     @staticmethod
-    def do_login_user_pass(points: tuple):
-        await_execute(click_login_button, points)
-        time.sleep(5)
-        await_execute(click_server_icon, points)
-        time.sleep(5)
-        await_execute(double_click_avatar, points)
+    def _run(func, args, window) -> Future:
+        return INPUT_EXECUTOR.submit(Resolver._steps([InputStep(0, func, args)], window))
 
     @staticmethod
-    def do_select_server(points: tuple):
-        await_execute(click_server_icon, points)
-        time.sleep(5)
-        await_execute(double_click_avatar, points)
+    def do_single_click(points: tuple, window=None) -> Future:
+        return Resolver._run(simulate_click, tuple(points[0]), window)
 
     @staticmethod
-    def do_select_character(points: tuple):
-        await_execute(double_click_avatar, points)
+    def do_click_sequence(points: tuple, interval_seconds=0.2, hwnd=None, window=None) -> Future:
+        steps = [InputStep(interval_seconds if i else 0, simulate_click, tuple(p)) for i, p in enumerate(points)]
+        return INPUT_EXECUTOR.submit(Resolver._steps(steps, window), hwnd=hwnd)
 
+    # login is one click per screen, see LoginFlow: the next step is clicked when a later visit shows its screen
     @staticmethod
-    def do_move_around(start_x, start_y):
-        await_execute(simulate_mouse_move_around, start_x, start_y)
+    def do_click_login(points: tuple, window=None) -> Future:
+        return Resolver._run(click_login_button, (points,), window)
 
+    @staticmethod
+    def do_select_server(points: tuple, window=None) -> Future:
+        return Resolver._run(click_server_icon, (points,), window)
 
+    @staticmethod
+    def do_select_character(points: tuple, window=None) -> Future:
+        return Resolver._run(double_click_avatar, (points,), window)
+
+    @staticmethod
+    def do_move_around(start_x, start_y, hwnd=None, window=None) -> Future:
+        # one step per drag so other input is not stuck behind the whole move
+        return INPUT_EXECUTOR.submit(Resolver._steps([
+            InputStep(0, simulate_mouse_drag, (start_x, start_y, direction))
+            for direction in ('up', 'down', 'right', 'left')
+        ], window), hwnd=hwnd)
@@ -0,0 +1,41 @@
+from app.v2.frame import Frame
+
+
+class ScreenState:
+    """
+    Coarse screen of a tab. The screens are mutually exclusive, so only the scenarios registered
+    for the current one need to run (see GameScenario.SCREEN_STATES).
+    """
+    MAIN = "main"
+    LOGIN = "login"
+    SERVER_SELECT = "server_select"
+    CHARACTER_SELECT = "character_select"
+    WARNING_DIALOG = "warning_dialog"
+    IN_GAME = "in_game"
+    UNKNOWN = "unknown" # nothing recognized, every scenario runs
+
+
+class ScreenStateClassifier:
+    """
+    Screen state from the pixel pattern mask of a frame (already computed for the scenarios, so this is a few
+    bit tests). rules: (state, pattern names identifying it) in priority order, e.g. a warning dialog drawn over
+    the login screen is a WARNING_DIALOG.
+    """
+
+    def __init__(self, pixel_detector, rules):
+        self.pixel_detector = pixel_detector
+        self.rules = []
+        for state, pattern_names in rules:
+            bits = 0
+            for name in pattern_names:
+                bits |= pixel_detector.bit(name)
+            self.rules.append((state, bits))
+
+    def classify_mask(self, mask: int) -> str:
+        for state, bits in self.rules:
+            if mask & bits:
+                return state
+        return ScreenState.UNKNOWN
+
+    def classify(self, frame: Frame) -> str:
+        return self.classify_mask(frame.pattern_mask(self.pixel_detector))
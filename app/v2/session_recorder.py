@@ -0,0 +1,117 @@
+import json
+import os
+import threading
+import time
+import zlib
+from typing import NamedTuple
+
+import numpy as np
+
+from app.log_factory import create_logger
+from app.v2.frame import Frame
+
+LOGGER = create_logger(name='SessionRecorder')
+
+FRAMES_FILE = 'frames.bin'
+INDEX_FILE = 'index.jsonl'
+
+
+class RecordedFrame(NamedTuple):
+    timestamp: float
+    game_tab_id: str
+    window: dict  # title, hwnd, width, height of the captured window
+    pattern_mask: int
+    actions: list  # ResolveAction names decided on this frame
+    frame: Frame
+
+
+class SessionRecorder:
+    """
+    Append-only archive of every analysed tab: the zlib compressed pixels of each frame go to frames.bin
+    back to back, one json line per frame in index.jsonl says where they are and what the scenarios decided.
+    With sparse capture most of a frame is never rewritten and compresses to almost nothing.
+    Writes are serialized, callers may be on any thread.
+    """
+
+    COMPRESS_LEVEL = 1  # fastest: the recording is written from the detection thread
+
+    def __init__(self, folder):
+        os.makedirs(folder, exist_ok=True)
+        self.folder = folder
+        self._lock = threading.Lock()
+        self._frames = open(os.path.join(folder, FRAMES_FILE), 'ab')
+        self._index = open(os.path.join(folder, INDEX_FILE), 'a', encoding='utf-8')
+        self.count = 0
+        LOGGER.info(f'Recording session to {folder}')
+
+    def record(self, game_window, frame: Frame, game_tab_id, actions, pattern_mask):
+        pixels = np.ascontiguousarray(frame.raw if isinstance(frame.raw, np.ndarray) else frame.rgb())
+        data = zlib.compress(pixels.data, self.COMPRESS_LEVEL)
+        with self._lock:
+            if self._frames is None:
+                return
+            offset = self._frames.tell()
+            self._frames.write(data)
+            entry = {
+                "t": time.time(),
+                "tab": game_tab_id,
+                "window": {"title": game_window.title, "hwnd": game_window._hWnd,
+                           "width": game_window.width, "height": game_window.height},
+                "offset": offset,
+                "size": len(data),
+                "codec": "zlib",
+                "shape": list(pixels.shape),
+                "mask": pattern_mask,
+                "actions": list(actions),
+            }
+            self._index.write(json.dumps(entry) + '\n')
+            self.count += 1
+
+    def flush(self):
+        with self._lock:
+            if self._frames is not None:
+                self._frames.flush()
+                self._index.flush()
+
+    def close(self):
+        with self._lock:
+            if self._frames is None:
+                return
+            self._frames.close()
+            self._index.close()
+            self._frames = self._index = None
+        LOGGER.info(f'Recorded {self.count} frames to {self.folder}')
+
+
+class SessionArchive:
+    """
+    Reader of a SessionRecorder folder, frames are decompressed when read. Sessions recorded before
+    compression (no codec in the index) are zero-copy views of the memory-mapped frames.bin.
+    4-channel frames are BGRA as captured, 3-channel ones RGB.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        with open(os.path.join(folder, INDEX_FILE), encoding='utf-8') as f:
+            # a crash while recording may leave a partial last line
+            self.entries = [json.loads(line) for line in f if line.endswith('\n')]
+        path = os.path.join(folder, FRAMES_FILE)
+        self._data = np.memmap(path, dtype=np.uint8, mode='r') if os.path.getsize(path) else np.zeros(0, np.uint8)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, idx) -> RecordedFrame:
+        entry = self.entries[idx]
+        shape = tuple(entry["shape"])
+        offset = entry["offset"]
+        if entry.get("codec") == "zlib":
+            data = zlib.decompress(self._data[offset:offset + entry["size"]])
+            pixels = np.frombuffer(data, dtype=np.uint8).reshape(shape)
+        else:
+            pixels = self._data[offset:offset + int(np.prod(shape))].reshape(shape)
+        return RecordedFrame(entry["t"], entry["tab"], entry["window"], entry["mask"], entry["actions"], Frame(pixels))
+
+    def __iter__(self):
+        for idx in range(len(self.entries)):
+            yield self[idx]
@@ -0,0 +1,101 @@
+"""
+Headless replay of a recorded session (see SessionRecorder) through the detection code:
+every frame goes through GameTabIterate.analyze_tab, resolve actions are collected, never executed.
+
+    python -m app.v2.session_replay data/sessions/<session> [--config data/config_v2.ini] [--repeat N]
+
+Prints the frames whose decisions differ from the recorded ones and the detection throughput.
+Scenario timers (town stuck, login confirm) run on the wall clock, so decisions depending on
+them are only comparable when the replay is not faster than the recording.
+"""
+import argparse
+import dataclasses
+import json
+import time
+from collections import Counter
+
+from app.game_scenario import create_game_scenarios
+from app.log_factory import create_logger
+from app.v2.detection_config import DetectionConfig
+from app.v2.frame import Frame, ScratchBuffers
+from app.v2.game_tab_iterate import GameTabIterate
+from app.v2.session_recorder import SessionArchive
+
+LOGGER = create_logger(name='SessionReplay')
+
+
+class ReplayWindow:
+    """
+    Stands in for the pygetwindow window of a recorded frame, placed at the screen origin
+    """
+
+    def __init__(self, title, hwnd, width, height):
+        self.title = title
+        self._hWnd = hwnd
+        self.left, self.top = 0, 0
+        self.width, self.height = width, height
+
+    def activate(self):
+        pass
+
+
+class SessionReplay(GameTabIterate):
+    def __init__(self, config: DetectionConfig):
+        # never record the replay itself nor overwrite the tab state of the tool
+        GameTabIterate.__init__(self, dataclasses.replace(config, record_session=False, tab_state_file=''))
+        self.game_scenarios = create_game_scenarios(config, self)
+        self.compile_pixel_patterns()
+        self.windows = {}
+        self.scratch = {}  # hwnd -> ScratchBuffers, frames are replayed in order like live ones
+
+    def get_game_scenarios(self):
+        return self.game_scenarios
+
+    def is_running(self):
+        return True
+
+    def window_of(self, recorded) -> ReplayWindow:
+        w = recorded.window
+        key = (w["hwnd"], w["title"])
+        if key not in self.windows:
+            self.windows[key] = ReplayWindow(w["title"], w["hwnd"], w["width"], w["height"])
+        return self.windows[key]
+
+    def replay(self, archive: SessionArchive, repeat=1) -> dict:
+        mismatches = []
+        decisions = Counter()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for idx, recorded in enumerate(archive):
+                window = self.window_of(recorded)
+                frame = Frame(recorded.frame.raw, self.scratch.setdefault(window._hWnd, ScratchBuffers()))
+                actions = [action.name for action in self.analyze_tab(window, frame, recorded.game_tab_id)]
+                decisions.update(actions)
+                if actions != recorded.actions:
+                    mismatches.append({"index": idx, "tab": recorded.game_tab_id,
+                                       "recorded": recorded.actions, "replayed": actions})
+        elapsed = time.perf_counter() - start
+        frames = len(archive) * repeat
+        return {
+            "frames": frames,
+            "seconds": round(elapsed, 3),
+            "frames_per_second": round(frames / elapsed, 1) if elapsed > 0 else None,
+            "decisions": dict(decisions),
+            "mismatches": mismatches,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a recorded detection session headless')
+    parser.add_argument('session', help='folder written by SessionRecorder')
+    parser.add_argument('--config', default='data/config_v2.ini')
+    parser.add_argument('--repeat', type=int, default=1, help='replay the session N times (throughput)')
+    args = parser.parse_args()
+
+    report = SessionReplay(DetectionConfig.from_file(args.config)).replay(SessionArchive(args.session), repeat=args.repeat)
+    print(json.dumps(report, indent=2))
+    return 1 if report["mismatches"] else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
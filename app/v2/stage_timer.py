@@ -0,0 +1,96 @@
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+from app.log_factory import create_logger
+
+LOGGER = create_logger(name='StageTimer')
+
+
+class StageTimer:
+    """
+    Always-on timing of the tab cycle stages (focus, ctrl_tab, settle_wait, capture, detect.*, resolve.*).
+    Each stage keeps its last `window_size` durations, overall and per window, so percentiles reflect
+    the recent cycles. Cheap enough to stay enabled: one perf_counter pair and a deque append per span.
+    """
+
+    def __init__(self, window_size=512, slow_span_seconds=5.0):
+        self.window_size = window_size
+        self.slow_span_seconds = slow_span_seconds
+        self._lock = threading.Lock()
+        self._samples = {}  # stage -> deque of seconds
+        self._window_samples = {}  # (stage, window title) -> deque of seconds
+        self._counts = {}  # stage -> spans recorded since start
+
+    @contextmanager
+    def span(self, stage, window=None, game_tab_id=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start, window, game_tab_id)
+
+    def record(self, stage, seconds, window=None, game_tab_id=None):
+        with self._lock:
+            self._append(self._samples, stage, seconds)
+            if window is not None:
+                self._append(self._window_samples, (stage, window), seconds)
+            self._counts[stage] = self._counts.get(stage, 0) + 1
+        if seconds >= self.slow_span_seconds:
+            LOGGER.info(f'Slow {stage}: {seconds:.2f}s - {window} {game_tab_id or ""}')
+
+    def _append(self, samples, key, seconds):
+        durations = samples.get(key)
+        if durations is None:
+            durations = samples[key] = deque(maxlen=self.window_size)
+        durations.append(seconds)
+
+    @staticmethod
+    def _stats(durations, count=None) -> dict:
+        values = np.fromiter(durations, dtype=float)
+        return {
+            "count": count if count is not None else len(values),
+            "mean_ms": round(values.mean() * 1000, 2),
+            "p50_ms": round(float(np.percentile(values, 50)) * 1000, 2),
+            "p90_ms": round(float(np.percentile(values, 90)) * 1000, 2),
+            "p99_ms": round(float(np.percentile(values, 99)) * 1000, 2),
+            "max_ms": round(values.max() * 1000, 2),
+        }
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            samples = {stage: list(durations) for stage, durations in self._samples.items()}
+            window_samples = {key: list(durations) for key, durations in self._window_samples.items()}
+            counts = dict(self._counts)
+        result = {}
+        for stage in sorted(samples):
+            stats = self._stats(samples[stage], counts[stage])
+            stats["windows"] = {window: self._stats(durations)
+                                for (s, window), durations in sorted(window_samples.items()) if s == stage}
+            result[stage] = stats
+        return result
+
+    def report(self) -> str:
+        lines = [f'{"stage":<40}{"count":>8}{"p50 ms":>10}{"p90 ms":>10}{"p99 ms":>10}{"max ms":>10}']
+        for stage, stats in self.snapshot().items():
+            lines.append(f'{stage:<40}{stats["count"]:>8}{stats["p50_ms"]:>10}{stats["p90_ms"]:>10}'
+                         f'{stats["p99_ms"]:>10}{stats["max_ms"]:>10}')
+        return '\n'.join(lines)
+
+    def dump(self, filename="log/stage_timings.json"):
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2)
+        LOGGER.info(f'Stage timings written to {filename}')
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._window_samples.clear()
+            self._counts.clear()
+
+
+STAGE_TIMER = StageTimer()
@@ -0,0 +1,67 @@
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Callable
+
+from app.log_factory import create_logger
+
+LOGGER = create_logger(name='TabPipeline')
+
+
+class TabAnalysisPipeline:
+    """
+    Analysis side of the capture/analyze pipeline: the input thread submits a captured tab frame and switches
+    to the next tab while one analysis thread runs the scenarios on it, then collects the future holding the
+    list of ResolveAction to execute. One thread only: scenario state is not shared between threads.
+    """
+
+    def __init__(self, analyze: Callable, max_pending=1):
+        self.analyze = analyze
+        self.queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='TabAnalysis', daemon=True)
+        self._thread.start()
+        LOGGER.info("Tab analysis thread started")
+
+    def submit(self, game_window, frame, game_tab_id) -> Future:
+        """
+        Blocks while the queue is full, so capture cannot run away from analysis
+        """
+        future = Future()
+        self.queue.put((future, game_window, frame, game_tab_id))
+        return future
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            future, game_window, frame, game_tab_id = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self.analyze(game_window, frame, game_tab_id))
+            except Exception as e:
+                LOGGER.error('Analysis failed for %s: %s', game_tab_id, e, exc_info=True,
+                             extra={"game_tab_id": game_tab_id})
+                future.set_exception(e)
+
+    def stop(self):
+        if self._thread is None:
+            return
+        # drop frames still waiting, nobody will execute their actions anymore
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[0].cancel()
+        self.queue.put(None)
+        self._thread.join(timeout=5)
+        self._thread = None
+        LOGGER.info("Tab analysis thread stopped")
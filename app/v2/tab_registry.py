@@ -0,0 +1,31 @@
+class TabRegistry:
+    """
+    Per-window ring of known tabs in Ctrl+Tab order, index 0 = MuMu main tab.
+    A tab is identified by the fingerprint of the tab strip while it is active
+    (see FrameWaiter.signature), so after any switch the worker knows which tab it is on.
+    """
+
+    def __init__(self):
+        self.rings = {}  # hwnd -> [fingerprint, ...]
+
+    def ring(self, hwnd):
+        return self.rings.get(hwnd)
+
+    def position(self, hwnd, fingerprint):
+        ring = self.rings.get(hwnd)
+        if ring is None or fingerprint is None or fingerprint not in ring:
+            return None
+        return ring.index(fingerprint)
+
+    def learn(self, hwnd, fingerprints) -> bool:
+        """
+        fingerprints of one full cycle starting at the main tab; refused if tabs are not distinguishable
+        """
+        if None in fingerprints or len(set(fingerprints)) != len(fingerprints):
+            self.rings.pop(hwnd, None)
+            return False
+        self.rings[hwnd] = list(fingerprints)
+        return True
+
+    def forget(self, hwnd):
+        self.rings.pop(hwnd, None)
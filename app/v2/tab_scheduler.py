@@ -0,0 +1,61 @@
+import threading
+import time
+
+
+class TabScheduler:
+    """
+    Priority and next due time of every game tab, decided after each visit from what the tab showed.
+    ATTENTION (resolve action, login / warning screen) and PENDING (scenario timer running, unknown screen) tabs
+    are revisited after min_interval. A HEALTHY tab is revisited after base_interval, doubled on each healthy visit
+    in a row, never later than max_staleness. Tabs never visited are due with ATTENTION priority.
+    """
+    ATTENTION = 0
+    PENDING = 1
+    HEALTHY = 2
+
+    def __init__(self, base_interval, min_interval, max_staleness, backoff=2.0):
+        self.configure(base_interval, min_interval, max_staleness, backoff)
+        self._tabs = {}  # game_tab_id -> (priority, interval, monotonic due time)
+        self._lock = threading.Lock()
+
+    def configure(self, base_interval, min_interval, max_staleness, backoff=2.0):
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_staleness = max_staleness
+        self.backoff = backoff
+
+    def visited(self, game_tab_id, priority, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            previous = self._tabs.get(game_tab_id)
+            if priority != self.HEALTHY:
+                interval = self.min_interval
+            elif previous is None or previous[0] != self.HEALTHY:
+                interval = self.base_interval
+            else:
+                interval = previous[1] * self.backoff
+            interval = min(interval, self.max_staleness)
+            self._tabs[game_tab_id] = (priority, interval, now + interval)
+
+    def is_due(self, game_tab_id, now=None) -> bool:
+        state = self._tabs.get(game_tab_id)
+        if state is None:
+            return True
+        return (time.monotonic() if now is None else now) >= state[2]
+
+    def priority(self, game_tab_id) -> int:
+        state = self._tabs.get(game_tab_id)
+        return self.ATTENTION if state is None else state[0]
+
+    def forget(self, game_tab_ids):
+        with self._lock:
+            for game_tab_id in game_tab_ids:
+                self._tabs.pop(game_tab_id, None)
+
+    def overdue_seconds(self, now=None) -> dict:
+        """
+        game_tab_id -> seconds past its due time (negative = not due yet)
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return {game_tab_id: now - due for game_tab_id, (_, _, due) in self._tabs.items()}
@@ -0,0 +1,142 @@
+import dataclasses
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from app.log_factory import create_logger
+
+LOGGER = create_logger(name='TabStateStore')
+
+
+@dataclass
+class TabState:
+    """
+    Everything remembered about one game tab between visits. Times are epoch seconds (time.time()),
+    so timers keep running across a restart.
+    """
+    last_seen_town_stuck: Optional[float] = None
+    last_seen_login: Optional[float] = None
+    login_step: str = "idle"  # LoginFlow state
+    login_step_at: Optional[float] = None
+    game_exit_check_at: Optional[float] = None  # main tab (index 0): start of the game exit check period
+    last_visit: float = 0.0
+
+
+class TabStateStore:
+    """
+    TabState per game_tab_id (window title + tab index, stable across window re-creation), shared by the worker
+    and the scenarios. Tabs not visited for ttl_seconds are evicted; with a path, a compact json snapshot is
+    written every snapshot_seconds (tmp file + replace, never a half-written file) and read back at startup.
+    """
+
+    def __init__(self, path=None, ttl_seconds=3600, snapshot_seconds=30):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.snapshot_seconds = snapshot_seconds
+        self._states = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = time.time()
+        if path:
+            self.load()
+
+    def get(self, game_tab_id) -> TabState:
+        """
+        state of the tab, read only: change it with update()
+        """
+        state = self._states.get(game_tab_id)
+        if state is None:
+            with self._lock:
+                state = self._states.setdefault(game_tab_id, TabState(last_visit=time.time()))
+        return state
+
+    def update(self, game_tab_id, **fields):
+        state = self.get(game_tab_id)
+        with self._lock:
+            for name, value in fields.items():
+                setattr(state, name, value)
+            self._dirty = True
+
+    def touch(self, game_tab_id, now=None):
+        state = self.get(game_tab_id)
+        with self._lock:
+            state.last_visit = time.time() if now is None else now
+            self._dirty = True
+
+    def __len__(self):
+        return len(self._states)
+
+    def last_visits(self) -> dict:
+        """
+        game_tab_id -> epoch seconds of its last visit
+        """
+        with self._lock:
+            return {game_tab_id: state.last_visit for game_tab_id, state in self._states.items()}
+
+    def evict(self, now=None) -> list:
+        """
+        drop tabs not visited for ttl_seconds (closed windows, renamed instances), returns their ids
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            expired = [game_tab_id for game_tab_id, state in self._states.items()
+                       if now - state.last_visit > self.ttl_seconds]
+            for game_tab_id in expired:
+                del self._states[game_tab_id]
+            if expired:
+                self._dirty = True
+        if expired:
+            LOGGER.info(f'Evicted state of {len(expired)} tabs not seen for {self.ttl_seconds}s: {expired}')
+        return expired
+
+    def tick(self, now=None) -> list:
+        """
+        Called once per detection cycle: eviction + snapshot when due, returns the evicted tab ids
+        """
+        now = time.time() if now is None else now
+        expired = self.evict(now)
+        if self.path and self._dirty and now - self._saved_at >= self.snapshot_seconds:
+            self.save(now)
+        return expired
+
+    def save(self, now=None):
+        if not self.path:
+            return
+        with self._lock:
+            snapshot = {game_tab_id: {k: v for k, v in dataclasses.asdict(state).items() if v != _DEFAULTS[k]}
+                        for game_tab_id, state in self._states.items()}
+            self._dirty = False
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"saved": time.time(), "tabs": snapshot}, f, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            LOGGER.error(f'Cannot write tab state to {self.path}: {e}')
+            self._dirty = True
+        self._saved_at = time.time() if now is None else now
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                tabs = json.load(f)["tabs"]
+            states = {game_tab_id: TabState(**{k: v for k, v in fields.items() if k in _DEFAULTS})
+                      for game_tab_id, fields in tabs.items()}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            LOGGER.error(f'Ignored unreadable tab state {self.path}: {e}')
+            return
+        with self._lock:
+            self._states.update(states)
+        LOGGER.info(f'Loaded state of {len(states)} tabs from {self.path}')
+        self.evict()
+
+
+_DEFAULTS = dataclasses.asdict(TabState())
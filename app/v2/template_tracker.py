@@ -0,0 +1,67 @@
+class TemplateRoiTracker:
+    """
+    Remembers where each template last matched per game tab. The next visit searches a small
+    padded ROI around those spots first and only falls back to the whole image on a miss.
+    Every `full_scan_every` visits a full search is forced to re-learn the locations.
+    """
+
+    def __init__(self, padding=12, full_scan_every=20):
+        self.padding = padding
+        self.full_scan_every = max(1, full_scan_every)
+        self.locations = {}  # game_tab_id -> {template_idx: (x, y, w, h)}
+        self.visits = {}
+
+    def search(self, game_tab_id, templates, image, match_func):
+        """
+        match_func(template, image) -> ((x, y), w, h, ...) or None, like detect_pattern
+        Returns (template_idx, match) with match location in image coordinates, or None
+        """
+        visit = self.visits.get(game_tab_id, 0) + 1
+        self.visits[game_tab_id] = visit
+        known = self.locations.get(game_tab_id, {})
+
+        if known and visit % self.full_scan_every != 0:
+            for idx, location in reversed(list(known.items())):
+                found = self._search_roi(templates[idx], image, location, match_func)
+                if found is not None:
+                    self._remember(game_tab_id, idx, found)
+                    return idx, found
+
+        # miss (or periodic rescan): search the whole image and re-learn
+        self.locations.pop(game_tab_id, None)
+        for idx, template in enumerate(templates):
+            if not self._fits(template, image):
+                continue
+            found = match_func(template, image)
+            if found is not None:
+                self._remember(game_tab_id, idx, found)
+                return idx, found
+        return None
+
+    def forget(self, game_tab_id):
+        self.locations.pop(game_tab_id, None)
+        self.visits.pop(game_tab_id, None)
+
+    def _remember(self, game_tab_id, idx, found):
+        (x, y), w, h = found[:3]
+        locations = self.locations.setdefault(game_tab_id, {})
+        # re-insert so the latest match is tried first next time
+        locations.pop(idx, None)
+        locations[idx] = (int(x), int(y), w, h)
+
+    def _search_roi(self, template, image, location, match_func):
+        x, y, w, h = location
+        x1, y1 = max(0, x - self.padding), max(0, y - self.padding)
+        x2, y2 = min(image.shape[1], x + w + self.padding), min(image.shape[0], y + h + self.padding)
+        roi = image[y1:y2, x1:x2]
+        if not self._fits(template, roi):
+            return None
+        found = match_func(template, roi)
+        if found is None:
+            return None
+        rx, ry = found[0]
+        return ((x1 + rx, y1 + ry),) + tuple(found[1:])
+
+    @staticmethod
+    def _fits(template, image):
+        return template.shape[0] <= image.shape[0] and template.shape[1] <= image.shape[1]
@@ -0,0 +1,179 @@
+import threading
+import time
+
+import pygetwindow
+import win32gui
+
+from app.log_factory import create_logger
+
+LOGGER = create_logger(name='WindowRegistry')
+
+
+class RegisteredWindow:
+    """
+    Top-level window as read by the last WindowRegistry refresh: hwnd, title and geometry are plain values,
+    reading them does not go back to the OS. Same attributes as the pygetwindow windows used before.
+    key identifies the window in the game_tab_ids: its title, unless another watched window had that title first.
+    """
+
+    def __init__(self, hwnd, title, rect):
+        self._hWnd = hwnd
+        self._native = None
+        self.title = title
+        self.key = title
+        self.left, self.top, self.width, self.height = self._geometry(rect)
+
+    @staticmethod
+    def _geometry(rect):
+        left, top, right, bottom = rect
+        return left, top, right - left, bottom - top
+
+    def update(self, title, rect) -> bool:
+        """
+        new snapshot values, returns True if the window moved or was resized
+        """
+        self.title = title
+        geometry = self._geometry(rect)
+        moved = geometry != (self.left, self.top, self.width, self.height)
+        self.left, self.top, self.width, self.height = geometry
+        return moved
+
+    def activate(self):
+        if self._native is None:
+            self._native = pygetwindow.Win32Window(self._hWnd)
+        self._native.activate()
+
+    def __repr__(self):
+        return f'RegisteredWindow({self._hWnd}, {self.title!r}, {self.left}, {self.top}, {self.width}x{self.height})'
+
+
+class WindowRegistry:
+    """
+    Windows whose title contains one of the watched patterns (game windows, crash reporter), shared by the
+    worker and the UI. refresh() re-reads title + geometry of the known hwnds only; the full top-level window
+    enumeration that finds new windows runs at most every enumerate_every_seconds (or with full=True).
+    Listeners get (event, window) for APPEARED / DISAPPEARED / MOVED, called on the refreshing thread.
+    """
+    APPEARED = "appeared"
+    DISAPPEARED = "disappeared"
+    MOVED = "moved"
+
+    def __init__(self, enumerate_every_seconds=5.0):
+        self.enumerate_every_seconds = enumerate_every_seconds
+        self._patterns = set()
+        self._windows = {}  # hwnd -> RegisteredWindow
+        self._listeners = []
+        self._lock = threading.RLock()
+        self._refreshed_at = 0.0
+        self._enumerated_at = 0.0
+
+    def watch(self, pattern: str):
+        with self._lock:
+            if pattern not in self._patterns:
+                self._patterns.add(pattern)
+                self._enumerated_at = 0.0  # windows of the new pattern are searched at the next refresh
+
+    def subscribe(self, listener):
+        with self._lock:
+            self._listeners.append(listener)
+
+    def windows(self, pattern: str) -> list:
+        """
+        snapshot of the known windows whose title contains pattern, in hwnd order
+        """
+        with self._lock:
+            return [w for hwnd, w in sorted(self._windows.items()) if pattern in w.title]
+
+    def _matches(self, title) -> bool:
+        return any(pattern in title for pattern in self._patterns)
+
+    @staticmethod
+    def _enumerate():
+        found = {}
+
+        def callback(hwnd, _):
+            if win32gui.IsWindowVisible(hwnd):
+                title = win32gui.GetWindowText(hwnd)
+                if title:
+                    found[hwnd] = title
+        win32gui.EnumWindows(callback, None)
+        return found
+
+    def _assign_key(self, window):
+        """
+        the title keeps the per-tab state of a re-created window; a second window with the same title
+        gets its own state instead of sharing the first one's
+        """
+        taken = {other.key for other in self._windows.values() if other is not window}
+        window.key = window.title if window.title not in taken else f'{window.title}#{window._hWnd}'
+
+    def refresh(self, full=False) -> list:
+        """
+        Update the snapshots, returns the (event, window) notifications sent to the listeners
+        """
+        now = time.monotonic()
+        events = []
+        with self._lock:
+            for hwnd, window in list(self._windows.items()):
+                try:
+                    if not win32gui.IsWindow(hwnd):
+                        raise OSError('closed')
+                    title = win32gui.GetWindowText(hwnd)
+                    if not self._matches(title):
+                        raise OSError('renamed')
+                    renamed = title != window.title
+                    if window.update(title, win32gui.GetWindowRect(hwnd)):
+                        events.append((self.MOVED, window))
+                    if renamed:
+                        self._assign_key(window)
+                except Exception:
+                    del self._windows[hwnd]
+                    events.append((self.DISAPPEARED, window))
+
+            if full or now - self._enumerated_at >= self.enumerate_every_seconds:
+                self._enumerated_at = now
+                for hwnd, title in self._enumerate().items():
+                    if hwnd in self._windows or not self._matches(title):
+                        continue
+                    try:
+                        window = RegisteredWindow(hwnd, title, win32gui.GetWindowRect(hwnd))
+                    except Exception:
+                        continue  # closed while enumerating
+                    self._assign_key(window)
+                    self._windows[hwnd] = window
+                    events.append((self.APPEARED, window))
+            self._refreshed_at = now
+            listeners = list(self._listeners)
+
+        for event, window in events:
+            LOGGER.info(f'Window {event}: {window}')
+            for listener in listeners:
+                try:
+                    listener(event, window)
+                except Exception as e:
+                    LOGGER.error(f'Window listener failed on {event} {window.title}: {e}', exc_info=True)
+        return events
+
+    def refresh_if_stale(self, max_age_seconds) -> list:
+        """
+        refresh only if nobody (e.g. the detection worker) did in the last max_age_seconds
+        """
+        if time.monotonic() - self._refreshed_at < max_age_seconds:
+            return []
+        return self.refresh()
+
+    def lookup(self, title: str) -> list:
+        """
+        One-off search of any window by title, for user actions (pattern creator); not watched
+        """
+        windows = []
+        for hwnd, window_title in self._enumerate().items():
+            if title in window_title:
+                try:
+                    windows.append(RegisteredWindow(hwnd, window_title, win32gui.GetWindowRect(hwnd)))
+                except Exception:
+                    continue
+        return windows
+
+
+WINDOW_REGISTRY = WindowRegistry()
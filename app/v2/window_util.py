@@ -1,7 +1,12 @@
 
-import time
 import pyautogui
 import pygetwindow
+import win32gui
+
+from app.log_factory import create_logger
+from app.v2.frame_wait import wait_until
+
+LOGGER = create_logger(name='WindowUtil')
 
 class WindowUtil:
     @staticmethod
@@ -16,17 +21,13 @@ class WindowUtil:
             all_windows = pygetwindow.getWindowsWithTitle(title)
 
             if all_windows:
-                detected_titles = [win.title for win in all_windows]
-                log_message = f"Detected {len(all_windows)} game windows: {', '.join(detected_titles)}"
-                print(f"Worker: {log_message}")
+                LOGGER.debug('Detected %s game windows: %s', len(all_windows), [win.title for win in all_windows])
                 return all_windows
             else:
-                log_message = f"No game windows found with title pattern: '{title}'"
-                print(f"Worker: {log_message}")
+                LOGGER.debug("No game windows found with title pattern: '%s'", title)
 
         except Exception as e:
-            log_message = f"Error finding windows: {e}"
-            print(f"Worker: {log_message}")
+            LOGGER.error('Error finding windows: %s', e)
             
     @staticmethod
     def send_trl_tab(window):
@@ -34,12 +35,20 @@ class WindowUtil:
         # time.sleep(0.1)
 
     @staticmethod
-    def focus(window):
+    def is_foreground(window) -> bool:
+        try:
+            return win32gui.GetForegroundWindow() == window._hWnd
+        except Exception:
+            return False
+
+    @staticmethod
+    def focus(window, timeout=1.0):
         try:
             window.activate()
-            time.sleep(1)
+            # return as soon as windows reports it in front instead of a fixed 1s sleep
+            wait_until(lambda: WindowUtil.is_foreground(window), timeout=timeout)
         except:
-            print(f'Failed to focus window: {window.title}')
+            LOGGER.warning('Failed to focus window: %s', window.title, exc_info=True, extra={'window': window.title})
 
     @staticmethod
     def screen_shot(window):
@@ -49,7 +58,7 @@ class WindowUtil:
                 ))
             return screenshot
         except:
-            print(f'Failed to screenshot window: {window.title}')
+            LOGGER.warning('Failed to screenshot window: %s', window.title, exc_info=True, extra={'window': window.title})
 
     @staticmethod
     def screen_shot_whole_screen():
@@ -57,7 +66,7 @@ class WindowUtil:
             screenshot = pyautogui.screenshot()
             return screenshot
         except:
-            print(f'Failed to screenshot whole screen')
+            LOGGER.warning('Failed to screenshot whole screen', exc_info=True)
 
     @staticmethod
     def get_hwnd(window):
@@ -75,7 +84,7 @@ class WindowUtil:
                 title = game_window.title
                 
             if debug_name:
-                print(f"===Debug: Checking {debug_name} for '{title}'...")
+                LOGGER.debug("===Debug: Checking %s for '%s'...", debug_name, title)
             
             try:
                 # Ensure the window is active before taking a screenshot for reliability
@@ -95,17 +104,18 @@ class WindowUtil:
 
                 if all_match:
                     if debug_name:
-                        print(f"Pixel check passed: {debug_name} at ({x},{y}), expected {expected_rgb}, got {actual_rgb}.")
+                        LOGGER.debug('Pixel check passed: %s at (%s,%s), expected %s, got %s.',
+                                     debug_name, x, y, expected_rgb, actual_rgb)
                 else:
                     if debug_name:
                         screen_x, screen_y = WindowUtil.to_screen_coord((x, y), game_window)
-                        print(f"screen coordinate: {debug_name} at ({screen_x},{screen_y}), expected {expected_rgb}, got {actual_rgb}.")
-                        print(f"Pixel check not match: {debug_name} at ({x},{y}), expected {expected_rgb}, got {actual_rgb}.")
+                        LOGGER.debug('Pixel check not match: %s at (%s,%s) - screen (%s,%s), expected %s, got %s.',
+                                     debug_name, x, y, screen_x, screen_y, expected_rgb, actual_rgb)
 
                 return all_match
 
             except Exception as e:
-                print(f"Worker: Error during {debug_name} detection for '{title}': {e}")
+                LOGGER.error("Error during %s detection for '%s': %s", debug_name, title, e, extra={'window': title})
                 return False
             
     @staticmethod
@@ -1,22 +1,26 @@
+import json
 import os
 import sys
+import time
+
+STARTUP_T0 = time.perf_counter() # before any heavy import, see benchmarks/startup_bench.py
+
 import win32api
 
 from PyQt6.QtCore import QThread, Qt, pyqtSignal, QTimer, QMetaObject, QSettings, QDateTime
 from PyQt6.QtGui import QCursor, QGuiApplication, QColor
 
 from PyQt6.QtWidgets import (
-    QApplication, QWidget, QPushButton, QHBoxLayout, QLabel
+    QApplication, QWidget, QPushButton, QHBoxLayout, QLabel, QMessageBox
 )
 
 from app.flow_layout import FlowLayout
-from app.game_scenario import CrashDialogScenario
 from app.log_factory import create_logger
-from app.pattern.create_pattern_dialog import PatternCreatorDialog
 from app.v2.base_app import BaseApp
-from app.v2.detection_worker_v2 import DetectionWorkerV2
+from app.v2.detection_config import ConfigError, DetectionConfig
 from app.v2.draggable_button import DraggableButton
-from app.v2.window_util import WindowUtil
+# cv2, pyautogui, pygetwindow, the scenarios/worker and the pattern creator UI are imported on first use
+# so the window shows up before they load
 
 # Disable Qt High DPI scaling
 os.environ["QT_AUTO_SCREEN_SCALE_FACTOR"] = "0"
@@ -30,11 +34,14 @@ WINDOW_W = 220
 WINDOW_H = 120
 START_POS_X = 10
 START_POS_Y = 10
+CRASH_REPORTER_TITLE = "MuMuPlayerCrashReporter"
 
 
 class AutoMainWindow(BaseApp):
     start_detection_signal = pyqtSignal()
     stop_detection_signal = pyqtSignal()
+    # emitted from whatever thread refreshed the window registry, handled on the UI thread
+    crash_window_appeared = pyqtSignal(object)
 
     def __init__(self):
         super().__init__()
@@ -42,13 +49,16 @@ class AutoMainWindow(BaseApp):
         self.running = False
         self._drag_pos = None  # For dragging window
         self.settings = QSettings("data/config_v2.ini", QSettings.Format.IniFormat)
-        self.INACTIVITY_DURATION = self.settings.value("Detection/InactivityDurationAutoStartSeconds", 60, type=int)
+        # parsed & validated once, a bad value fails here instead of on first use
+        self.config = DetectionConfig.load(self.settings)
+        self.INACTIVITY_DURATION = self.config.inactivity_auto_start_seconds
         self._last_mouse_pos = win32api.GetCursorPos()
         self._last_activity = QDateTime.currentDateTime() # app start is the user activity
         self.inactivity_timer = QTimer(self)
         self.inactivity_timer.timeout.connect(self.check_inactivity)
         self.inactivity_timer.start(10000)
 
+        self.crash_window_appeared.connect(self.resolve_crash_window)
         self.crash_report_timer = QTimer(self)
         self.crash_report_timer.timeout.connect(self.check_crash_report)
         self.crash_report_timer.start(60000)
@@ -57,9 +67,12 @@ class AutoMainWindow(BaseApp):
         self.mouse_timer.timeout.connect(self.update_mouse_position)
         self.mouse_timer.start(1000)
 
+        # startup benchmark: auto start, report time to window / first detection, then exit
+        self.startup_bench = os.environ.get('VLV_STARTUP_BENCH') == '1'
+        self.time_to_window = None
+        self.detect_worker = None
+
         self.init_ui()
-        
-        self.start_detect_worker()
     
     def init_ui(self):
 
@@ -148,24 +161,54 @@ class AutoMainWindow(BaseApp):
             self.running = True
             self.start_auto()
 
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.time_to_window is not None:
+            return
+        self.time_to_window = time.perf_counter() - STARTUP_T0
+        LOGGER.info(f"Window shown {self.time_to_window:.2f}s after start")
+        # heavy detection imports + scenario construction once the window is painted
+        QTimer.singleShot(0, self.start_detect_worker)
+
+    def watch_crash_reporter(self):
+        from app.v2.window_registry import WINDOW_REGISTRY
+        WINDOW_REGISTRY.watch(CRASH_REPORTER_TITLE)
+        WINDOW_REGISTRY.subscribe(self.on_window_event)
+
+    def on_window_event(self, event, window):
+        from app.v2.window_registry import WindowRegistry
+        if event == WindowRegistry.APPEARED and CRASH_REPORTER_TITLE in window.title:
+            self.crash_window_appeared.emit(window)
+
     def check_crash_report(self):
-        crash_title = "MuMuPlayerCrashReporter"
-        crash_windows = WindowUtil.find_game_windows(crash_title)
-        crash_window = None
-        if crash_windows is not None:
-            crash_window = crash_windows[0]
+        """
+        Crash dialogs still open after being closed once; new ones are handled when they appear
+        """
+        from app.v2.window_registry import WINDOW_REGISTRY, WindowRegistry
 
-        if crash_windows is not None:
-            crash_detector = CrashDialogScenario(self.settings, self)
-            crash_detector.resolve_crash(crash_window)
+        # the running worker refreshes the registry every tick, enumerate here only when it does not
+        appeared = [window for event, window in WINDOW_REGISTRY.refresh_if_stale(60) if event == WindowRegistry.APPEARED]
+        for crash_window in WINDOW_REGISTRY.windows(CRASH_REPORTER_TITLE):
+            if crash_window not in appeared:
+                self.resolve_crash_window(crash_window)
+
+    def resolve_crash_window(self, crash_window):
+        from app.game_scenario import CrashDialogScenario
+        crash_detector = CrashDialogScenario(self.config, self)
+        crash_detector.resolve_crash(crash_window)
 
     def on_show_pattern_creator_dialog(self):
+        from app.pattern.create_pattern_dialog import PatternCreatorDialog
         dlg = PatternCreatorDialog(self)
         dlg.exec()
     
     def start_detect_worker(self):
+        from app.v2.detection_worker_v2 import DetectionWorkerV2
+
+        self.watch_crash_reporter()
+
         self.thread = QThread()
-        self.detect_worker = DetectionWorkerV2(settings=self.settings)
+        self.detect_worker = DetectionWorkerV2(self.config)
         self.detect_worker.moveToThread(self.thread)
 
         # Ensure setup runs inside the worker thread
@@ -178,6 +221,29 @@ class AutoMainWindow(BaseApp):
         self.stop_detection_signal.connect(self.detect_worker.stop)
         
         self.thread.start()
+        LOGGER.info(f"Detection worker ready {time.perf_counter() - STARTUP_T0:.2f}s after start")
+
+        if self.startup_bench:
+            self.running = True
+            self.start_auto()
+            self.bench_timer = QTimer(self)
+            self.bench_timer.timeout.connect(self.check_startup_bench)
+            self.bench_timer.start(50)
+
+    def check_startup_bench(self):
+        worker = self.detect_worker
+        if not worker.started:
+            return
+        if worker.first_detection_at is None and worker.game_windows:
+            return # first detection still running
+        first_detection = worker.first_detection_at - STARTUP_T0 if worker.first_detection_at else None
+        print("STARTUP_BENCH " + json.dumps({
+            "time_to_window": round(self.time_to_window, 3),
+            "time_to_first_detection": round(first_detection, 3) if first_detection else None,
+            "game_windows": len(worker.game_windows or []),
+        }), flush=True)
+        self.bench_timer.stop()
+        self.close()
 
     def update_mouse_position(self):
         """
@@ -247,6 +313,10 @@ class AutoMainWindow(BaseApp):
     def closeEvent(self, event):
         LOGGER.info("Closing window...")
         self.stop_detection_signal.emit()
+        if self.detect_worker is None:
+            event.accept()
+            QApplication.quit()
+            return
 
         try:
             QMetaObject.invokeMethod(self.detect_worker, "cleanup", Qt.ConnectionType.BlockingQueuedConnection)
@@ -264,6 +334,11 @@ class AutoMainWindow(BaseApp):
 if __name__ == "__main__":
     AutoMainWindow.ensure_data_dir_exists()
     app = QApplication(sys.argv)
-    window = AutoMainWindow()
+    try:
+        window = AutoMainWindow()
+    except ConfigError as e:
+        LOGGER.error(str(e))
+        QMessageBox.critical(None, "vlv v2", str(e))
+        sys.exit(1)
     window.show()
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,169 @@
+"""
+Offline detection micro-benchmarks over the bundled images (no window, no input).
+
+    python -m benchmarks.detection_bench [--config data/config_v2.ini] [--seconds 1] [--output report.json]
+                                         [--baseline previous.json] [--tolerance 0.2]
+
+Each benchmark reports ops/sec, p50/p99 latency (microseconds) and peak bytes allocated per call
+(tracemalloc, measured in a separate pass so tracing does not skew timings). With --baseline, benchmarks
+whose ops/sec dropped more than --tolerance are listed and the exit code is 1.
+"""
+import argparse
+import glob
+import json
+import platform
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from app.detect_game_widget import detect_pattern, get_masked_image, read_image_file
+from app.v2.capture_backend import ReplayCaptureBackend
+from app.v2.detection_config import DetectionConfig
+from app.v2.frame import Frame, ScratchBuffers
+from app.v2.session_replay import ReplayWindow, SessionReplay
+from app.v2.window_util import WindowUtil
+
+GAME_TABS = 'images/game_tabs'
+BLUESTACK_SMALLMAP = 'images/input/bluestack/vlv-duongchau-smallmap-truecolor-1.png'
+TOWN_TEMPLATE = 'data/img/town/DuongChau-sm1.png'
+
+
+def measure(func, seconds=1.0, min_runs=20, alloc_runs=10) -> dict:
+    func()  # warm up caches / lazy imports
+    durations = []
+    deadline = time.perf_counter() + seconds
+    while len(durations) < min_runs or time.perf_counter() < deadline:
+        start = time.perf_counter_ns()
+        func()
+        durations.append(time.perf_counter_ns() - start)
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(alloc_runs):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+    finally:
+        tracemalloc.stop()
+
+    durations = np.array(durations)
+    return {
+        "runs": len(durations),
+        "ops_per_sec": round(1e9 / durations.mean(), 1),
+        "p50_us": round(float(np.percentile(durations, 50)) / 1000, 1),
+        "p99_us": round(float(np.percentile(durations, 99)) / 1000, 1),
+        "peak_alloc_bytes": int(np.median(peaks)),
+    }
+
+
+class DetectionBench:
+    def __init__(self, config: DetectionConfig):
+        self.harness = SessionReplay(config)
+        self.tab_images = [cv2.imread(path, cv2.IMREAD_UNCHANGED)
+                           for path in sorted(glob.glob(f'{GAME_TABS}/*.png'))]
+        self.tab_image = self.tab_images[0]
+        height, width = self.tab_image.shape[:2]
+        self.window = ReplayWindow('bench', 1, width, height)
+        self.pil_image = Image.fromarray(cv2.cvtColor(self.tab_image, cv2.COLOR_BGRA2RGB))
+        self.smallmap = read_image_file(BLUESTACK_SMALLMAP)
+        self.town_template = read_image_file(TOWN_TEMPLATE)
+        scenario = next(s for s in self.harness.get_game_scenarios() if hasattr(s, 'town_tracker'))
+        self.lower, self.upper = scenario.lower_color_range, scenario.upper_color_range
+        self.masked_template = get_masked_image(self.town_template, self.lower, self.upper)
+        self.town_region = scenario.town_region
+        # steady state: frames of one window share their conversion buffers
+        self.scratch = ScratchBuffers()
+        self.main_points = self.harness.game_window_main_points
+
+    def benchmarks(self) -> dict:
+        benches = {
+            "check_pixel_pattern": lambda: WindowUtil.check_pixel_pattern(None, self.pil_image, self.main_points),
+            "pixel_detector_match": lambda: self.harness.pixel_detector.match(self.tab_image),
+            "get_masked_image": lambda: get_masked_image(self.smallmap, self.lower, self.upper),
+            "detect_pattern": lambda: detect_pattern(self.masked_template, self.smallmap, self.lower, self.upper),
+            "frame_masked_region": lambda: Frame(self.tab_image, self.scratch).masked(self.lower, self.upper,
+                                                                                      region=self.town_region),
+        }
+        for scenario in self.harness.get_game_scenarios():
+            benches[f"scenario.{type(scenario).__name__}"] = self._scenario_bench(scenario)
+            if hasattr(scenario, 'town_tracker'):
+                # unchanged town region pixels: the result of the previous visit is reused
+                benches[f"scenario.{type(scenario).__name__}.cache_hit"] = self._scenario_bench(scenario, cold=False)
+        benches["tab_cycle"] = self._tab_cycle_bench()
+        return benches
+
+    def _scenario_bench(self, scenario, cold=True):
+        collector = self.harness._action_collector
+
+        def run():
+            # fresh frame: nothing memoized from the previous call; actions collected, never executed
+            if cold:
+                scenario.detect_cache.clear()  # same pixels every run: time the detection, not the cache
+            collector.actions = []
+            scenario.detect_and_solve(self.window, Frame(self.tab_image, self.scratch), 'bench__0')
+            collector.actions = None
+        return run
+
+    def _tab_cycle_bench(self):
+        backend = ReplayCaptureBackend(GAME_TABS)
+
+        def run():
+            for scenario in self.harness.get_game_scenarios():
+                scenario.detect_cache.clear()
+            for idx in range(len(backend.files)):
+                self.harness.analyze_tab(self.window, backend.grab(self.window), f'bench__{idx}')
+        return run
+
+    def run(self, seconds=1.0) -> dict:
+        return {name: measure(func, seconds) for name, func in self.benchmarks().items()}
+
+
+def regressions(report, baseline, tolerance) -> list:
+    slower = []
+    for name, result in report["benchmarks"].items():
+        previous = baseline.get("benchmarks", {}).get(name)
+        if previous and result["ops_per_sec"] < previous["ops_per_sec"] * (1 - tolerance):
+            slower.append({"benchmark": name, "baseline_ops_per_sec": previous["ops_per_sec"],
+                           "ops_per_sec": result["ops_per_sec"]})
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline detection micro-benchmarks')
+    parser.add_argument('--config', default='data/config_v2.ini')
+    parser.add_argument('--seconds', type=float, default=1.0, help='timing duration per benchmark')
+    parser.add_argument('--output', help='write the json report to this file')
+    parser.add_argument('--baseline', help='json report of a previous release to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed ops/sec drop vs baseline')
+    args = parser.parse_args()
+
+    config = DetectionConfig.from_file(args.config)
+    report = {
+        "created": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "benchmarks": DetectionBench(config).run(args.seconds),
+    }
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            report["regressions"] = regressions(report, json.load(f), args.tolerance)
+        exit_code = 1 if report["regressions"] else 0
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
+    return exit_code
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,84 @@
+"""
+Startup time of the v2 tool: time-to-window and time-to-first-detection (seconds since the first line of
+autov2_main.py), plus the cold import cost of the heavy modules that are loaded lazily.
+
+    python -m benchmarks.startup_bench [--runs 5] [--command "dist/vlv_v2.exe"] [--output report.json]
+
+The app runs with VLV_STARTUP_BENCH=1: it starts detection by itself, prints one STARTUP_BENCH json line
+after the first detection (right away when no game window is open) and exits.
+time_to_first_detection is null when no game window was found.
+"""
+import argparse
+import json
+import os
+import platform
+import shlex
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ('cv2', 'numpy', 'pyautogui', 'pygetwindow', 'win32gui', 'mss',
+                 'app.game_scenario', 'app.v2.detection_worker_v2', 'app.pattern.create_pattern_dialog')
+
+
+def run_app(command, timeout) -> dict:
+    env = dict(os.environ, VLV_STARTUP_BENCH='1')
+    start = time.perf_counter()
+    completed = subprocess.run(command, env=env, capture_output=True, text=True, encoding='utf-8',
+                               errors='replace', timeout=timeout)
+    process_seconds = time.perf_counter() - start
+    for line in completed.stdout.splitlines():
+        if line.startswith('STARTUP_BENCH '):
+            result = json.loads(line[len('STARTUP_BENCH '):])
+            result["process_seconds"] = round(process_seconds, 3)
+            return result
+    raise RuntimeError(f'No STARTUP_BENCH line (exit code {completed.returncode}):\n{completed.stderr[-2000:]}')
+
+
+def import_seconds(module) -> float:
+    """
+    cold import in a fresh interpreter, minus the interpreter startup itself
+    """
+    def timed(code):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], capture_output=True, check=False)
+        return time.perf_counter() - start
+    return round(max(0.0, timed(f'import {module}') - timed('pass')), 3)
+
+
+def median(values):
+    values = sorted(v for v in values if v is not None)
+    return values[len(values) // 2] if values else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Startup time benchmark')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--command', help='app command line, default: this python + autov2_main.py')
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--skip-imports', action='store_true', help='do not measure module import costs')
+    parser.add_argument('--output', help='write the json report to this file')
+    args = parser.parse_args()
+
+    command = shlex.split(args.command) if args.command else [sys.executable, 'autov2_main.py']
+    runs = [run_app(command, args.timeout) for _ in range(args.runs)]
+    report = {
+        "created": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "python": platform.python_version(),
+        "command": command,
+        "runs": runs,
+        "median": {key: median([run[key] for run in runs])
+                   for key in ('time_to_window', 'time_to_first_detection', 'process_seconds')},
+    }
+    if not args.skip_imports:
+        report["import_seconds"] = {module: import_seconds(module) for module in HEAVY_MODULES}
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+from unittest import TestCase
+
+from app.v2.capture_backend import ReplayCaptureBackend, merge_regions
+from app.v2.frame_wait import FrameWaiter
+
+
+class FakeWindow:
+    left, top, width, height, _hWnd, title = 0, 0, 776, 466, 1, "MuMu"
+
+
+class ReplayCaptureBackendTests(TestCase):
+    def setUp(self):
+        self.backend = ReplayCaptureBackend('images/game_tabs')
+
+    def test_frames_replayed_in_order_and_looped(self):
+        shapes = [self.backend.grab(FakeWindow()).shape for _ in range(len(self.backend.files) + 1)]
+        self.assertEqual(self.backend.position, 1)
+        self.assertTrue(all(shape[2] == 4 for shape in shapes))
+
+    def test_frame_waiter_reads_region_of_current_frame(self):
+        waiter = FrameWaiter((0, 0, 100, 40), self.backend)
+        self.backend.grab(FakeWindow())
+        first = waiter.signature(FakeWindow())
+        self.assertIsNotNone(first)
+        self.assertEqual(first, waiter.signature(FakeWindow()))
+
+
+class MergeRegionsTests(TestCase):
+    def test_close_regions_merged(self):
+        self.assertEqual(merge_regions([(0, 0, 1, 1), (5, 5, 1, 1), (200, 200, 1, 1)], gap=16),
+                         [(0, 0, 6, 6), (200, 200, 1, 1)])
@@ -0,0 +1,7 @@
+import os
+import tempfile
+
+from app.log_factory import LOG_DIR_ENV
+
+# loggers are created when app modules are imported: keep the test run logs out of log/
+os.environ.setdefault(LOG_DIR_ENV, tempfile.mkdtemp(prefix='vlvauto-test-log-'))
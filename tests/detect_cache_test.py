@@ -0,0 +1,38 @@
+from unittest import TestCase
+
+import numpy as np
+
+from app.game_scenario import GameScenario
+from app.v2.frame import Frame
+
+
+class CachedDetectTests(TestCase):
+    def setUp(self):
+        self.scenario = GameScenario(None, None)
+        self.calls = 0
+
+    def detect(self, frame):
+        self.calls += 1
+        return frame.bgr((0, 0, 4, 4)).sum()
+
+    def frame(self, value, corner=0):
+        bgra = np.zeros((20, 20, 4), dtype=np.uint8)
+        bgra[:4, :4] = value
+        bgra[19, 19] = corner
+        return Frame(bgra)
+
+    def test_result_reused_while_region_unchanged(self):
+        region = [(0, 0, 4, 4)]
+        first = self.scenario.cached_detect(self.frame(5), 'tab__0', self.detect, regions=region)
+        # pixels outside the read region do not invalidate the result
+        second = self.scenario.cached_detect(self.frame(5, corner=9), 'tab__0', self.detect, regions=region)
+        self.assertEqual(first, second)
+        self.assertEqual(self.calls, 1)
+
+        self.scenario.cached_detect(self.frame(6), 'tab__0', self.detect, regions=region)
+        self.assertEqual(self.calls, 2)
+
+    def test_cache_is_per_tab(self):
+        self.scenario.cached_detect(self.frame(5), 'tab__0', self.detect, regions=None)
+        self.scenario.cached_detect(self.frame(5), 'tab__1', self.detect, regions=None)
+        self.assertEqual(self.calls, 2)
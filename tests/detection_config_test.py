@@ -0,0 +1,53 @@
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase
+
+from app.v2.detection_config import ConfigError, DetectionConfig
+
+
+class DetectionConfigTests(TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, 'config_v2.ini')
+        shutil.copy('data/config_v2.ini', self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def write(self, replacements):
+        with open(self.path, encoding='utf-8') as f:
+            text = f.read()
+        for old, new in replacements.items():
+            text = text.replace(old, new)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def test_bundled_config_parsed_once_into_typed_values(self):
+        config = DetectionConfig.from_file(self.path)
+        self.assertEqual(config.game_auto_button_point, (668, 116))
+        self.assertEqual(config.main_tab_point, (39, 26))
+        self.assertEqual(config.login_points[0], (263, 372))
+        self.assertEqual(config.town_stuck_region, (640, 30, 136, 60))
+        self.assertEqual(config.town_lower_color_range.tolist(), [38, 206, 0])
+        self.assertTrue(config.sparse_capture)
+
+    def test_every_invalid_value_reported(self):
+        self.write({'CheckInterval=10': 'CheckInterval=ten',
+                    'LoginPoints="((263, 372),(293, 224),(159, 317),(341, 317))"': 'LoginPoints="((263, 372),)"',
+                    'CaptureBackend=mss': 'CaptureBackend=gdi'})
+        with self.assertRaises(ConfigError) as raised:
+            DetectionConfig.from_file(self.path)
+        message = str(raised.exception)
+        for key in ('CheckInterval', 'LoginPoints', 'CaptureBackend'):
+            self.assertIn(key, message)
+
+    def test_stale_after_file_modified(self):
+        config = DetectionConfig.from_file(self.path)
+        self.assertFalse(config.is_stale())
+        time.sleep(0.01)
+        self.write({'CheckInterval=10': 'CheckInterval=20'})
+        os.utime(self.path, (time.time() + 1, time.time() + 1))
+        self.assertTrue(config.is_stale())
+        self.assertEqual(DetectionConfig.from_file(self.path).check_interval_seconds, 20)
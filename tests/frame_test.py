@@ -0,0 +1,34 @@
+from unittest import TestCase
+
+import numpy as np
+
+from app.v2.frame import Frame, ScratchBuffers
+from app.v2.pixel_pattern import PixelPatternDetector
+
+
+class FrameScratchTests(TestCase):
+    def test_views_written_into_window_buffers(self):
+        rng = np.random.default_rng(0)
+        bgra = rng.integers(0, 256, (40, 60, 4), dtype=np.uint8)
+        lower, upper = np.array([53, 53, 8]), np.array([71, 255, 255])
+        region = (10, 5, 30, 20)
+        expected = Frame(bgra).masked(lower, upper, region=region).copy()
+
+        scratch = ScratchBuffers()
+        first = Frame(bgra, scratch).masked(lower, upper, region=region)
+        second = Frame(bgra.copy(), scratch).masked(lower, upper, region=region)
+        np.testing.assert_array_equal(second, expected)
+        # the next frame of the window reuses the memory of the previous one
+        self.assertTrue(np.shares_memory(first, second))
+
+    def test_pattern_mask_per_detector(self):
+        bgra = np.zeros((4, 4, 4), dtype=np.uint8)
+        frame = Frame(bgra)
+        masks = []
+        for point in ((0, 0, 0, 0, 0), (0, 0, 255, 255, 255)):
+            # the replaced detector is released before the next one is built, as on a config reload
+            detector = PixelPatternDetector()
+            detector.add_pattern('main', [point])
+            masks.append(frame.pattern_mask(detector))
+            del detector
+        self.assertEqual(masks, [1, 0])
@@ -0,0 +1,44 @@
+import time
+from unittest import TestCase
+
+from app.v2.input_executor import InputExecutor, InputStep
+
+
+class InputExecutorTests(TestCase):
+    def setUp(self):
+        self.executor = InputExecutor()
+        self.log = []
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_other_input_runs_between_timed_steps(self):
+        login = self.executor.submit([
+            InputStep(0, self.log.append, ("login",)),
+            InputStep(0.3, self.log.append, ("server",)),
+        ], hwnd=1)
+        time.sleep(0.05)
+
+        self.executor.run(self.log.append, "other window click").result(timeout=1)
+        self.assertEqual(self.log, ["login", "other window click"])
+        self.assertTrue(self.executor.is_busy(1))
+
+        login.result(timeout=1)
+        self.assertEqual(self.log, ["login", "other window click", "server"])
+        self.assertFalse(self.executor.is_busy(1))
+
+    def test_single_steps_run_in_submit_order(self):
+        futures = [self.executor.run(self.log.append, i) for i in range(5)]
+        for future in futures:
+            future.result(timeout=1)
+        self.assertEqual(self.log, [0, 1, 2, 3, 4])
+
+    def test_failed_step_abandons_sequence_and_releases_window(self):
+        def fail():
+            raise RuntimeError("click failed")
+
+        future = self.executor.submit([InputStep(0, fail), InputStep(0, self.log.append, ("never",))], hwnd=2)
+        with self.assertRaises(RuntimeError):
+            future.result(timeout=1)
+        self.assertEqual(self.log, [])
+        self.assertFalse(self.executor.is_busy(2))
@@ -0,0 +1,51 @@
+import json
+import logging
+import queue
+from unittest import TestCase
+
+from app.log_factory import JsonLinesFormatter, RepeatSuppressingListener
+
+
+class _Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(self.format(record))
+
+
+def _record(msg, *args, **extra):
+    record = logging.LogRecord('test', logging.INFO, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class RepeatSuppressingListenerTests(TestCase):
+    def test_repeats_dropped_and_counted(self):
+        handler = _Collect()
+        listener = RepeatSuppressingListener(queue.SimpleQueue(), handler, window_seconds=60)
+        for _ in range(4):
+            listener.handle(_record('Login waiting: %s', 'A__1'))
+        listener.handle(_record('Login waiting: %s', 'A__2'))
+        self.assertEqual(handler.messages, ['Login waiting: A__1', 'Login waiting: A__2'])
+
+        listener.window_seconds = 0  # window over: dropped count reported before the next message
+        listener.handle(_record('Login waiting: %s', 'A__1'))
+        self.assertEqual(handler.messages[2:], ['Login waiting: A__1 (repeated 3 more times in the last 0s)',
+                                                'Login waiting: A__1'])
+
+    def test_errors_and_tracebacks_never_dropped(self):
+        handler = _Collect()
+        listener = RepeatSuppressingListener(queue.SimpleQueue(), handler, window_seconds=60)
+        for _ in range(2):
+            listener.handle(_record('Capture failed: %s', 'A', levelno=logging.ERROR, levelname='ERROR'))
+            listener.handle(_record('Focus failed: %s', 'A', exc_text='Traceback ...'))
+        self.assertEqual(handler.messages, ['Capture failed: A', 'Focus failed: A\nTraceback ...'] * 2)
+
+    def test_json_line_has_extra_fields(self):
+        line = JsonLinesFormatter().format(_record('Execute %s', 'login', game_tab_id='A__1', scenario='Login'))
+        event = json.loads(line)
+        self.assertEqual(event['msg'], 'Execute login')
+        self.assertEqual(event['game_tab_id'], 'A__1')
+        self.assertEqual(event['scenario'], 'Login')
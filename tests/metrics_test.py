@@ -0,0 +1,48 @@
+import os
+import tempfile
+import urllib.request
+from unittest import TestCase
+
+from app.v2.metrics import MetricsRegistry
+
+
+class MetricsRegistryTests(TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry(max_series=2)
+
+    def test_prometheus_text(self):
+        detections = self.registry.counter('detections_total', 'Detections', ('scenario',))
+        detections.inc(scenario='TownStuck')
+        detections.inc(2, scenario='TownStuck')
+        cycle = self.registry.histogram('cycle_seconds', 'Cycle', buckets=(1, 5))
+        for seconds in (0.5, 3, 7):
+            cycle.observe(seconds)
+        self.registry.gauge('tab_seconds_since_check', 'Staleness', ('game_tab_id',),
+                            collect=lambda: {('A1__1',): 12.5})
+
+        text = self.registry.render()
+        self.assertIn('# TYPE detections_total counter\ndetections_total{scenario="TownStuck"} 3\n', text)
+        self.assertIn('cycle_seconds_bucket{le="1"} 1\n', text)
+        self.assertIn('cycle_seconds_bucket{le="5"} 2\n', text)
+        self.assertIn('cycle_seconds_bucket{le="+Inf"} 3\n', text)
+        self.assertIn('cycle_seconds_sum 10.5\ncycle_seconds_count 3\n', text)
+        self.assertIn('tab_seconds_since_check{game_tab_id="A1__1"} 12.5\n', text)
+
+    def test_series_bounded(self):
+        captures = self.registry.counter('capture_failures_total', 'Failures', ('window',))
+        for window in ('A1', 'A2', 'A3'):
+            captures.inc(window=window)
+        self.assertNotIn('A3', self.registry.render())
+
+    def test_served_and_written(self):
+        self.registry.counter('cycles_total', 'Cycles').inc()
+        self.registry.serve(0)
+        self.addCleanup(self.registry.stop)
+        port = self.registry._server.server_port
+        with urllib.request.urlopen(f'http://127.0.0.1:{port}/metrics', timeout=5) as response:
+            self.assertIn('cycles_total 1', response.read().decode('utf-8'))
+
+        path = os.path.join(tempfile.mkdtemp(), 'vlvauto.prom')
+        self.registry.write(path)
+        with open(path, encoding='utf-8') as f:
+            self.assertEqual(f.read(), self.registry.render())
@@ -0,0 +1,44 @@
+from unittest import TestCase
+
+import numpy as np
+from PIL import Image
+
+from app.v2.pixel_pattern import PixelPatternDetector
+
+
+class PixelPatternDetectorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.screenshot = Image.open("images/game_tabs/screenshot-1.png").convert("RGB")
+
+    def points_from_screenshot(self, coords, shift=0):
+        return tuple((x, y, *[min(255, c + shift) for c in self.screenshot.getpixel((x, y))]) for x, y in coords)
+
+    def test_match_returns_bitmask_of_matched_patterns(self):
+        detector = PixelPatternDetector()
+        detector.add_pattern("exact", self.points_from_screenshot([(100, 127), (106, 129), (109, 136)]))
+        detector.add_pattern("within_tolerance", self.points_from_screenshot([(10, 10), (500, 300)], shift=3), color_tolerance=5)
+        detector.add_pattern("out_of_tolerance", self.points_from_screenshot([(20, 20), (600, 400)], shift=40), color_tolerance=5)
+        detector.add_pattern("outside_frame", ((5000, 10, 0, 0, 0),))
+        detector.compile()
+
+        mask = detector.match(self.screenshot)
+
+        self.assertEqual(detector.matched_names(mask), ["exact", "within_tolerance"])
+        self.assertTrue(detector.is_match(mask, "exact"))
+        self.assertFalse(detector.is_match(mask, "outside_frame"))
+
+    def test_bgra_array_matches_same_as_pil_image(self):
+        detector = PixelPatternDetector()
+        detector.add_pattern("exact", self.points_from_screenshot([(300, 200), (700, 50)]))
+        rgb = np.asarray(self.screenshot)
+        bgra = np.dstack([rgb[:, :, ::-1], np.full(rgb.shape[:2], 255, dtype=np.uint8)])
+
+        self.assertEqual(detector.match(self.screenshot), detector.match(bgra))
+        self.assertEqual(detector.match(bgra), detector.bit("exact"))
+
+    def test_duplicate_pattern_name_is_rejected(self):
+        detector = PixelPatternDetector()
+        detector.add_pattern("main", ((1, 1, 0, 0, 0),))
+        with self.assertRaises(ValueError):
+            detector.add_pattern("main", ((1, 1, 0, 0, 0),))
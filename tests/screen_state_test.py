@@ -0,0 +1,38 @@
+from unittest import TestCase
+
+import numpy as np
+
+from app.v2.frame import Frame
+from app.v2.pixel_pattern import PixelPatternDetector
+from app.v2.screen_state import ScreenState, ScreenStateClassifier
+
+
+class ScreenStateClassifierTests(TestCase):
+    def setUp(self):
+        self.detector = PixelPatternDetector()
+        self.detector.add_pattern("login", ((10, 10, 200, 0, 0),))
+        self.detector.add_pattern("warn", ((20, 20, 0, 200, 0),))
+        self.detector.add_pattern("auto_on", ((30, 30, 0, 0, 200),))
+        self.detector.compile()
+        self.classifier = ScreenStateClassifier(self.detector, [
+            (ScreenState.WARNING_DIALOG, ("warn",)),
+            (ScreenState.LOGIN, ("login",)),
+            (ScreenState.IN_GAME, ("auto_on",)),
+        ])
+
+    def frame(self, *pixels):
+        rgb = np.zeros((40, 40, 3), dtype=np.uint8)
+        for x, y, color in pixels:
+            rgb[y, x] = color
+        return Frame(rgb)
+
+    def test_state_of_matched_pattern(self):
+        self.assertEqual(self.classifier.classify(self.frame((10, 10, (200, 0, 0)))), ScreenState.LOGIN)
+        self.assertEqual(self.classifier.classify(self.frame((30, 30, (0, 0, 200)))), ScreenState.IN_GAME)
+
+    def test_dialog_over_login_screen_wins_by_priority(self):
+        frame = self.frame((10, 10, (200, 0, 0)), (20, 20, (0, 200, 0)))
+        self.assertEqual(self.classifier.classify(frame), ScreenState.WARNING_DIALOG)
+
+    def test_unrecognized_screen_is_unknown(self):
+        self.assertEqual(self.classifier.classify(self.frame()), ScreenState.UNKNOWN)
@@ -0,0 +1,49 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from app.v2.frame import Frame
+from app.v2.session_recorder import SessionArchive, SessionRecorder
+
+
+class FakeWindow:
+    left, top, width, height, _hWnd, title = 0, 0, 8, 4, 42, "MuMu"
+
+
+class SessionRecorderTests(TestCase):
+    def test_recorded_frames_read_back_with_decisions(self):
+        bgra = np.random.randint(0, 255, (4, 8, 4), dtype=np.uint8)
+        rgb = np.random.randint(0, 255, (4, 8, 3), dtype=np.uint8)
+        with tempfile.TemporaryDirectory() as folder:
+            recorder = SessionRecorder(folder)
+            recorder.record(FakeWindow(), Frame(bgra), "42__MuMu__1", ["close_medicine_bag"], 5)
+            recorder.record(FakeWindow(), Frame(rgb), "42__MuMu__2", [], 0)
+            recorder.close()
+
+            archive = SessionArchive(folder)
+            self.assertEqual(len(archive), 2)
+            first, second = list(archive)
+            self.assertEqual(first.game_tab_id, "42__MuMu__1")
+            self.assertEqual(first.actions, ["close_medicine_bag"])
+            self.assertEqual(first.pattern_mask, 5)
+            self.assertEqual(first.window["hwnd"], 42)
+            np.testing.assert_array_equal(first.frame.raw, bgra)
+            np.testing.assert_array_equal(second.frame.rgb(), rgb)
+            del archive, first, second  # release the memmap before the folder is removed
+
+    def test_uncompressed_session_still_read(self):
+        bgra = np.random.randint(0, 255, (4, 8, 4), dtype=np.uint8)
+        with tempfile.TemporaryDirectory() as folder:
+            with open(os.path.join(folder, 'frames.bin'), 'wb') as f:
+                f.write(bgra.tobytes())
+            entry = {"t": 1.0, "tab": "42__MuMu__1", "window": {}, "offset": 0, "shape": [4, 8, 4], "mask": 0,
+                     "actions": []}
+            with open(os.path.join(folder, 'index.jsonl'), 'w', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + '\n')
+
+            archive = SessionArchive(folder)
+            np.testing.assert_array_equal(archive[0].frame.raw, bgra)
+            del archive
@@ -0,0 +1,19 @@
+import time
+from unittest import TestCase
+
+from app.v2.stage_timer import StageTimer
+
+
+class StageTimerTests(TestCase):
+    def test_spans_aggregated_per_stage_and_window(self):
+        timer = StageTimer(window_size=3)
+        for _ in range(5):
+            with timer.span('capture', 'A1'):
+                time.sleep(0.001)
+        timer.record('capture', 0.5, 'A2')
+
+        stats = timer.snapshot()['capture']
+        self.assertEqual(stats['count'], 6)
+        self.assertEqual(stats['max_ms'], 500.0) # rolling window keeps the last 3 spans only
+        self.assertEqual(set(stats['windows']), {'A1', 'A2'})
+        self.assertIn('capture', timer.report())
@@ -0,0 +1,55 @@
+import threading
+from types import SimpleNamespace
+from unittest import TestCase
+
+from app.v2.detection_config import DetectionConfig
+from app.v2.game_tab_iterate import ResolveAction
+from app.v2.session_replay import ReplayWindow, SessionReplay
+from app.v2.tab_scheduler import TabScheduler
+
+
+class PipelinedTabWalkTests(TestCase):
+    """
+    Ring of the main tab + 3 game tabs, every tab healthy at its last visit: each one is analysed on the
+    analysis thread while switching to the next tab
+    """
+
+    def setUp(self):
+        self.walk = SessionReplay(DetectionConfig.from_file('data/config_v2.ini'))
+        self.walk.pipeline_enabled = True
+        self.walk.tab_dwell_seconds = 0
+        self.walk.is_running = lambda: True
+        self.window = ReplayWindow('w', 1, 10, 10)
+        self.shown = 1
+        self.events = []
+        self.walk.tab_registry.rings[1] = ['f0', 'f1', 'f2', 'f3']
+        self.walk.frame_waiter = SimpleNamespace(signature=lambda window: f'f{self.shown}')
+        self.walk.switch_tab = self.switch_tab
+        self.walk.capture = lambda window: SimpleNamespace(position=self.shown)
+        self.walk.is_main_window = lambda window, frame: False
+        self.walk.check_game_exit = lambda hwnd, window: None
+        self.walk.analyze_tab = self.analyze_tab
+        for position in (1, 2, 3):
+            self.walk.tab_scheduler.visited(f'w__{position}', TabScheduler.HEALTHY)
+        self.walk.start_pipeline()
+        self.addCleanup(self.walk.stop_pipeline)
+
+    def switch_tab(self, window):
+        self.shown = (self.shown + 1) % 4
+        self.events.append(('switch', self.shown))
+
+    def analyze_tab(self, window, frame, game_tab_id):
+        self.events.append(('analyze', game_tab_id, threading.current_thread().name))
+        if game_tab_id != 'w__2':
+            return []
+        return [ResolveAction('close', window, lambda: self.events.append(('click', game_tab_id, self.shown)))]
+
+    def test_late_actions_run_back_on_their_tab(self):
+        self.walk.iterate_known_tabs(self.window, 1)
+
+        analysed = [event for event in self.events if event[0] == 'analyze']
+        self.assertEqual([event[1] for event in analysed], ['w__1', 'w__2', 'w__3'])
+        # the last due tab is not switched away from: analysed on the input thread
+        self.assertEqual([event[2] for event in analysed], ['TabAnalysis', 'TabAnalysis', 'MainThread'])
+        clicks = [event for event in self.events if event[0] == 'click']
+        self.assertEqual(clicks, [('click', 'w__2', 2)])
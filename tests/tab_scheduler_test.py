@@ -0,0 +1,32 @@
+from unittest import TestCase
+
+from app.v2.tab_scheduler import TabScheduler
+
+
+class TabSchedulerTests(TestCase):
+    def setUp(self):
+        self.scheduler = TabScheduler(base_interval=10, min_interval=2, max_staleness=50)
+
+    def test_unknown_tab_due_with_attention(self):
+        self.assertTrue(self.scheduler.is_due('tab__1', now=0))
+        self.assertEqual(self.scheduler.priority('tab__1'), TabScheduler.ATTENTION)
+
+    def test_healthy_tab_backs_off_up_to_max_staleness(self):
+        now = 0
+        intervals = []
+        for _ in range(5):
+            self.scheduler.visited('tab__1', TabScheduler.HEALTHY, now=now)
+            due = self.scheduler.overdue_seconds(now=now)['tab__1']
+            intervals.append(-due)
+            self.assertFalse(self.scheduler.is_due('tab__1', now=now - due - 0.1))
+            now -= due
+        self.assertEqual(intervals, [10, 20, 40, 50, 50])
+
+    def test_anomaly_revisited_sooner_and_resets_backoff(self):
+        self.scheduler.visited('tab__1', TabScheduler.HEALTHY, now=0)
+        self.scheduler.visited('tab__1', TabScheduler.HEALTHY, now=10)
+        self.scheduler.visited('tab__1', TabScheduler.ATTENTION, now=30)
+        self.assertFalse(self.scheduler.is_due('tab__1', now=31))
+        self.assertTrue(self.scheduler.is_due('tab__1', now=32))
+        self.scheduler.visited('tab__1', TabScheduler.HEALTHY, now=32)
+        self.assertTrue(self.scheduler.is_due('tab__1', now=42))
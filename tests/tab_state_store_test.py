@@ -0,0 +1,75 @@
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase
+
+from app.game_scenario import TownStuckGameScenario
+from app.v2.detection_config import DetectionConfig
+from app.v2.metrics import CAPTURE_FAILURES
+from app.v2.session_replay import SessionReplay
+from app.v2.tab_scheduler import TabScheduler
+from app.v2.tab_state_store import TabStateStore
+
+
+class TabStateStoreTests(TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, 'tab_state.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_timers_restored_from_snapshot(self):
+        store = TabStateStore(self.path)
+        store.update('VLV-A1__1', last_seen_town_stuck=1000.0)
+        store.update('VLV-A1__2', login_step='login_clicked', login_step_at=1010.0)
+        store.save()
+
+        restored = TabStateStore(self.path)
+        self.assertEqual(len(restored), 2)
+        self.assertEqual(restored.get('VLV-A1__1').last_seen_town_stuck, 1000.0)
+        self.assertIsNone(restored.get('VLV-A1__1').last_seen_login)
+        self.assertEqual(restored.get('VLV-A1__2').login_step, 'login_clicked')
+
+    def test_visit_alone_snapshotted(self):
+        store = TabStateStore(self.path, snapshot_seconds=0)
+        store.touch('VLV-A1__1')
+        visited = store.get('VLV-A1__1').last_visit
+        store.tick()
+        self.assertEqual(TabStateStore(self.path).get('VLV-A1__1').last_visit, visited)
+
+    def test_tabs_not_visited_within_ttl_evicted(self):
+        store = TabStateStore(ttl_seconds=60)
+        store.touch('VLV-A1__1', now=1000)
+        store.touch('VLV-A1__2', now=1050)
+        self.assertEqual(store.evict(now=1080), ['VLV-A1__1'])
+        self.assertEqual(len(store), 1)
+
+    def test_unreadable_snapshot_ignored(self):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write('{"tabs": ')
+        self.assertEqual(len(TabStateStore(self.path)), 0)
+
+
+class EvictionTests(TestCase):
+    def test_evicted_tabs_forgotten_everywhere(self):
+        walk = SessionReplay(DetectionConfig.from_file('data/config_v2.ini'))
+        town_stuck = next(s for s in walk.game_scenarios if isinstance(s, TownStuckGameScenario))
+        for game_tab_id, visited_at in (('VLV-A1__1', time.time() - 10 ** 6), ('VLV-A1__2', time.time())):
+            walk.tab_states.touch(game_tab_id, now=visited_at)
+            walk.tab_scheduler.visited(game_tab_id, TabScheduler.HEALTHY)
+            town_stuck.detect_cache[game_tab_id] = ('signature', None)
+            town_stuck.town_tracker.visits[game_tab_id] = 1
+        walk.tab_states.touch('VLV-B1__1', now=time.time() - 10 ** 6)
+        CAPTURE_FAILURES.inc(window='VLV-A1')
+        CAPTURE_FAILURES.inc(window='VLV-B1')
+        self.addCleanup(CAPTURE_FAILURES.forget, window='VLV-A1')
+
+        walk.forget_tabs(walk.tab_states.tick())
+        self.assertEqual(list(walk.tab_scheduler.overdue_seconds()), ['VLV-A1__2'])
+        self.assertEqual(list(town_stuck.detect_cache), ['VLV-A1__2'])
+        self.assertEqual(list(town_stuck.town_tracker.visits), ['VLV-A1__2'])
+        # VLV-A1 still has a tab in the store
+        self.assertIn('window="VLV-A1"', '\n'.join(CAPTURE_FAILURES.lines()))
+        self.assertNotIn('window="VLV-B1"', '\n'.join(CAPTURE_FAILURES.lines()))
@@ -0,0 +1,58 @@
+from unittest import TestCase
+
+import cv2
+
+from app.v2.template_tracker import TemplateRoiTracker
+
+
+class CountingMatcher:
+    def __init__(self, threshold=0.9):
+        self.threshold = threshold
+        self.searched_pixels = []
+
+    def __call__(self, template, image):
+        self.searched_pixels.append(image.shape[0] * image.shape[1])
+        result = cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, loc = cv2.minMaxLoc(result)
+        if score < self.threshold:
+            return None
+        return loc, template.shape[1], template.shape[0]
+
+
+class TemplateRoiTrackerTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.image = cv2.imread("images/game_tabs/screenshot-2.png")
+        cls.other = cv2.imread("data/img/town/DaiLy-sm1.png")
+        cls.template = cls.image[40:70, 690:760].copy()
+
+    def test_second_visit_searches_only_roi(self):
+        tracker = TemplateRoiTracker(padding=10, full_scan_every=20)
+        matcher = CountingMatcher()
+
+        first = tracker.search("tab1", [self.other, self.template], self.image, matcher)
+        full_scan_pixels = matcher.searched_pixels[-1]
+        second = tracker.search("tab1", [self.other, self.template], self.image, matcher)
+
+        self.assertEqual(first, (1, ((690, 40), 70, 30)))
+        self.assertEqual(second, first)
+        self.assertEqual(matcher.searched_pixels[-1], (30 + 20) * (70 + 20))
+        self.assertLess(matcher.searched_pixels[-1], full_scan_pixels)
+
+    def test_periodic_full_rescan(self):
+        tracker = TemplateRoiTracker(padding=10, full_scan_every=2)
+        matcher = CountingMatcher()
+        tracker.search("tab1", [self.template], self.image, matcher)
+        tracker.search("tab1", [self.template], self.image, matcher)
+
+        self.assertEqual(matcher.searched_pixels[-1], self.image.shape[0] * self.image.shape[1])
+
+    def test_miss_forgets_location(self):
+        tracker = TemplateRoiTracker()
+        matcher = CountingMatcher()
+        tracker.search("tab1", [self.template], self.image, matcher)
+        blank = self.image.copy()
+        blank[40:70, 690:760] = 0
+
+        self.assertIsNone(tracker.search("tab1", [self.template], blank, matcher))
+        self.assertNotIn("tab1", tracker.locations)